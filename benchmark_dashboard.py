@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Measure DashboardService.build() time on a synthetic data set.
+
+The data file holds N contracts (each with its own deal), N/10 creators and
+N/100 brands, with contract end dates spread over the next two years so a
+realistic share of them falls in the expiry window.  The script reports the
+first (cold) build of a new service, which parses every date string into
+its expiry index, and the median of the following (warm) builds.
+
+Usage::
+
+    python benchmark_dashboard.py                      # 100k contracts
+    python benchmark_dashboard.py --contracts 10000 100000 --repeat 10
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+# Ensure the project root is on sys.path so 'crm' is importable.
+sys.path.insert(0, str(Path(__file__).parent))
+
+from crm.persistence.json_store import JsonDataStore
+from crm.services.dashboard_service import DashboardService
+from crm.services.expiry_index import parse_date
+
+
+def _seed(filepath: str, contracts: int) -> None:
+    store = JsonDataStore(filepath)
+    data = store.load()
+    today = date.today()
+    creators = max(1, contracts // 10)
+    brands = max(1, contracts // 100)
+    data["persons"] = [
+        {"person_id": i, "full_name": f"Person {i}", "email": f"p{i}@example.com", "phone": ""}
+        for i in range(1, creators + 1)
+    ]
+    data["creators"] = [
+        {"creator_id": i, "person_id": i, "employee_id": 0, "description": ""}
+        for i in range(1, creators + 1)
+    ]
+    data["brands"] = [
+        {"brand_id": i, "name": f"Brand {i}", "description": f"Brand {i}"}
+        for i in range(1, brands + 1)
+    ]
+    data["deals"] = [
+        {"deal_id": i, "client_id": i % creators + 1, "brand_id": i % brands + 1,
+         "brand_rep_id": 0, "pitch_date": "2024-01-01", "is_active": i % 3 == 0, "is_successful": False}
+        for i in range(1, contracts + 1)
+    ]
+    data["contracts"] = [
+        {"contract_id": i, "deal_id": i, "details": "", "payment": 0, "agency_percentage": 0,
+         "start_date": "2024-01-01", "end_date": (today + timedelta(days=i % 730)).isoformat(),
+         "status": "Active", "is_approved": True}
+        for i in range(1, contracts + 1)
+    ]
+    data["_next_id"] = contracts + 1
+    store.save(data)
+
+
+def run(contracts: int, repeat: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        filepath = os.path.join(tmp, "data.json")
+        _seed(filepath, contracts)
+        store = JsonDataStore(filepath, cache=True)
+        DashboardService(store).build(user={})  # load the snapshot into the store cache
+        parse_date.cache_clear()
+        svc = DashboardService(store)
+
+        started = time.perf_counter()
+        svc.build(user={})
+        cold = time.perf_counter() - started
+
+        warm = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            svc.build(user={})
+            warm.append(time.perf_counter() - started)
+        return {"contracts": contracts, "cold": cold, "warm": statistics.median(warm)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--contracts", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--repeat", type=int, default=5, help="warm builds per size")
+    args = parser.parse_args()
+
+    print(f"{'contracts':>10} {'cold ms':>9} {'warm ms':>9}")
+    for n in args.contracts:
+        r = run(n, args.repeat)
+        print(f"{r['contracts']:>10} {r['cold'] * 1000:>9.1f} {r['warm'] * 1000:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
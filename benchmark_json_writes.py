@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Measure sustained JSON-backend write throughput with N worker processes.
+
+Each worker process plays the role of a gunicorn worker: it opens its own
+``JsonDataStore`` on a shared data file and performs small writes (one new
+brand per save) as fast as it can.  After the run the script checks that no
+write was lost and reports aggregate saves per second.
+
+Usage::
+
+    python benchmark_json_writes.py                      # 1, 2, 4 workers
+    python benchmark_json_writes.py --workers 1 2 4 8 --writes 200
+    python benchmark_json_writes.py --journal            # journaled mode
+    python benchmark_json_writes.py --seed-records 20000 # larger data file
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Ensure the project root is on sys.path so 'crm' is importable.
+sys.path.insert(0, str(Path(__file__).parent))
+
+from crm.persistence.json_store import JsonDataStore
+from crm.persistence.repositories import BrandRepository
+
+
+def _seed(filepath: str, records: int) -> None:
+    store = JsonDataStore(filepath)
+    data = store.load()
+    data["persons"] = [
+        {"person_id": i, "first_name": f"First{i}", "last_name": f"Last{i}", "email": f"p{i}@example.com"}
+        for i in range(1, records + 1)
+    ]
+    data["_next_id"] = records + 1
+    store.save(data)
+
+
+def _worker(filepath: str, journal: bool, worker: int, writes: int) -> None:
+    repo = BrandRepository(JsonDataStore(filepath, cache=True, journal=journal))
+    for i in range(writes):
+        repo.add({"name": f"w{worker}-{i}", "industry": "", "website": "", "notes": ""})
+
+
+def run(workers: int, writes: int, journal: bool, seed_records: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        filepath = os.path.join(tmp, "data.json")
+        _seed(filepath, seed_records)
+        ctx = multiprocessing.get_context("fork")
+        procs = [
+            ctx.Process(target=_worker, args=(filepath, journal, w, writes))
+            for w in range(workers)
+        ]
+        started = time.perf_counter()
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - started
+
+        brands = JsonDataStore(filepath, journal=journal).load()["brands"]
+        expected = workers * writes
+        return {
+            "workers": workers,
+            "saves": expected,
+            "seconds": elapsed,
+            "saves_per_sec": expected / elapsed if elapsed else 0.0,
+            "lost": expected - len({b["brand_id"] for b in brands}),
+        }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--writes", type=int, default=100, help="saves per worker")
+    parser.add_argument("--journal", action="store_true", help="use the write-ahead journal")
+    parser.add_argument("--seed-records", type=int, default=2000, help="records in the data file")
+    args = parser.parse_args()
+
+    mode = "journal" if args.journal else "atomic rewrite"
+    print(f"JSON store, {mode}, {args.seed_records} seed records, {args.writes} saves/worker")
+    print(f"{'workers':>8} {'saves':>8} {'seconds':>9} {'saves/s':>9} {'lost':>6}")
+    failed = False
+    for n in args.workers:
+        r = run(n, args.writes, args.journal, args.seed_records)
+        failed |= r["lost"] != 0
+        print(f"{r['workers']:>8} {r['saves']:>8} {r['seconds']:>9.2f} {r['saves_per_sec']:>9.1f} {r['lost']:>6}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+"""Record timestamps and the recent-activity feed.
+
+Repositories stamp records of the tracked collections (creators, brands,
+deals, contracts) with ``created_at`` / ``updated_at`` (UTC, ISO-8601) and
+append one event per write to a feed kept in the data dict under
+``ACTIVITY_KEY``, a settings entry persisted by every backend like the KPI
+counters::
+
+    {"seq": 42, "events": [<oldest>, ..., <newest>]}
+
+    {"seq": 42, "at": "2026-10-18T09:30:00+00:00", "action": "created",
+     "entity": "deals", "id": 7, "label": "Deal #7"}
+
+Only the newest ``ACTIVITY_LIMIT`` events are kept (a ring buffer), so the
+last N events are read in O(N) without touching the entity collections.
+``seq`` grows by one per event and doubles as the paging cursor.
+
+Writes that bypass the repositories are not recorded.  Repositories never
+write the feed through the data dict: events travel with the save (or go
+to the store's ``append_activity``) and every backend appends them to the
+stored feed under its write lock or in the same transaction, so concurrent
+writers neither drop events nor reuse a ``seq``.
+"""
+from __future__ import annotations
+
+import heapq
+from datetime import datetime, timezone
+from itertools import islice
+from types import MappingProxyType
+from typing import Iterator, Mapping
+
+ACTIVITY_KEY = "_activity"
+ACTIVITY_LIMIT = 100
+
+CREATED = "created"
+UPDATED = "updated"
+DELETED = "deleted"
+
+# collection -> primary-key field, for every collection with timestamps and events
+TRACKED: Mapping[str, str] = MappingProxyType({
+    "creators": "creator_id",
+    "brands": "brand_id",
+    "deals": "deal_id",
+    "contracts": "contract_id",
+})
+
+
+def tracks(key: str) -> bool:
+    """True if writes to collection *key* are stamped and recorded."""
+    return key in TRACKED
+
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def stamp_created(key: str, item: dict, now: str | None = None) -> dict:
+    """Return a copy of *item* with ``created_at`` / ``updated_at`` set.
+
+    Values the caller already set are kept.
+    """
+    if not tracks(key):
+        return item
+    now = now or utc_now()
+    stamped = dict(item)
+    stamped.setdefault("created_at", now)
+    stamped.setdefault("updated_at", now)
+    return stamped
+
+
+def stamp_updated(key: str, updates: dict, now: str | None = None) -> dict:
+    """Return a copy of *updates* that also sets ``updated_at`` (unless given)."""
+    if not tracks(key):
+        return updates
+    stamped = dict(updates)
+    stamped.setdefault("updated_at", now or utc_now())
+    return stamped
+
+
+def activity_label(key: str, record: Mapping, person: Mapping | None = None) -> str:
+    """Return the display label of a tracked record (creators need their person)."""
+    record_id = record.get(TRACKED[key])
+    if key == "creators":
+        person = person or {}
+        return person.get("display_name") or person.get("full_name") or f"Creator #{record_id}"
+    if key == "brands":
+        return record.get("description") or record.get("name") or f"Brand #{record_id}"
+    if key == "deals":
+        return f"Deal #{record_id}"
+    return f"Contract #{record_id}"
+
+
+def activity_event(
+    action: str,
+    key: str,
+    record: Mapping,
+    *,
+    person: Mapping | None = None,
+    at: str | None = None,
+) -> dict:
+    """Describe one write to a tracked record (``seq`` is assigned on append)."""
+    return {
+        "at": at or utc_now(),
+        "action": action,
+        "entity": key,
+        "id": record.get(TRACKED[key]),
+        "label": activity_label(key, record, person),
+    }
+
+
+def seed_activity(data: Mapping, limit: int = ACTIVITY_LIMIT) -> dict:
+    """Build a feed from the newest tracked records in *data*.
+
+    Used when a data set gets its first feed (imports, first write) so the
+    dashboard does not start out empty.  Records are ordered by ID, the
+    only recency signal older records carry.
+    """
+    persons = {p.get("person_id"): p for p in data.get("persons", [])}
+    candidates = (
+        (record.get(id_field) or 0, key, record)
+        for key, id_field in TRACKED.items()
+        for record in data.get(key, [])
+    )
+    newest = heapq.nlargest(limit, candidates, key=lambda c: c[0])
+    events = []
+    for seq, (_record_id, key, record) in enumerate(reversed(newest), start=1):
+        event = activity_event(
+            CREATED, key, record,
+            person=persons.get(record.get("person_id")) if key == "creators" else None,
+        )
+        # Records written before timestamps existed have no known time.
+        event["at"] = record.get("created_at")
+        event["seq"] = seq
+        events.append(event)
+    return {"seq": len(events), "events": events}
+
+
+def append_activity(data: dict, event: dict, limit: int = ACTIVITY_LIMIT) -> None:
+    """Append *event* to the feed in *data*, dropping the oldest beyond *limit*.
+
+    A data set without a feed is seeded first.  The feed dict is replaced,
+    never mutated, so snapshots sharing the old one are unaffected.
+    """
+    feed = data.get(ACTIVITY_KEY)
+    if feed is None:
+        # *data* already holds the write; seed without the record it is about.
+        feed = seed_activity(data, limit)
+        target = (event.get("entity"), event.get("id"))
+        feed["events"] = [e for e in feed["events"] if (e["entity"], e["id"]) != target]
+    seq = feed.get("seq", 0) + 1
+    events = list(feed.get("events", [])[-(limit - 1):]) if limit > 1 else []
+    events.append({**event, "seq": seq})
+    data[ACTIVITY_KEY] = {"seq": seq, "events": events}
+
+
+def iter_activity(data: Mapping, before: int | None = None) -> Iterator[dict]:
+    """Yield feed events newest first, starting below sequence *before*."""
+    feed = data.get(ACTIVITY_KEY) or {}
+    for event in reversed(feed.get("events", [])):
+        if before is None or event.get("seq", 0) < before:
+            yield event
+
+
+def recent_activity(data: Mapping, limit: int, before: int | None = None) -> list[dict]:
+    """Return up to *limit* events, newest first (see ``iter_activity``)."""
+    return list(islice(iter_activity(data, before), limit))
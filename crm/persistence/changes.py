@@ -0,0 +1,229 @@
+"""Record-level change descriptions shared by stores and repositories.
+
+``save(data, changes=...)`` accepts an optional list of ``RecordChange``
+entries describing exactly which records a write touched.  Stores that can
+persist single records (SQLite, PostgreSQL) apply just those changes; the
+JSON store rewrites the file or, in journaled mode, appends them to its
+write-ahead log.
+
+``ChangeTracker`` lets a store derive those changes itself when ``save`` is
+called with a whole dataset, by diffing against per-record fingerprints of
+the state that dataset was loaded at (``TrackedData``).
+"""
+from __future__ import annotations
+
+from typing import Any, NamedTuple
+
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+
+# Collection key → primary-key field, for every record collection.
+PRIMARY_KEYS: dict[str, str] = {
+    "roles": "role_id",
+    "persons": "person_id",
+    "users": "user_id",
+    "employees": "employee_id",
+    "creators": "creator_id",
+    "social_media_accounts": "social_media_id",
+    "brands": "brand_id",
+    "brand_contacts": "brand_contact_id",
+    "deals": "deal_id",
+    "contracts": "contract_id",
+}
+
+# Setting under which the SQL stores keep each collection's last-write stamp.
+VERSIONS_KEY = "_collection_versions"
+
+
+class RecordChange(NamedTuple):
+    """One inserted, updated or deleted record.
+
+    ``record`` holds the full record after the change for inserts and
+    updates, and is None for deletes.
+    """
+
+    op: str
+    key: str
+    record_id: Any
+    record: dict | None = None
+
+
+def apply_changes(data: dict, changes, primary_keys: dict[str, str] = PRIMARY_KEYS) -> None:
+    """Apply *changes* to the collections in *data* in place.
+
+    Inserts and updates replace the record with the same primary key (or
+    append it); deletes drop it.  Applying the same changes twice gives the
+    same result, which makes journal replay safe after a partial compaction.
+    """
+    positions: dict[str, dict[Any, int]] = {}
+    for change in changes:
+        items = data.setdefault(change.key, [])
+        pk = primary_keys.get(change.key)
+        index = positions.get(change.key)
+        if index is None:
+            index = {item.get(pk): i for i, item in enumerate(items)}
+            positions[change.key] = index
+        pos = index.get(change.record_id)
+        if change.op == DELETE:
+            if pos is not None:
+                items.pop(pos)
+                # Positions after the removed record shifted; rebuild lazily.
+                positions.pop(change.key)
+        elif pos is not None:
+            items[pos] = change.record
+        else:
+            index[change.record_id] = len(items)
+            items.append(change.record)
+
+
+def _fingerprint(value: Any) -> int:
+    # repr() is deterministic for the JSON-shaped values stored here and much
+    # cheaper than a sorted json.dumps; a reordered-but-equal record merely
+    # produces a redundant write.
+    return hash(repr(value))
+
+
+class Baseline(NamedTuple):
+    """Fingerprints of one loaded state: ``records[key][id]`` and ``settings[name]``.
+
+    ``owner`` is the store the state was loaded from; another store treats
+    the data as untracked.
+    """
+
+    records: dict[str, dict[Any, int]]
+    settings: dict[str, int]
+    owner: Any = None
+
+
+class TrackedData(dict):
+    """A dataset as a store loaded it, carrying the ``Baseline`` it was loaded at.
+
+    The baseline travels with the data rather than living on the store, so
+    two callers that load, edit and save through one store instance (threaded
+    workers) each diff against what *they* loaded.
+    """
+
+    __slots__ = ("baseline",)
+
+
+def baseline_of(data) -> Baseline | None:
+    """Return the baseline *data* was loaded at, or None if it is not tracked."""
+    return getattr(data, "baseline", None)
+
+
+class ChangeTracker:
+    """Per-record fingerprints of the state a dataset was loaded at.
+
+    ``track(data)`` attaches them to a freshly loaded dataset and
+    ``diff(data)`` compares the dataset with them, returning the
+    ``RecordChange`` entries needed to turn one into the other, so a plain
+    ``save(data)`` can write only what changed.  Top-level values that are
+    not record collections (``access_control_matrix``, ``_next_id``) are
+    tracked as a whole; see ``changed_settings``.  Baselines are immutable
+    and may be shared by copies of the same state.
+    """
+
+    def __init__(self, primary_keys: dict[str, str], owner: Any = None):
+        self._primary_keys = primary_keys
+        # Baselines made for another store describe that store's state, so
+        # data copied between stores is saved in full.
+        self._owner = owner if owner is not None else self
+
+    def track(self, data: dict, baseline: Baseline | None = None) -> TrackedData:
+        """Return *data* as ``TrackedData`` at *baseline* (default: its own state).
+
+        Plain dicts are wrapped in a shallow copy; ``TrackedData`` is updated
+        in place.
+        """
+        tracked = data if isinstance(data, TrackedData) else TrackedData(data)
+        tracked.baseline = baseline if baseline is not None else self._baseline(data)
+        return tracked
+
+    def settle(self, data, changes=None) -> None:
+        """Move *data*'s baseline to the state just saved from it.
+
+        With *changes* the baseline is advanced by them without
+        re-fingerprinting untouched records; settings are re-read from
+        *data*.  Plain dicts are left alone.
+        """
+        if not isinstance(data, TrackedData):
+            return
+        baseline = self._own_baseline(data)
+        if baseline is None or changes is None:
+            data.baseline = self._baseline(data)
+            return
+        records = dict(baseline.records)
+        copied = set()
+        for change in changes:
+            if change.key not in copied:
+                records[change.key] = dict(records.get(change.key, {}))
+                copied.add(change.key)
+            if change.op == DELETE:
+                records[change.key].pop(change.record_id, None)
+            else:
+                records[change.key][change.record_id] = _fingerprint(change.record)
+        data.baseline = Baseline(records, self._settings(data), self._owner)
+
+    def _own_baseline(self, data) -> Baseline | None:
+        baseline = baseline_of(data)
+        return baseline if baseline is not None and baseline.owner is self._owner else None
+
+    def _baseline(self, data: dict) -> Baseline:
+        records = {
+            key: self._fingerprints(key, data.get(key) or [])
+            for key in self._primary_keys
+        }
+        return Baseline(records, self._settings(data), self._owner)
+
+    def _settings(self, data: dict) -> dict[str, int]:
+        return {
+            name: _fingerprint(value)
+            for name, value in data.items()
+            if name not in self._primary_keys
+        }
+
+    def diff(self, data: dict) -> list[RecordChange] | None:
+        """Return the changes from *data*'s baseline to *data*, or None if untracked."""
+        baseline = self._own_baseline(data)
+        if baseline is None:
+            return None
+        changes: list[RecordChange] = []
+        for key, pk in self._primary_keys.items():
+            before = baseline.records.get(key, {})
+            seen = set()
+            for item in data.get(key) or []:
+                record_id = item.get(pk)
+                if record_id is None:
+                    continue
+                seen.add(record_id)
+                old = before.get(record_id)
+                if old is None:
+                    changes.append(RecordChange(INSERT, key, record_id, item))
+                elif old != _fingerprint(item):
+                    changes.append(RecordChange(UPDATE, key, record_id, item))
+            changes.extend(
+                RecordChange(DELETE, key, record_id)
+                for record_id in before
+                if record_id not in seen
+            )
+        return changes
+
+    def changed_settings(self, data: dict) -> set[str]:
+        """Return the non-collection keys of *data* that differ from its baseline
+        (all of them if *data* is untracked)."""
+        baseline = self._own_baseline(data)
+        return {
+            name
+            for name, value in data.items()
+            if name not in self._primary_keys
+            and (baseline is None or baseline.settings.get(name) != _fingerprint(value))
+        }
+
+    def _fingerprints(self, key: str, items) -> dict[Any, int]:
+        pk = self._primary_keys[key]
+        return {
+            item[pk]: _fingerprint(item)
+            for item in items
+            if item.get(pk) is not None
+        }
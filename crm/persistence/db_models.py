@@ -30,6 +30,15 @@ class Base(DeclarativeBase):
     """Shared declarative base for all CRM ORM models."""
 
 
+class TimestampMixin:
+    """``created_at`` / ``updated_at`` (ISO-8601 UTC), set by the repositories.
+
+    Nullable: rows written before timestamps existed have none.
+    """
+    created_at = Column(String(32), nullable=True)
+    updated_at = Column(String(32), nullable=True)
+
+
 # ---------------------------------------------------------------------------
 # Role
 # ---------------------------------------------------------------------------
@@ -135,7 +144,7 @@ class EmployeeModel(Base):
 # Creator  (formerly Client)
 # ---------------------------------------------------------------------------
 
-class CreatorModel(Base):
+class CreatorModel(TimestampMixin, Base):
     """Maps to the ``creators`` table (formerly ``clients``).
 
     Foreign keys:
@@ -184,7 +193,7 @@ class SocialMediaAccountModel(Base):
 # Brand
 # ---------------------------------------------------------------------------
 
-class BrandModel(Base):
+class BrandModel(TimestampMixin, Base):
     """Maps to the ``brands`` table."""
     __tablename__ = "brands"
 
@@ -223,7 +232,7 @@ class BrandContactModel(Base):
 # Deal
 # ---------------------------------------------------------------------------
 
-class DealModel(Base):
+class DealModel(TimestampMixin, Base):
     """Maps to the ``deals`` table.
 
     Uses the current (post-migration) field names ``creator_id`` and
@@ -247,7 +256,7 @@ class DealModel(Base):
 # Contract
 # ---------------------------------------------------------------------------
 
-class ContractModel(Base):
+class ContractModel(TimestampMixin, Base):
     """Maps to the ``contracts`` table."""
     __tablename__ = "contracts"
 
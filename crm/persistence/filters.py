@@ -0,0 +1,144 @@
+"""Record filters shared by every store.
+
+A filter is a tuple of ``Condition`` (field, operator, values), all of which
+a record must satisfy.  API query strings parse into conditions with
+``parse_filters``::
+
+    is_active=true            → Condition("is_active", "eq", ("true",))
+    status__in=Pending,Signed → Condition("status", "in", ("Pending", "Signed"))
+    payment__gte=5000         → Condition("payment", "gte", ("5000",))
+    end_date__lt=2026-01-01   → Condition("end_date", "lt", ("2026-01-01",))
+
+Query strings carry no types, so a text value is read as whichever type
+the field holds: ``"5000"`` matches the number 5000 and the string
+``"5000"``, ``"true"`` the boolean and the string, ``"null"`` a missing or
+null field.  Values of other types (from Python callers) only match their
+own type.  Values are only compared with values of the same type, so a
+range never matches a field of another type (or a missing one).
+
+Each store compiles the conditions once into its own form: a Python
+predicate (``compile_predicate``) for the JSON store and in-memory pages,
+SQLAlchemy clauses in ``SqliteDataStore`` and jsonb expressions in
+``PostgresDataStore``; ``value_forms`` gives them the typed candidates.
+"""
+from __future__ import annotations
+
+import operator
+import re
+from typing import Any, Callable, Iterable, Mapping, NamedTuple
+
+OPERATORS = ("eq", "in", "lt", "lte", "gt", "gte")
+
+# Range operators and the comparison each applies (record value OP filter value).
+RANGE_OPERATORS: Mapping[str, Callable[[Any, Any], bool]] = {
+    "lt": operator.lt,
+    "lte": operator.le,
+    "gt": operator.gt,
+    "gte": operator.ge,
+}
+
+# Type names, as jsonb_typeof() spells them.
+NULL, BOOLEAN, NUMBER, STRING = "null", "boolean", "number", "string"
+
+_FIELD_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*\Z")
+_INTEGER = re.compile(r"-?\d+\Z")
+_NUMBER = re.compile(r"-?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?\Z")
+
+
+class Condition(NamedTuple):
+    field: str
+    op: str
+    values: tuple
+
+
+def kind_of(value) -> str | None:
+    """Return the type name of a record value (None for lists and dicts)."""
+    if value is None:
+        return NULL
+    if isinstance(value, bool):
+        return BOOLEAN
+    if isinstance(value, (int, float)):
+        return NUMBER
+    if isinstance(value, str):
+        return STRING
+    return None
+
+
+def value_forms(value) -> list[tuple[str, Any]]:
+    """Return the ``(type name, value)`` forms a filter value matches."""
+    if not isinstance(value, str):
+        kind = kind_of(value)
+        return [(kind, value)] if kind is not None else []
+    forms: list[tuple[str, Any]] = [(STRING, value)]
+    if _INTEGER.match(value):
+        forms.append((NUMBER, int(value)))
+    elif _NUMBER.match(value):
+        forms.append((NUMBER, float(value)))
+    lowered = value.lower()
+    if lowered in ("true", "false"):
+        forms.append((BOOLEAN, lowered == "true"))
+    elif lowered == "null":
+        forms.append((NULL, None))
+    return forms
+
+
+def condition_forms(condition: Condition) -> list[tuple[str, Any]]:
+    """Return the typed forms of all of *condition*'s values."""
+    return [form for value in condition.values for form in value_forms(value)]
+
+
+def parse_filters(args: Iterable[tuple[str, str]]) -> tuple[Condition, ...]:
+    """Parse ``(name, value)`` query arguments into conditions.
+
+    ``name`` is a field, optionally followed by ``__<operator>``; ``in``
+    takes a comma-separated list.  Raises ValueError for a malformed field
+    name or an unknown operator.
+    """
+    conditions = []
+    for name, raw in args:
+        field, sep, op = name.rpartition("__")
+        if not sep:
+            field, op = name, "eq"
+        if op not in OPERATORS:
+            raise ValueError(f"unknown filter operator {op!r} in {name!r}")
+        if not _FIELD_NAME.match(field):
+            raise ValueError(f"invalid filter field {field!r}")
+        values = tuple(v.strip() for v in raw.split(",")) if op == "in" else (raw,)
+        conditions.append(Condition(field, op, values))
+    return tuple(conditions)
+
+
+def _compile_condition(condition: Condition) -> Callable[[Mapping], bool]:
+    field = condition.field
+    forms = condition_forms(condition)
+    if condition.op in RANGE_OPERATORS:
+        compare = RANGE_OPERATORS[condition.op]
+        candidates = [(kind, value) for kind, value in forms if kind != NULL]
+
+        def in_range(record: Mapping) -> bool:
+            value = record.get(field)
+            kind = kind_of(value)
+            return any(kind == k and compare(value, v) for k, v in candidates)
+
+        return in_range
+
+    by_kind: dict[str, set] = {}
+    for kind, value in forms:
+        by_kind.setdefault(kind, set()).add(value)
+
+    def equals(record: Mapping) -> bool:
+        value = record.get(field)
+        allowed = by_kind.get(kind_of(value))
+        return allowed is not None and value in allowed
+
+    return equals
+
+
+def compile_predicate(conditions: Iterable[Condition]) -> Callable[[Mapping], bool] | None:
+    """Compile *conditions* into one record predicate (None when there are none)."""
+    tests = [_compile_condition(c) for c in conditions]
+    if not tests:
+        return None
+    if len(tests) == 1:
+        return tests[0]
+    return lambda record: all(test(record) for test in tests)
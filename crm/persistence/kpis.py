@@ -0,0 +1,115 @@
+"""Materialized dashboard KPI counters.
+
+The counters live in the data dict under ``KPI_KEY`` (a settings entry,
+persisted by every backend like ``access_control_matrix``) so the dashboard
+can read them without scanning the collections:
+
+- ``creators``, ``brands``, ``contracts``: number of records.
+- ``active_deals``: deals with a truthy ``is_active``.
+
+Repositories pass counter deltas with every add / update / delete, and
+each store adds them to the counters it currently holds: in SQL on the
+database backends, under the write lock in the JSON store.  Concurrent
+writers therefore add up instead of overwriting one another.  Writes that
+bypass the repositories (imports, hand edits) can make the counters drift;
+``reconcile_kpis`` recounts from the data and applies the correction.
+"""
+from __future__ import annotations
+
+from types import MappingProxyType
+from typing import Callable, Mapping
+
+KPI_KEY = "_kpis"
+
+# counter name -> (collection, predicate a record must satisfy to count)
+KPI_COUNTERS: Mapping[str, tuple[str, Callable[[Mapping], bool] | None]] = MappingProxyType({
+    "creators": ("creators", None),
+    "brands": ("brands", None),
+    "active_deals": ("deals", lambda deal: bool(deal.get("is_active"))),
+    "contracts": ("contracts", None),
+})
+
+_BY_COLLECTION: dict[str, list[tuple[str, Callable[[Mapping], bool] | None]]] = {}
+for _name, (_key, _predicate) in KPI_COUNTERS.items():
+    _BY_COLLECTION.setdefault(_key, []).append((_name, _predicate))
+
+
+def tracks(key: str) -> bool:
+    """True if records of collection *key* feed any counter."""
+    return key in _BY_COLLECTION
+
+
+def depends_on_fields(key: str) -> bool:
+    """True if an update to a *key* record can move a counter."""
+    return any(predicate is not None for _name, predicate in _BY_COLLECTION.get(key, ()))
+
+
+def count_kpis(data: Mapping) -> dict[str, int]:
+    """Count every KPI from scratch."""
+    counts = {}
+    for name, (key, predicate) in KPI_COUNTERS.items():
+        records = data.get(key, [])
+        counts[name] = len(records) if predicate is None else sum(1 for r in records if predicate(r))
+    return counts
+
+
+def kpi_deltas(key: str, before: Mapping | None, after: Mapping | None) -> dict[str, int]:
+    """Return the counter changes for one record going from *before* to *after*.
+
+    ``before`` is None for an insert and ``after`` is None for a delete.
+    """
+    deltas = {}
+    for name, predicate in _BY_COLLECTION.get(key, ()):
+        was = before is not None and (predicate is None or predicate(before))
+        now = after is not None and (predicate is None or predicate(after))
+        if was != now:
+            deltas[name] = 1 if now else -1
+    return deltas
+
+
+def apply_kpi_deltas(data: dict, deltas: Mapping[str, int]) -> None:
+    """Add *deltas* to the counters in *data*, which already holds the write.
+
+    Counters that were never initialised are counted from *data* instead.
+    The counter dict is replaced, never mutated, so snapshots sharing the
+    old one are unaffected.
+    """
+    if not deltas:
+        return
+    counters = data.get(KPI_KEY)
+    if counters is None:
+        data[KPI_KEY] = count_kpis(data)
+        return
+    updated = dict(counters)
+    for name, delta in deltas.items():
+        updated[name] = updated.get(name, 0) + delta
+    data[KPI_KEY] = updated
+
+
+def reconcile_kpis(store) -> dict[str, tuple[int | None, int]]:
+    """Recount the KPIs and correct the stored counters if they drifted.
+
+    The correction is applied as deltas through ``store.adjust_kpis``, which
+    re-reads the stored counters under the store's write lock (or in SQL),
+    so writes that land between the recount and the correction are kept.
+    A data set without counters gets them stored outright.
+
+    Returns ``{name: (stored, actual)}`` for every counter that was wrong
+    (empty when nothing needed fixing).
+    """
+    data = store.load()
+    actual = count_kpis(data)
+    stored = data.get(KPI_KEY)
+    drift = {
+        name: ((stored or {}).get(name), value)
+        for name, value in actual.items()
+        if (stored or {}).get(name) != value
+    }
+    if not drift:
+        return drift
+    if stored is None:
+        data[KPI_KEY] = actual
+        store.save(data)
+    else:
+        store.adjust_kpis({name: value - (was or 0) for name, (was, value) in drift.items()})
+    return drift
@@ -0,0 +1,134 @@
+"""Keyset paging over a collection.
+
+A ``PageQuery`` describes one page of a collection: the records ordered by
+one field (``sort``, the primary key when None) with the primary key as the
+tie-breaker, starting after the ``(sort value, primary key)`` position of
+the last record of the previous page, at most ``limit`` records, optionally
+restricted to a set of primary keys (``ids``, e.g. a visibility scope) and
+to records matching ``filters`` (see ``crm.persistence.filters``).
+
+Every store answers it through ``page_records(key, query)``: the SQL
+stores in one ``ORDER BY ... LIMIT`` query, the JSON store (and anything
+else) from a ``SortedRecords`` order kept over its snapshot.  In all of
+them ``None`` (or a missing field) sorts first ascending and last
+descending.  A field is expected to hold one type; how mixed types order
+differs between backends.
+
+The cursor position replaces an OFFSET, so a deep page costs no more than
+the first one (in the SQL stores, as long as the sort field is indexed).
+"""
+from __future__ import annotations
+
+import json
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from itertools import islice
+from operator import itemgetter
+from typing import Any, Iterable, Iterator, Mapping
+
+from crm.persistence.filters import Condition, compile_predicate
+
+
+@dataclass(frozen=True)
+class PageQuery:
+    sort: str | None = None
+    descending: bool = False
+    # (sort value, primary key) of the last record already returned
+    after: tuple[Any, Any] | None = None
+    limit: int | None = None
+    ids: frozenset | None = None
+    filters: tuple[Condition, ...] = ()
+
+
+def sort_key(value) -> tuple:
+    """Return a key ordering *value* like the SQL stores do (see module doc)."""
+    if value is None:
+        return (0, 0)
+    if isinstance(value, (bool, int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, value)
+    return (3, json.dumps(value, sort_keys=True, default=str))
+
+
+class SortedRecords:
+    """A collection's records sorted by one field, for repeated paging.
+
+    Building the order costs one sort; each page after that is a bisection
+    plus the records returned (and any skipped by ``filters``).  With
+    ``ids`` only those records' positions are visited, so a small scope
+    over a large collection costs O(k log k) for k IDs.
+    """
+
+    def __init__(self, records: Iterable[Mapping], pk: str, sort: str | None = None):
+        self.pk = pk
+        self.sort = sort or pk
+        entries = sorted(
+            (((sort_key(r.get(self.sort)), sort_key(r.get(pk))), r) for r in records),
+            key=itemgetter(0),
+        )
+        self._keys = [key for key, _record in entries]
+        self._records = [record for _key, record in entries]
+        self._positions: dict | None = None
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _positions_of(self, ids) -> list[int]:
+        if self._positions is None:
+            # Built on first use; the first record wins when IDs repeat.
+            positions: dict = {}
+            for i, record in enumerate(self._records):
+                positions.setdefault(record.get(self.pk), i)
+            self._positions = positions
+        positions = self._positions
+        return sorted(positions[i] for i in ids if i in positions)
+
+    def _iter_from(self, query: PageQuery) -> Iterator[Mapping]:
+        records = self._records
+        after = query.after
+        if after is not None:
+            after = (sort_key(after[0]), sort_key(after[1]))
+        if query.descending:
+            start = len(records) - 1 if after is None else bisect_left(self._keys, after) - 1
+            if query.ids is not None:
+                positions = self._positions_of(query.ids)
+                indexes = reversed(positions[:bisect_right(positions, start)])
+            else:
+                indexes = range(start, -1, -1)
+        else:
+            start = 0 if after is None else bisect_right(self._keys, after)
+            if query.ids is not None:
+                positions = self._positions_of(query.ids)
+                indexes = positions[bisect_left(positions, start):]
+            else:
+                indexes = range(start, len(records))
+        for i in indexes:
+            yield records[i]
+
+    def matches(self, query: PageQuery) -> Iterator[Mapping]:
+        """Yield every record of *query* in order, ignoring ``query.limit``."""
+        if query.ids is not None and not query.ids:
+            return
+        match = compile_predicate(query.filters)
+        for record in self._iter_from(query):
+            if match is None or match(record):
+                yield record
+
+    def page(self, query: PageQuery) -> list[Mapping]:
+        """Return the records of *query*'s page (``query.sort`` is ignored)."""
+        if query.limit is not None and query.limit <= 0:
+            return []
+        return list(islice(self.matches(query), query.limit))
+
+
+def page_in_memory(records: Iterable[Mapping], pk: str, query: PageQuery) -> list[Mapping]:
+    """Answer *query* over *records* with a throwaway ``SortedRecords``."""
+    if query.ids is not None:
+        records = [r for r in records if r.get(pk) in query.ids]
+    match = compile_predicate(query.filters)
+    if match is not None:
+        records = [r for r in records if match(r)]
+    return SortedRecords(records, pk, query.sort).page(PageQuery(
+        query.sort, query.descending, query.after, query.limit
+    ))
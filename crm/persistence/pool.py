@@ -0,0 +1,299 @@
+"""Bounded, thread-safe connection pool used by PostgresDataStore.
+
+The pool hands out ``PooledConnection`` wrappers that behave like the
+underlying DB-API connection, except that ``close()`` (or leaving a
+``with`` block) returns the connection to the pool instead of closing it.
+Existing ``conn = store._connect(); try: ... finally: conn.close()`` code
+therefore keeps working unchanged.
+
+- At most ``max_size`` connections exist at once; further checkouts wait up
+  to ``timeout`` seconds and then raise ``PoolTimeout``.
+- Connections idle for longer than ``idle_timeout`` are closed, but the pool
+  keeps at least ``min_size`` idle connections around.
+- ``check(conn)`` is run on a connection that has been idle for at least
+  ``check_interval`` seconds before it is handed out; failing connections
+  are replaced.
+- After ``os.fork()`` the child drops every inherited connection (without
+  closing the parent's sockets) so each gunicorn worker opens its own.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from typing import Any, Callable
+
+
+class PoolTimeout(RuntimeError):
+    """Raised when no connection becomes available within the pool timeout."""
+
+
+class PooledConnection:
+    """Connection proxy whose ``close()`` returns it to its pool."""
+
+    def __init__(self, pool: "ConnectionPool", conn: Any, generation: int):
+        self._pool = pool
+        self._conn = conn
+        self._generation = generation
+
+    @property
+    def raw(self):
+        """The underlying driver connection (None once returned)."""
+        return self._conn
+
+    def close(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool._release(conn, self._generation)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Same contract as a psycopg connection block: commit on success,
+        # roll back on error, then give the connection back.
+        try:
+            if self._conn is not None:
+                if exc_type is None:
+                    self._conn.commit()
+                else:
+                    self._conn.rollback()
+        finally:
+            self.close()
+        return False
+
+    def __getattr__(self, name: str):
+        if self._conn is None:
+            raise RuntimeError("connection has been returned to the pool")
+        return getattr(self._conn, name)
+
+    def __del__(self):
+        # A checkout that was never closed must not leak a pool slot.
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """Pool of connections produced by *connect*.
+
+    *check* returns True when a connection is still usable; *reset* restores
+    a returned connection to a clean state (e.g. rolls back an open
+    transaction) and returns False if the connection should be discarded.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        *,
+        min_size: int = 1,
+        max_size: int = 10,
+        timeout: float = 30.0,
+        idle_timeout: float = 300.0,
+        check_interval: float = 30.0,
+        check: Callable[[Any], bool] | None = None,
+        reset: Callable[[Any], bool] | None = None,
+    ) -> None:
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("pool sizes must satisfy 0 <= min_size <= max_size >= 1")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.check_interval = check_interval
+        self._check = check
+        self._reset = reset
+        self._init_state()
+        _live_pools.add(self)
+
+    def _init_state(self) -> None:
+        self._cond = threading.Condition(threading.Lock())
+        self._idle: deque[tuple[Any, float]] = deque()
+        self._size = 0
+        self._pid = os.getpid()
+        self._generation = getattr(self, "_generation", 0) + 1
+        self._closed = False
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+            "timeouts": 0,
+            "connections_opened": 0,
+            "connections_closed": 0,
+            "health_check_failures": 0,
+        }
+
+    # ------------------------------------------------------------------ #
+    # Checkout / return                                                    #
+    # ------------------------------------------------------------------ #
+
+    def getconn(self, timeout: float | None = None) -> PooledConnection:
+        """Check out a connection, waiting up to *timeout* seconds for one."""
+        self._ensure_process()
+        limit = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        waited = False
+        while True:
+            stale: list[Any] = []
+            conn = None
+            idle_since = 0.0
+            open_new = False
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("connection pool is closed")
+                while True:
+                    stale.extend(self._expire_idle_locked(time.monotonic()))
+                    if self._idle:
+                        conn, idle_since = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        open_new = True
+                        break
+                    remaining = limit - (time.monotonic() - started)
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"no connection available within {limit:.1f}s "
+                            f"(max_size={self.max_size})"
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+            self._close_all(stale)
+
+            if open_new:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    self._forget()
+                    raise
+                with self._cond:
+                    self._stats["connections_opened"] += 1
+            elif not self._healthy(conn, idle_since):
+                self._discard(conn)
+                continue
+
+            elapsed = time.monotonic() - started
+            with self._cond:
+                self._stats["checkouts"] += 1
+                if waited:
+                    self._stats["waits"] += 1
+                self._stats["wait_time_total"] += elapsed
+                self._stats["wait_time_max"] = max(self._stats["wait_time_max"], elapsed)
+            return PooledConnection(self, conn, self._generation)
+
+    def _release(self, conn: Any, generation: int) -> None:
+        self._ensure_process()
+        if generation != self._generation:
+            # Checked out before a fork: the connection belongs to the parent.
+            return
+        usable = not self._closed
+        if usable and self._reset is not None:
+            try:
+                usable = bool(self._reset(conn))
+            except Exception:
+                usable = False
+        if not usable:
+            self._discard(conn)
+            return
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def _healthy(self, conn: Any, idle_since: float) -> bool:
+        if self._check is None or time.monotonic() - idle_since < self.check_interval:
+            return True
+        try:
+            ok = bool(self._check(conn))
+        except Exception:
+            ok = False
+        if not ok:
+            with self._cond:
+                self._stats["health_check_failures"] += 1
+        return ok
+
+    def _expire_idle_locked(self, now: float) -> list[Any]:
+        """Pop connections idle past ``idle_timeout`` beyond ``min_size``."""
+        expired = []
+        # The oldest connections sit at the left end of the deque.
+        while (
+            self._idle
+            and len(self._idle) > self.min_size
+            and now - self._idle[0][1] > self.idle_timeout
+        ):
+            expired.append(self._idle.popleft()[0])
+            self._size -= 1
+        return expired
+
+    def _discard(self, conn: Any) -> None:
+        self._forget()
+        self._close_all([conn])
+
+    def _forget(self) -> None:
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _close_all(self, conns: list[Any]) -> None:
+        for conn in conns:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        if conns:
+            with self._cond:
+                self._stats["connections_closed"] += len(conns)
+
+    # ------------------------------------------------------------------ #
+    # Lifecycle                                                            #
+    # ------------------------------------------------------------------ #
+
+    def _ensure_process(self) -> None:
+        if self._pid != os.getpid():
+            self.reset_after_fork()
+
+    def reset_after_fork(self) -> None:
+        """Forget inherited connections without closing the parent's sockets."""
+        self._init_state()
+
+    def close(self) -> None:
+        """Close idle connections; checked-out ones are closed on return."""
+        with self._cond:
+            self._closed = True
+            idle = [conn for conn, _ in self._idle]
+            self._size -= len(idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        self._close_all(idle)
+
+    def stats(self) -> dict[str, Any]:
+        """Return pool size, utilisation and checkout/wait counters."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update(
+                size=self._size,
+                idle=len(self._idle),
+                in_use=self._size - len(self._idle),
+                min_size=self.min_size,
+                max_size=self.max_size,
+            )
+        checkouts = stats["checkouts"]
+        stats["wait_time_avg"] = stats["wait_time_total"] / checkouts if checkouts else 0.0
+        return stats
+
+
+_live_pools: "weakref.WeakSet[ConnectionPool]" = weakref.WeakSet()
+
+
+def _reset_pools_in_child() -> None:
+    for pool in list(_live_pools):
+        pool.reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_pools_in_child)
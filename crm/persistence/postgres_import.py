@@ -14,6 +14,8 @@ import json
 import os
 from datetime import datetime, timezone
 
+from crm.persistence.activity import ACTIVITY_KEY, seed_activity
+from crm.persistence.kpis import KPI_KEY, count_kpis
 from crm.persistence.postgres_store import PostgresDataStore, TABLE_MAP
 from crm.persistence.migration import migrate, needs_migration
 
@@ -117,6 +119,20 @@ def import_from_json(json_path: str, store: PostgresDataStore) -> dict:
                 ["_next_id", json.dumps(max_id)],
             )
 
+            # Seed the dashboard KPI counters from the imported records
+            cur.execute(
+                "INSERT INTO settings (key, value) VALUES (%s, %s::jsonb) "
+                "ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value",
+                [KPI_KEY, json.dumps(count_kpis(data))],
+            )
+
+            # Start the activity feed from the newest imported records
+            cur.execute(
+                "INSERT INTO settings (key, value) VALUES (%s, %s::jsonb) "
+                "ON CONFLICT (key) DO NOTHING",
+                [ACTIVITY_KEY, json.dumps(data.get(ACTIVITY_KEY) or seed_activity(data))],
+            )
+
             # Record last import timestamp
             cur.execute(
                 "INSERT INTO settings (key, value) VALUES (%s, %s::jsonb) "
@@ -124,6 +140,9 @@ def import_from_json(json_path: str, store: PostgresDataStore) -> dict:
                 ["last_import_at", json.dumps(timestamp)],
             )
 
+            # Invalidate anything cached against the empty database
+            store._bump_version(cur, [*TABLE_MAP, "access_control_matrix"])
+
         conn.commit()
     except Exception as exc:
         conn.rollback()
@@ -8,12 +8,35 @@ Tables created:
   roles, persons, users, employees, creators, social_media_accounts,
   brands, brand_contacts, deals, contracts  (each: id_col INTEGER PK, data JSONB)
   settings  (key TEXT PK, value JSONB)
+
+Record-level operations work on single rows instead of the whole database:
+    store.get_record(key, record_id)             → dict | None
+    store.query_records(key, filters, limit=...) → list[dict]
+    store.page_records(key, PageQuery(...))      → list[dict] (keyset page)
+    store.iter_records(key, PageQuery(...))      → Iterator[dict] (server-side cursor)
+    store.insert_record(key, item)               → dict
+    store.update_record(key, record_id, updates) → dict | None
+    store.delete_record(key, record_id)          → bool
+    store.allocate_id()                          → int
+    store.save(data, changes=[RecordChange...])  → applies only those changes
+    store.data_version()                         → int, bumped by every write
+    store.collection_versions(keys)              → {key: (version, modified)}
+
+Connections come from a bounded ``ConnectionPool`` (see ``pool.py``);
+``_connect()`` checks one out and ``close()`` gives it back.  Pool metrics
+are available from ``store.pool_stats()``.
+
+Filters and sorts on non-key fields compare ``NULLIF(data->'field',
+'null'::jsonb)``, with the field name inlined so the planner can match the
+expression indexes on the fields repositories look up by (see
+``JSONB_INDEXES``).
 """
 from __future__ import annotations
 
 import copy
 import json
-from typing import Any
+import time
+from typing import Any, Iterable, Iterator
 
 try:
     import psycopg  # type: ignore
@@ -22,7 +45,13 @@ except ImportError:  # pragma: no cover
     psycopg = None  # type: ignore
     PSYCOPG_AVAILABLE = False
 
+from crm.persistence.changes import DELETE, VERSIONS_KEY, ChangeTracker, RecordChange
 from crm.persistence.json_store import JsonDataStore
+from crm.persistence.activity import ACTIVITY_KEY, ACTIVITY_LIMIT
+from crm.persistence.kpis import KPI_KEY
+from crm.persistence.filters import NULL, RANGE_OPERATORS, Condition, condition_forms
+from crm.persistence.paging import PageQuery
+from crm.persistence.pool import ConnectionPool
 
 # Mapping of JSON collection key → primary-key field name
 TABLE_MAP: dict[str, str] = {
@@ -38,28 +67,133 @@ TABLE_MAP: dict[str, str] = {
     "contracts": "contract_id",
 }
 
+# JSONB fields that get an expression index on ``_field_sql(field)``; these
+# are the foreign keys and lookup fields queried through ``query_records``.
+JSONB_INDEXES: dict[str, tuple[str, ...]] = {
+    "users": ("username", "person_id", "role_id"),
+    "employees": ("person_id", "manager_id"),
+    "creators": ("employee_id", "person_id"),
+    "social_media_accounts": ("creator_id",),
+    "brand_contacts": ("brand_id", "person_id"),
+    "deals": ("creator_id", "client_id", "brand_id", "brand_contact_id"),
+    "contracts": ("deal_id", "end_date"),
+}
+
+_SQL_RANGE_OPERATORS: dict[str, str] = {"lt": "<", "lte": "<=", "gt": ">", "gte": ">="}
+
+# Derived settings (absent until first maintained), saved whenever they change.
+_DERIVED_SETTINGS: tuple[str, ...] = (KPI_KEY, ACTIVITY_KEY)
+
+
+def _check_connection(conn) -> bool:
+    """Health check for a pooled connection that has been idle a while."""
+    if conn.closed:
+        return False
+    conn.execute("SELECT 1")
+    conn.rollback()
+    return True
+
+
+def _reset_connection(conn) -> bool:
+    """Return a connection to a clean state before it goes back to the pool."""
+    if conn.closed or conn.broken:
+        return False
+    if conn.info.transaction_status != psycopg.pq.TransactionStatus.IDLE:
+        conn.rollback()
+    return True
+
+
+def _field_sql(field: str) -> str:
+    """Return the jsonb expression for *field*, JSON null read as SQL NULL.
+
+    The field name is a quoted literal rather than a parameter: only then
+    can the planner match the expression to the ``JSONB_INDEXES`` indexes.
+    """
+    name = field.replace("'", "''")
+    return f"NULLIF(data->'{name}', 'null'::jsonb)"
+
+
+def _filter_sql(condition: Condition) -> tuple[str, list[Any]]:
+    """Compile one filter condition into a jsonb WHERE fragment and its params.
+
+    jsonb comparisons are typed, so each typed form of the values (see
+    ``crm.persistence.filters``) only matches fields of that type.
+    """
+    expr = _field_sql(condition.field)
+    forms = condition_forms(condition)
+    clauses: list[str] = []
+    params: list[Any] = []
+    if condition.op in RANGE_OPERATORS:
+        op = _SQL_RANGE_OPERATORS[condition.op]
+        for kind, value in forms:
+            if kind == NULL:
+                continue
+            clauses.append(f"(jsonb_typeof({expr}) = %s AND {expr} {op} %s::jsonb)")
+            params.extend([kind, json.dumps(value)])
+    else:
+        values = [json.dumps(value) for kind, value in forms if kind != NULL]
+        if values:
+            clauses.append(f"{expr} = ANY(%s::jsonb[])")
+            params.append(values)
+        if any(kind == NULL for kind, _value in forms):
+            clauses.append(f"{expr} IS NULL")
+    if not clauses:
+        return "FALSE", []
+    return "(" + " OR ".join(clauses) + ")", params
+
 
 class PostgresDataStore:
     """Data store backed by PostgreSQL, implementing the same interface as
     JsonDataStore (load / save / next_id).
     """
 
-    def __init__(self, database_url: str) -> None:
+    def __init__(
+        self,
+        database_url: str,
+        *,
+        pool_min_size: int = 1,
+        pool_max_size: int = 10,
+        pool_timeout: float = 30.0,
+        pool_idle_timeout: float = 300.0,
+    ) -> None:
         if not PSYCOPG_AVAILABLE:
             raise ImportError(
                 "psycopg is required for PostgreSQL backend. "
                 "Install with: pip install 'psycopg[binary]>=3.1'"
             )
         self._database_url = database_url
+        self._pool = ConnectionPool(
+            self._open_connection,
+            min_size=pool_min_size,
+            max_size=pool_max_size,
+            timeout=pool_timeout,
+            idle_timeout=pool_idle_timeout,
+            check=_check_connection,
+            reset=_reset_connection,
+        )
+        # Attaches per-record fingerprints to loaded data; lets save(data)
+        # write only the rows that actually changed.
+        self._tracker = ChangeTracker(TABLE_MAP, owner=self)
 
     # ------------------------------------------------------------------ #
-    # Connection helper                                                    #
+    # Connection helpers                                                   #
     # ------------------------------------------------------------------ #
 
-    def _connect(self):
-        """Return a new psycopg connection (caller is responsible for closing)."""
+    def _open_connection(self):
         return psycopg.connect(self._database_url)
 
+    def _connect(self):
+        """Check a connection out of the pool (``close()`` returns it)."""
+        return self._pool.getconn()
+
+    def pool_stats(self) -> dict[str, Any]:
+        """Return connection pool size, checkout count and wait-time metrics."""
+        return self._pool.stats()
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self._pool.close()
+
     # ------------------------------------------------------------------ #
     # Schema management                                                    #
     # ------------------------------------------------------------------ #
@@ -78,6 +212,14 @@ class PostgresDataStore:
                     "CREATE TABLE IF NOT EXISTS settings "
                     "(key TEXT PRIMARY KEY, value JSONB NOT NULL)"
                 )
+                for table, fields in JSONB_INDEXES.items():
+                    for field in fields:
+                        # Replaces the earlier text index, which no query matches.
+                        cur.execute(f"DROP INDEX IF EXISTS {table}_{field}_idx")
+                        cur.execute(
+                            f"CREATE INDEX IF NOT EXISTS {table}_{field}_jsonb_idx "
+                            f"ON {table} (({_field_sql(field)}))"
+                        )
             conn.commit()
         except Exception:
             conn.rollback()
@@ -129,20 +271,59 @@ class PostgresDataStore:
                     result["_next_id"] = int(val) if not isinstance(val, int) else val
                 else:
                     result["_next_id"] = 0
+
+                # dashboard KPI counters and activity feed (absent until first maintained)
+                for name in _DERIVED_SETTINGS:
+                    cur.execute("SELECT value FROM settings WHERE key = %s", [name])
+                    row = cur.fetchone()
+                    if row:
+                        val = row[0]
+                        result[name] = json.loads(val) if isinstance(val, str) else val
         except Exception as exc:
             print(f"[postgres_store] Error loading data: {exc}")
             return copy.deepcopy(JsonDataStore.DEFAULT_STRUCTURE)
         finally:
             conn.close()
-        return result
+        return self._tracker.track(result)
 
-    def save(self, data: dict) -> None:
+    def save(
+        self,
+        data: dict,
+        changes: list | None = None,
+        *,
+        kpi_deltas: dict | None = None,
+        events: Iterable[dict] = (),
+    ) -> None:
         """Persist the full data dict to PostgreSQL.
 
         For each entity table: upsert items present in *data*, delete any
         rows whose ID is no longer in the collection.
         Also persists access_control_matrix and _next_id to the settings table.
+
+        When *changes* is given only those records (plus ``_next_id``) are
+        written, instead of every row in every table.  Without it *data* is
+        diffed against the state it was loaded at (or last saved with) to
+        find them; the full rewrite only happens when there is no such
+        baseline.
+
+        *kpi_deltas* are added to the stored KPI counters and *events*
+        appended to the stored activity feed in the same transaction.  Saves
+        with explicit *changes* never write the counters or the feed from
+        *data*, whose copy may be older than the database's.
         """
+        changed = self._tracker.changed_settings(data)
+        if changes is not None:
+            changed.difference_update(_DERIVED_SETTINGS)
+        settings = [name for name in _DERIVED_SETTINGS if name in changed]
+        if changes is None:
+            changes = self._tracker.diff(data)
+            if "access_control_matrix" in changed:
+                settings.append("access_control_matrix")
+        if changes is not None:
+            self._save_changes(data, changes, settings=settings, kpi_deltas=kpi_deltas, events=events)
+            self._tracker.settle(data, changes)
+            return
+
         conn = self._connect()
         try:
             with conn.cursor() as cur:
@@ -195,6 +376,15 @@ class PostgresDataStore:
                     ["_next_id", json.dumps(next_id)],
                 )
 
+                # Persist dashboard KPI counters and the activity feed
+                for name in _DERIVED_SETTINGS:
+                    if data.get(name) is not None:
+                        self._put_setting(cur, name, data[name])
+                self._adjust_kpis(cur, kpi_deltas or {})
+                for event in events:
+                    self._append_activity(cur, event)
+                self._bump_version(cur, [*TABLE_MAP, "access_control_matrix"])
+
             conn.commit()
         except Exception as exc:
             conn.rollback()
@@ -202,6 +392,7 @@ class PostgresDataStore:
             raise
         finally:
             conn.close()
+        self._tracker.settle(data)
 
     def next_id(self, data: dict) -> int:
         """Return the next available global ID (same interface as JsonDataStore).
@@ -224,6 +415,441 @@ class PostgresDataStore:
         data["_next_id"] += 1
         return data["_next_id"]
 
+    # ------------------------------------------------------------------ #
+    # Record-level operations                                              #
+    # ------------------------------------------------------------------ #
+
+    # Repositories talk to this store record by record instead of loading
+    # and rewriting the whole dataset.
+    native_records = True
+
+    def primary_key(self, key: str) -> str:
+        """Return the primary-key field name for collection *key*."""
+        return TABLE_MAP[key]
+
+    def get_record(self, key: str, record_id) -> dict | None:
+        """Return one record by primary key, or None."""
+        rows = self.query_records(key, {TABLE_MAP[key]: record_id}, limit=1)
+        return rows[0] if rows else None
+
+    def query_records(
+        self,
+        key: str,
+        filters: dict[str, Any] | None = None,
+        *,
+        limit: int | None = None,
+    ) -> list[dict]:
+        """Return records of *key* whose fields equal every value in *filters*.
+
+        The primary key is matched on its column; other fields are matched
+        as ``eq`` filters (see ``_filter_sql``), so None matches a missing
+        or null field.
+        """
+        id_field = TABLE_MAP[key]
+        clauses: list[str] = []
+        params: list[Any] = []
+        for field, value in (filters or {}).items():
+            if field == id_field:
+                clauses.append(f"{id_field} = %s")
+                params.append(value)
+            else:
+                clause, clause_params = _filter_sql(Condition(field, "eq", (value,)))
+                clauses.append(clause)
+                params.extend(clause_params)
+        sql = f"SELECT data FROM {key}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {id_field}"
+        if limit is not None:
+            sql += " LIMIT %s"
+            params.append(int(limit))
+
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(sql, params)
+                rows = cur.fetchall()
+        finally:
+            conn.close()
+        return [json.loads(r[0]) if isinstance(r[0], str) else r[0] for r in rows]
+
+    @staticmethod
+    def _page_sql(key: str, query: PageQuery) -> tuple[str, list[Any]] | None:
+        """Build the SELECT answering *query*, or None if it matches nothing."""
+        id_field = TABLE_MAP[key]
+        if (query.limit is not None and query.limit <= 0) or (query.ids is not None and not query.ids):
+            return None
+        sort = query.sort if query.sort and query.sort != id_field else None
+        expr = _field_sql(sort) if sort is not None else None
+        clauses: list[str] = []
+        params: list[Any] = []
+        if query.ids is not None:
+            clauses.append(f"{id_field} = ANY(%s)")
+            params.append(list(query.ids))
+        for condition in query.filters:
+            clause, clause_params = _filter_sql(condition)
+            clauses.append(clause)
+            params.extend(clause_params)
+        if query.after is not None:
+            value, record_id = query.after
+            op = "<" if query.descending else ">"
+            if sort is None:
+                clauses.append(f"{id_field} {op} %s")
+                params.append(record_id)
+            elif value is None:
+                if query.descending:
+                    clauses.append(f"({expr} IS NULL AND {id_field} < %s)")
+                    params.append(record_id)
+                else:
+                    clauses.append(f"(({expr} IS NULL AND {id_field} > %s) OR {expr} IS NOT NULL)")
+                    params.append(record_id)
+            else:
+                tail = f" OR {expr} IS NULL" if query.descending else ""
+                clauses.append(
+                    f"({expr} {op} %s::jsonb OR ({expr} = %s::jsonb AND {id_field} {op} %s){tail})"
+                )
+                params.extend([json.dumps(value), json.dumps(value), record_id])
+        sql = f"SELECT data FROM {key}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        direction = "DESC" if query.descending else "ASC"
+        if sort is None:
+            sql += f" ORDER BY {id_field} {direction}"
+        else:
+            nulls = "LAST" if query.descending else "FIRST"
+            sql += f" ORDER BY {expr} {direction} NULLS {nulls}, {id_field} {direction}"
+        if query.limit is not None:
+            sql += " LIMIT %s"
+            params.append(int(query.limit))
+        return sql, params
+
+    def page_records(self, key: str, query: PageQuery) -> list[dict]:
+        """Return one keyset page of *key* (see ``crm.persistence.paging``).
+
+        Non-key fields sort on ``data->'field'`` as jsonb, with JSON null
+        treated like a missing field; ``query.ids`` is one array parameter
+        and ``query.filters`` compile to jsonb comparisons.
+        """
+        built = self._page_sql(key, query)
+        if built is None:
+            return []
+        sql, params = built
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(sql, params)
+                rows = cur.fetchall()
+        finally:
+            conn.close()
+        return [json.loads(r[0]) if isinstance(r[0], str) else r[0] for r in rows]
+
+    def iter_records(self, key: str, query: PageQuery, *, chunk_size: int = 500) -> Iterator[dict]:
+        """Yield every record of *query* (see ``page_records``) from a server-side cursor.
+
+        Rows are fetched *chunk_size* at a time while the generator is
+        consumed; the pooled connection is held until it is exhausted or
+        closed.
+        """
+        built = self._page_sql(key, query)
+        if built is None:
+            return
+        sql, params = built
+        conn = self._connect()
+        try:
+            with conn.cursor(name=f"{key}_stream") as cur:
+                cur.itersize = chunk_size
+                cur.execute(sql, params)
+                for row in cur:
+                    yield json.loads(row[0]) if isinstance(row[0], str) else row[0]
+        finally:
+            conn.close()
+
+    def insert_record(self, key: str, item: dict) -> dict:
+        """Upsert one record (its primary key must already be set)."""
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                self._upsert(cur, key, item)
+                self._bump_version(cur, [key])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        return dict(item)
+
+    def update_record(self, key: str, record_id, updates: dict) -> dict | None:
+        """Merge *updates* into one record; return the updated record or None."""
+        id_field = TABLE_MAP[key]
+        updates = {k: v for k, v in updates.items() if k != id_field}
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"UPDATE {key} SET data = data || %s::jsonb "
+                    f"WHERE {id_field} = %s RETURNING data",
+                    [json.dumps(updates), record_id],
+                )
+                row = cur.fetchone()
+                if row is not None:
+                    self._bump_version(cur, [key])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return json.loads(row[0]) if isinstance(row[0], str) else row[0]
+
+    def delete_record(self, key: str, record_id) -> bool:
+        """Delete one record by primary key; return True if a row was removed."""
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"DELETE FROM {key} WHERE {TABLE_MAP[key]} = %s", [record_id]
+                )
+                deleted = cur.rowcount
+                if deleted and deleted > 0:
+                    self._bump_version(cur, [key])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        return bool(deleted and deleted > 0)
+
+    def save_changes(
+        self,
+        changes: list[RecordChange],
+        *,
+        kpi_deltas: dict | None = None,
+        events: Iterable[dict] = (),
+    ) -> None:
+        """Write *changes*, add *kpi_deltas* to the KPI counters and append
+        *events* to the activity feed, and nothing else, in a single
+        transaction."""
+        self._save_changes(None, changes, kpi_deltas=kpi_deltas, events=events)
+
+    def allocate_id(self) -> int:
+        """Atomically reserve and return the next global ID."""
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "UPDATE settings SET value = to_jsonb((value #>> '{}')::bigint + 1) "
+                    "WHERE key = '_next_id' AND (value #>> '{}')::bigint > 0 "
+                    "RETURNING value"
+                )
+                row = cur.fetchone()
+                if row is None:
+                    # Counter missing or uninitialised: derive it from the
+                    # largest primary key, as next_id() does for a fresh seed.
+                    greatest = ", ".join(
+                        f"(SELECT COALESCE(MAX({id_field}), 0) FROM {table})"
+                        for table, id_field in TABLE_MAP.items()
+                    )
+                    cur.execute(
+                        "INSERT INTO settings (key, value) "
+                        f"VALUES ('_next_id', to_jsonb(GREATEST({greatest}) + 1)) "
+                        "ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value "
+                        "RETURNING value"
+                    )
+                    row = cur.fetchone()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        val = row[0]
+        return int(json.loads(val) if isinstance(val, str) else val)
+
+    def _save_changes(
+        self, data: dict | None, changes: list[RecordChange], *, settings=(), kpi_deltas=None, events=()
+    ) -> None:
+        """Apply *changes*, write the named *settings*, adjust the KPI
+        counters, append *events* to the activity feed and bump ``_next_id``
+        in a single transaction (no settings and no ``_next_id`` when *data*
+        is None)."""
+        written = {change.key for change in changes}
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                for change in changes:
+                    id_field = TABLE_MAP[change.key]
+                    if change.op == DELETE:
+                        cur.execute(
+                            f"DELETE FROM {change.key} WHERE {id_field} = %s",
+                            [change.record_id],
+                        )
+                    elif change.record is not None:
+                        self._upsert(cur, change.key, change.record)
+                for name in settings:
+                    if data.get(name) is not None:
+                        self._put_setting(cur, name, data[name])
+                        if name == "access_control_matrix":
+                            written.add(name)
+                if data is not None:
+                    # Never move the counter backwards: another writer may
+                    # have allocated IDs since *data* was loaded.
+                    cur.execute(
+                        "INSERT INTO settings (key, value) VALUES ('_next_id', %s::jsonb) "
+                        "ON CONFLICT (key) DO UPDATE SET value = to_jsonb(GREATEST("
+                        "(settings.value #>> '{}')::bigint, (EXCLUDED.value #>> '{}')::bigint))",
+                        [json.dumps(data.get("_next_id", 0))],
+                    )
+                self._adjust_kpis(cur, kpi_deltas or {})
+                for event in events:
+                    self._append_activity(cur, event)
+                self._bump_version(cur, written)
+            conn.commit()
+        except Exception as exc:
+            conn.rollback()
+            print(f"[postgres_store] Error saving changes: {exc}")
+            raise
+        finally:
+            conn.close()
+
+    def data_version(self) -> int:
+        """Return a counter that every write to the database increments."""
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT value FROM settings WHERE key = '_data_version'")
+                row = cur.fetchone()
+        finally:
+            conn.close()
+        if not row:
+            return 0
+        val = row[0]
+        return int(json.loads(val) if isinstance(val, str) else val)
+
+    def collection_versions(self, keys: Iterable[str]) -> dict[str, tuple]:
+        """Return ``{key: (version, modified)}`` for the collections in *keys*.
+
+        ``version`` is the ``data_version`` of the last write to the
+        collection and ``modified`` its POSIX time; ``(0, None)`` if it has
+        not been written since the stamps were introduced.  One row is read
+        whatever the number of keys.
+        """
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT value FROM settings WHERE key = %s", [VERSIONS_KEY])
+                row = cur.fetchone()
+        finally:
+            conn.close()
+        stamps = row[0] if row else {}
+        if isinstance(stamps, str):
+            stamps = json.loads(stamps)
+        return {key: tuple(stamps.get(key, (0, None))) for key in keys}
+
+    def adjust_kpis(self, deltas: dict[str, int]) -> None:
+        """Add *deltas* to the stored KPI counters (no-op until they exist)."""
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                self._adjust_kpis(cur, deltas)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _adjust_kpis(cur, deltas: dict[str, int]) -> None:
+        # Computed from the stored value in SQL, so concurrent writers add up.
+        for name, delta in deltas.items():
+            if delta:
+                cur.execute(
+                    "UPDATE settings SET value = jsonb_set(value, ARRAY[%s], "
+                    "to_jsonb(COALESCE((value->>%s)::bigint, 0) + %s)) "
+                    "WHERE key = %s",
+                    [name, name, delta, KPI_KEY],
+                )
+
+    def append_activity(self, event: dict, limit: int = ACTIVITY_LIMIT) -> None:
+        """Append *event* to the stored activity feed (no-op until it exists).
+
+        The sequence number is assigned and the oldest event dropped in one
+        UPDATE, so concurrent writers cannot lose each other's events.
+        """
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                self._append_activity(cur, event, limit)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _append_activity(cur, event: dict, limit: int = ACTIVITY_LIMIT) -> None:
+        cur.execute(
+            "UPDATE settings SET value = jsonb_build_object("
+            "'seq', (value->>'seq')::bigint + 1, "
+            "'events', (CASE WHEN jsonb_array_length(value->'events') >= %s "
+            "THEN (value->'events') - 0 ELSE value->'events' END) "
+            "|| jsonb_build_array(%s::jsonb || jsonb_build_object('seq', (value->>'seq')::bigint + 1))) "
+            "WHERE key = %s",
+            [limit, json.dumps(event), ACTIVITY_KEY],
+        )
+
+    @staticmethod
+    def _put_setting(cur, name: str, value) -> None:
+        cur.execute(
+            "INSERT INTO settings (key, value) "
+            "VALUES (%s, %s::jsonb) "
+            "ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value",
+            [name, json.dumps(value)],
+        )
+
+    @staticmethod
+    def _bump_version(cur, keys: Iterable[str] = ()) -> None:
+        """Increment ``_data_version`` and stamp the collections in *keys*.
+
+        Both happen in one statement; the stamps row is merged with ``||``
+        so concurrent writers to different collections keep each other's.
+        """
+        bump = (
+            "INSERT INTO settings (key, value) VALUES ('_data_version', '1'::jsonb) "
+            "ON CONFLICT (key) DO UPDATE SET value = "
+            "to_jsonb((settings.value #>> '{}')::bigint + 1)"
+        )
+        keys = sorted(set(keys))
+        if not keys:
+            cur.execute(bump)
+            return
+        cur.execute(
+            f"WITH bumped AS ({bump} RETURNING value) "
+            "INSERT INTO settings (key, value) "
+            "SELECT %s, (SELECT jsonb_object_agg(k, jsonb_build_array(bumped.value, %s)) "
+            "FROM unnest(%s::text[]) AS k) FROM bumped "
+            "ON CONFLICT (key) DO UPDATE SET value = settings.value || EXCLUDED.value",
+            [VERSIONS_KEY, time.time(), keys],
+        )
+
+    @staticmethod
+    def _upsert(cur, key: str, item: dict) -> None:
+        id_field = TABLE_MAP[key]
+        item_id = item.get(id_field)
+        if item_id is None:
+            return
+        cur.execute(
+            f"INSERT INTO {key} ({id_field}, data) "
+            f"VALUES (%s, %s::jsonb) "
+            f"ON CONFLICT ({id_field}) DO UPDATE SET data = EXCLUDED.data",
+            [item_id, json.dumps(item)],
+        )
+
     # ------------------------------------------------------------------ #
     # Dashboard helpers                                                    #
     # ------------------------------------------------------------------ #
@@ -1,55 +1,338 @@
 from __future__ import annotations
 from typing import Callable
-from crm.persistence.json_store import JsonDataStore
+from crm.persistence.changes import DELETE, INSERT, UPDATE, RecordChange
+from crm.persistence.json_store import JsonDataStore, read_snapshot
+from crm.persistence import activity
+from crm.persistence.kpis import depends_on_fields, kpi_deltas, tracks
+
+
+def _discard(groups: dict, value, item: dict) -> None:
+    """Remove *item* (by identity) from the *value* bucket of a group index."""
+    bucket = groups.get(value)
+    if not bucket:
+        return
+    for i, candidate in enumerate(bucket):
+        if candidate is item:
+            del bucket[i]
+            break
+    if not bucket:
+        del groups[value]
+
+
+class _IndexState:
+    """Hash indexes built over one collection object.
+
+    ``collection`` is the exact list (or read-only tuple) the indexes were
+    built from; ``size`` is its length at build time, kept current by the
+    repository's own writes.  A different collection object or length means
+    the data changed behind the repository's back and the state is rebuilt.
+    """
+
+    __slots__ = ("collection", "size", "unique", "groups")
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.size = len(collection)
+        self.unique: dict[str, dict] = {}
+        self.groups: dict[str, dict[object, list]] = {}
+
+    def matches(self, collection) -> bool:
+        return self.collection is collection and self.size == len(collection)
 
 
 class Repository:
-    """Stateless repository – every operation loads fresh data from the store."""
+    """Stateless repository – every operation loads fresh data from the store.
+
+    Reads go through ``read_snapshot`` so cached stores answer them without a
+    re-parse; records handed back to callers are always private copies.
+
+    Point lookups are served from per-field hash indexes built lazily over the
+    current snapshot and reused for as long as the store keeps handing out the
+    same snapshot (the web app's unit of work, or a cached JSON store).
+    ``add``, ``update`` and ``delete`` keep the indexes current; misses are
+    confirmed with a scan in case a record was edited in place elsewhere.
+
+    Subclasses declare non-unique secondary indexes (typically foreign keys)
+    in ``INDEXES``; ``find_by`` answers equality lookups on those fields from
+    the index and falls back to a scan for undeclared fields.
+
+    Stores with native record operations (``native_records``) are used
+    record by record instead: lookups become keyed queries and writes touch
+    a single row.  Otherwise writes pass a ``RecordChange`` to ``save`` so
+    the store (or unit of work) knows exactly which record changed.
+
+    Writes to collections that feed the dashboard KPI counters (see
+    ``crm.persistence.kpis``) pass the counter deltas to the same save
+    (``adjust_kpis`` on native stores), and the store adds them to the
+    counters it holds.  Writes to the collections
+    ``crm.persistence.activity`` tracks stamp ``created_at`` / ``updated_at``
+    and pass their activity-feed event to the save the same way
+    (``append_activity`` on native stores); the store appends it.
+    """
+
+    ID_FIELD: str | None = None
+    INDEXES: tuple[str, ...] = ()
 
     def __init__(self, store: JsonDataStore, key: str):
         self._store = store
         self._key = key
+        self._index_state: _IndexState | None = None
+
+    def _collection(self):
+        return read_snapshot(self._store).get(self._key, [])
+
+    def _native(self) -> bool:
+        return bool(getattr(self._store, "native_records", False))
+
+    def _id_field(self) -> str:
+        if self.ID_FIELD:
+            return self.ID_FIELD
+        return self._key.rstrip("s").replace("brand_representative", "brand_rep") + "_id"
+
+    def _native_first(self, field: str, value) -> dict | None:
+        rows = self._store.query_records(self._key, {field: value}, limit=1)
+        return rows[0] if rows else None
+
+    def _adjust_native_kpis(self, before: dict | None, after: dict | None) -> None:
+        deltas = kpi_deltas(self._key, before, after)
+        if deltas:
+            self._store.adjust_kpis(deltas)
+
+    def _record_activity(self, action: str, record: dict) -> None:
+        """Append an *action* event for *record* through the native store."""
+        for event in self._activity_events(None, action, record):
+            self._store.append_activity(event)
+
+    def _activity_events(self, data: dict | None, action: str, record: dict) -> list[dict]:
+        """Return the feed events of an *action* on *record* (none if untracked).
+
+        *data* is used to look up a creator's person; None on native stores.
+        """
+        if not activity.tracks(self._key):
+            return []
+        person = None
+        person_id = record.get("person_id") if self._key == "creators" else None
+        if person_id is not None:
+            if data is None:
+                person = self._store.get_record("persons", person_id)
+            else:
+                person = next((p for p in data.get("persons", []) if p.get("person_id") == person_id), None)
+        return [activity.activity_event(action, self._key, record, person=person)]
+
+    def _native_id(self, id_field: str, value):
+        """Translate an *id_field* lookup into a primary-key value."""
+        if id_field == self._store.primary_key(self._key):
+            return value
+        item = self._native_first(id_field, value)
+        return item.get(self._store.primary_key(self._key)) if item else None
+
+    # ------------------------------------------------------------------ #
+    # Index maintenance                                                    #
+    # ------------------------------------------------------------------ #
+
+    def _state_for(self, collection) -> _IndexState:
+        state = self._index_state
+        if state is None or not state.matches(collection):
+            state = _IndexState(collection)
+            self._index_state = state
+        return state
+
+    def _unique_index(self, state: _IndexState, field: str) -> dict:
+        index = state.unique.get(field)
+        if index is None:
+            index = {}
+            for item in state.collection:
+                index.setdefault(item.get(field), item)
+            state.unique[field] = index
+        return index
+
+    def _group_index(self, state: _IndexState, field: str) -> dict:
+        index = state.groups.get(field)
+        if index is None:
+            index = {}
+            for item in state.collection:
+                index.setdefault(item.get(field), []).append(item)
+            state.groups[field] = index
+        return index
+
+    def _lookup(self, collection, field: str, value):
+        """Return the first record whose *field* equals *value*.
+
+        Hits are O(1).  A miss or a hit whose record no longer matches is
+        checked with a scan: a record edited in place outside the repository
+        may now hold *value* under a stale index entry, in which case the
+        index is rebuilt on next use.
+        """
+        state = self._state_for(collection)
+        item = self._unique_index(state, field).get(value)
+        if item is None or item.get(field) != value:
+            stale = item is not None
+            item = next((c for c in collection if c.get(field) == value), None)
+            if stale or item is not None:
+                self._index_state = None
+        return item
+
+    def _index_added(self, collection, item: dict) -> None:
+        state = self._index_state
+        if state is None or state.collection is not collection or state.size != len(collection) - 1:
+            return
+        state.size += 1
+        for field, index in state.unique.items():
+            index.setdefault(item.get(field), item)
+        for field, groups in state.groups.items():
+            groups.setdefault(item.get(field), []).append(item)
+
+    def _index_updated(self, collection, item: dict, before: dict) -> None:
+        state = self._index_state
+        if state is None or not state.matches(collection):
+            return
+        for field, index in state.unique.items():
+            old, new = before.get(field), item.get(field)
+            if old != new:
+                if index.get(old) is item:
+                    del index[old]
+                index.setdefault(new, item)
+        for field, groups in state.groups.items():
+            old, new = before.get(field), item.get(field)
+            if old != new:
+                _discard(groups, old, item)
+                groups.setdefault(new, []).append(item)
+
+    def _index_removed(self, collection, item: dict) -> None:
+        state = self._index_state
+        if state is None or state.collection is not collection or state.size != len(collection) + 1:
+            return
+        state.size -= 1
+        for field, index in state.unique.items():
+            if index.get(item.get(field)) is item:
+                del index[item.get(field)]
+        for field, groups in state.groups.items():
+            _discard(groups, item.get(field), item)
+
+    # ------------------------------------------------------------------ #
+    # CRUD                                                                 #
+    # ------------------------------------------------------------------ #
 
     def all(self) -> list:
-        return list(self._store.load().get(self._key, []))
+        if self._native():
+            return self._store.query_records(self._key)
+        return [dict(item) for item in self._collection()]
 
     def get_by_id(self, id_field: str, value) -> dict | None:
-        return next(
-            (item for item in self._store.load().get(self._key, []) if item.get(id_field) == value),
-            None,
-        )
+        if self._native():
+            return self._native_first(id_field, value)
+        item = self._lookup(self._collection(), id_field, value)
+        return dict(item) if item is not None else None
 
     def add(self, item: dict) -> dict:
+        id_field = self._id_field()
+        if self._native():
+            if id_field not in item:
+                item = {id_field: self._store.allocate_id(), **item}
+            inserted = self._store.insert_record(self._key, activity.stamp_created(self._key, item))
+            self._adjust_native_kpis(None, inserted)
+            self._record_activity(activity.CREATED, inserted)
+            return inserted
         data = self._store.load()
         new_id = self._store.next_id(data)
-        id_field = self._key.rstrip("s").replace("brand_representative", "brand_rep") + "_id"
         if id_field not in item:
             item = {id_field: new_id, **item}
-        data.setdefault(self._key, []).append(item)
-        self._store.save(data)
-        return item
+        item = activity.stamp_created(self._key, item)
+        collection = data.setdefault(self._key, [])
+        collection.append(item)
+        self._index_added(collection, item)
+        self._store.save(
+            data,
+            changes=[RecordChange(INSERT, self._key, item.get(id_field), dict(item))],
+            kpi_deltas=kpi_deltas(self._key, None, item),
+            events=self._activity_events(data, activity.CREATED, item),
+        )
+        return dict(item)
 
     def update(self, id_field: str, value, updates: dict) -> dict | None:
+        updates = activity.stamp_updated(self._key, updates)
+        if self._native():
+            record_id = self._native_id(id_field, value)
+            if record_id is None:
+                return None
+            before = self._store.get_record(self._key, record_id) if depends_on_fields(self._key) else None
+            updated = self._store.update_record(self._key, record_id, updates)
+            if before is not None and updated is not None:
+                self._adjust_native_kpis(before, updated)
+            if updated is not None:
+                self._record_activity(activity.UPDATED, updated)
+            return updated
         data = self._store.load()
-        for item in data.get(self._key, []):
-            if item.get(id_field) == value:
-                item.update(updates)
-                self._store.save(data)
-                return item
-        return None
+        collection = data.get(self._key, [])
+        item = self._lookup(collection, id_field, value)
+        if item is None:
+            return None
+        before = dict(item)
+        item.update(updates)
+        self._index_updated(collection, item, before)
+        pk = self._id_field()
+        self._store.save(
+            data,
+            changes=[RecordChange(UPDATE, self._key, item.get(pk), dict(item))],
+            kpi_deltas=kpi_deltas(self._key, before, item),
+            events=self._activity_events(data, activity.UPDATED, item),
+        )
+        return dict(item)
 
     def delete(self, id_field: str, value) -> bool:
+        if self._native():
+            record_id = self._native_id(id_field, value)
+            if record_id is None:
+                return False
+            tracked = tracks(self._key) or activity.tracks(self._key)
+            before = self._store.get_record(self._key, record_id) if tracked else None
+            deleted = self._store.delete_record(self._key, record_id)
+            if deleted and before is not None:
+                self._adjust_native_kpis(before, None)
+                self._record_activity(activity.DELETED, before)
+            return deleted
         data = self._store.load()
-        original = data.get(self._key, [])
-        filtered = [item for item in original if item.get(id_field) != value]
-        if len(filtered) == len(original):
+        collection = data.get(self._key, [])
+        item = self._lookup(collection, id_field, value)
+        if item is None:
             return False
-        data[self._key] = filtered
-        self._store.save(data)
+        position = next(i for i, candidate in enumerate(collection) if candidate is item)
+        del collection[position]
+        self._index_removed(collection, item)
+        self._store.save(
+            data,
+            changes=[RecordChange(DELETE, self._key, item.get(self._id_field()))],
+            kpi_deltas=kpi_deltas(self._key, item, None),
+            events=self._activity_events(data, activity.DELETED, item),
+        )
         return True
 
     def find(self, predicate: Callable[[dict], bool]) -> list:
-        return [item for item in self._store.load().get(self._key, []) if predicate(item)]
+        if self._native():
+            return [item for item in self.all() if predicate(item)]
+        return [dict(item) for item in self._collection() if predicate(item)]
+
+    def find_by(self, field: str, value) -> list:
+        """Return all records whose *field* equals *value*.
+
+        Declared ``INDEXES`` fields are answered from a hash index; any other
+        field is a linear scan.  As in ``_lookup``, an empty or stale bucket
+        is checked with a scan so records edited in place are still found.
+        """
+        if self._native():
+            return self._store.query_records(self._key, {field: value})
+        collection = self._collection()
+        if field not in self.INDEXES:
+            return [dict(item) for item in collection if item.get(field) == value]
+        state = self._state_for(collection)
+        bucket = self._group_index(state, field).get(value, ())
+        if not bucket or any(item.get(field) != value for item in bucket):
+            matches = [item for item in collection if item.get(field) == value]
+            if bucket or matches:
+                # Records were edited in place outside the repository.
+                self._index_state = None
+            bucket = matches
+        return [dict(item) for item in bucket]
 
 
 # ---------------------------------------------------------------------------
@@ -78,6 +361,7 @@ class PersonRepository(Repository):
 
 class UserRepository(Repository):
     ID_FIELD = "user_id"
+    INDEXES = ("person_id", "role_id")
 
     def __init__(self, store: JsonDataStore):
         super().__init__(store, "users")
@@ -86,14 +370,15 @@ class UserRepository(Repository):
         return self.get_by_id(self.ID_FIELD, user_id)
 
     def get_by_username(self, username: str) -> dict | None:
-        return next(
-            (u for u in self._store.load().get("users", []) if u["username"] == username),
-            None,
-        )
+        if self._native():
+            return self._native_first("username", username)
+        user = self._lookup(self._collection(), "username", username)
+        return dict(user) if user is not None else None
 
 
 class EmployeeRepository(Repository):
     ID_FIELD = "employee_id"
+    INDEXES = ("person_id", "manager_id")
 
     def __init__(self, store: JsonDataStore):
         super().__init__(store, "employees")
@@ -106,6 +391,7 @@ class EmployeeRepository(Repository):
 
 class CreatorRepository(Repository):
     ID_FIELD = "creator_id"
+    INDEXES = ("employee_id", "person_id")
 
     def __init__(self, store: JsonDataStore):
         super().__init__(store, "creators")
@@ -130,6 +416,7 @@ class BrandRepository(Repository):
 
 class BrandContactRepository(Repository):
     ID_FIELD = "brand_contact_id"
+    INDEXES = ("brand_id", "person_id")
 
     def __init__(self, store: JsonDataStore):
         super().__init__(store, "brand_contacts")
@@ -144,6 +431,7 @@ BrandRepRepository = BrandContactRepository
 
 class DealRepository(Repository):
     ID_FIELD = "deal_id"
+    INDEXES = ("creator_id", "client_id", "brand_id", "brand_contact_id")
 
     def __init__(self, store: JsonDataStore):
         super().__init__(store, "deals")
@@ -154,6 +442,7 @@ class DealRepository(Repository):
 
 class ContractRepository(Repository):
     ID_FIELD = "contract_id"
+    INDEXES = ("deal_id",)
 
     def __init__(self, store: JsonDataStore):
         super().__init__(store, "contracts")
@@ -164,6 +453,7 @@ class ContractRepository(Repository):
 
 class SocialMediaRepository(Repository):
     ID_FIELD = "social_media_id"
+    INDEXES = ("creator_id",)
 
     def __init__(self, store: JsonDataStore):
         super().__init__(store, "social_media_accounts")
@@ -0,0 +1,410 @@
+"""Unit of work: load the store at most once and flush writes in one save.
+
+A ``UnitOfWork`` wraps any data store (json / sqlite / postgres) and exposes
+the same ``load / save / next_id / snapshot`` interface, so policies,
+services and repositories can use it without knowing it is there.  Over a
+store with native record operations it exposes those too, so repositories
+read and write single records instead of loading every table.
+
+``ScopedStore`` is the long-lived facade handed to those collaborators.  It
+routes every call to the unit of work bound to the current scope (one HTTP
+request in the web app) and falls back to the backing store when no scope is
+active (CLI, tests, startup code).
+"""
+from __future__ import annotations
+
+from typing import Any, Callable, Iterable, Iterator, Mapping
+
+from crm.persistence.changes import (
+    DELETE,
+    INSERT,
+    PRIMARY_KEYS,
+    UPDATE,
+    ChangeTracker,
+    RecordChange,
+    apply_changes,
+)
+from crm.persistence.json_store import _clone, read_snapshot, store_version, store_versions
+from crm.persistence.paging import PageQuery, page_in_memory
+
+
+class UnitOfWork:
+    """Per-scope view of a store.
+
+    - The first read loads the backing store; later reads reuse that snapshot.
+    - ``save(data)`` only records the new state; ``commit()`` writes it with a
+      single backing ``save()``.  KPI deltas are summed, and activity
+      events collected, and handed to that save, which adds them to the
+      stored counters and feed.
+    - When every staged save came with record-level ``changes`` the commit
+      passes them on, so stores with native record operations write only
+      the touched rows.
+    - ``loads`` / ``saves`` count backing-store round trips so callers can
+      assert a budget.
+    - ``data_version()`` is the backing store's version as of the first read,
+      plus a count of staged saves.  ``collection_versions()`` are the
+      backing store's until a save is staged, then None.
+
+    Over a store with ``native_records`` the record-level calls
+    (``get_record``, ``insert_record``, ...) are available as well.  Reads
+    are keyed queries against the store, overlaid with the records this
+    unit of work has staged; writes are staged as ``RecordChange`` entries
+    and committed with the store's ``save_changes``.  The whole dataset is
+    only loaded when something asks for it (``load`` / ``snapshot``), and
+    from then on answers record reads too.
+    """
+
+    def __init__(self, store):
+        self._store = store
+        self._view = None
+        self._data: dict | None = None
+        self._dirty = False
+        self._full_save = False
+        self._data_saved = False
+        self._changes: list = []
+        # key -> {record id: staged record, or None once deleted}
+        self._staged: dict[str, dict] = {}
+        self._kpi_deltas: dict[str, int] = {}
+        self._events: list[dict] = []
+        self._base_version = None
+        self._writes = 0
+        self.loads = 0
+        self.saves = 0
+
+    @property
+    def store(self):
+        return self._store
+
+    @property
+    def dirty(self) -> bool:
+        return self._dirty
+
+    def snapshot(self):
+        """Return the scope's data for read-only use (no copy is made)."""
+        if self._data is not None:
+            return self._data
+        if self._staged:
+            # Staged records have to be applied to a copy of their own.
+            return self.load()
+        if self._view is None:
+            self._capture_version()
+            view = read_snapshot(self._store)
+            self.loads += 1
+            if isinstance(view, dict):
+                # Backends without a shared cache hand out a private dict
+                # already, so it doubles as the mutable working copy.
+                self._data = view
+                return view
+            self._view = view
+        return self._view
+
+    def load(self) -> dict:
+        """Return the scope's mutable working copy of the data."""
+        if self._data is None:
+            if self._view is not None:
+                # Track the copy so a whole-dataset save still diffs
+                # against the state this scope read.
+                self._data = ChangeTracker(PRIMARY_KEYS, owner=self._store).track(
+                    _clone(self._view)
+                )
+            else:
+                self._capture_version()
+                self._data = self._store.load()
+                self.loads += 1
+            apply_changes(self._data, [c._replace(record=_clone(c.record)) for c in self._changes])
+        return self._data
+
+    def save(
+        self,
+        data: dict,
+        changes: list | None = None,
+        *,
+        kpi_deltas: dict | None = None,
+        events: Iterable[dict] = (),
+    ) -> None:
+        """Stage *data* as the new state; nothing is written until ``commit()``."""
+        self._data = data
+        self._dirty = True
+        self._data_saved = True
+        self._writes += 1
+        if changes is None:
+            self._full_save = True
+        else:
+            self._changes.extend(changes)
+        self._add_kpi_deltas(kpi_deltas or {})
+        self._events.extend(events)
+
+    def next_id(self, data: dict) -> int:
+        return self._store.next_id(data)
+
+    # ------------------------------------------------------------------ #
+    # Record-level operations (stores with ``native_records``)             #
+    # ------------------------------------------------------------------ #
+
+    @property
+    def native_records(self) -> bool:
+        return bool(getattr(self._store, "native_records", False))
+
+    def primary_key(self, key: str) -> str:
+        return self._store.primary_key(key)
+
+    def allocate_id(self) -> int:
+        # IDs are never handed back, so a rolled-back request leaves a gap.
+        return self._store.allocate_id()
+
+    def get_record(self, key: str, record_id) -> dict | None:
+        if self._data is not None:
+            pk = self.primary_key(key)
+            item = next((r for r in self._data.get(key, ()) if r.get(pk) == record_id), None)
+            return _clone(item) if item is not None else None
+        staged = self._staged.get(key, {})
+        if record_id in staged:
+            item = staged[record_id]
+            return _clone(item) if item is not None else None
+        return self._store.get_record(key, record_id)
+
+    def query_records(self, key: str, filters: dict | None = None, *, limit: int | None = None) -> list[dict]:
+        filters = filters or {}
+
+        def matches(item) -> bool:
+            return all(item.get(field) == value for field, value in filters.items())
+
+        if self._data is not None:
+            rows = [_clone(r) for r in self._data.get(key, ()) if matches(r)]
+            return rows[:limit] if limit is not None else rows
+        staged = self._staged.get(key)
+        if not staged:
+            return self._store.query_records(key, filters, limit=limit)
+        pk = self.primary_key(key)
+        rows = [r for r in self._store.query_records(key, filters) if r.get(pk) not in staged]
+        rows.extend(_clone(r) for r in staged.values() if r is not None and matches(r))
+        rows.sort(key=lambda r: r.get(pk))
+        return rows[:limit] if limit is not None else rows
+
+    def insert_record(self, key: str, item: dict) -> dict:
+        self._stage(RecordChange(INSERT, key, item.get(self.primary_key(key)), _clone(item)))
+        return _clone(item)
+
+    def update_record(self, key: str, record_id, updates: dict) -> dict | None:
+        current = self.get_record(key, record_id)
+        if current is None:
+            return None
+        pk = self.primary_key(key)
+        current.update({k: v for k, v in updates.items() if k != pk})
+        self._stage(RecordChange(UPDATE, key, record_id, current))
+        return _clone(current)
+
+    def delete_record(self, key: str, record_id) -> bool:
+        if self.get_record(key, record_id) is None:
+            return False
+        self._stage(RecordChange(DELETE, key, record_id))
+        return True
+
+    def adjust_kpis(self, deltas: dict[str, int]) -> None:
+        self._add_kpi_deltas(deltas)
+        self._dirty = True
+
+    def append_activity(self, event: dict) -> None:
+        self._events.append(event)
+        self._dirty = True
+
+    def _stage(self, change: RecordChange) -> None:
+        self._changes.append(change)
+        self._staged.setdefault(change.key, {})[change.record_id] = change.record
+        if self._data is not None:
+            apply_changes(self._data, [change._replace(record=_clone(change.record))])
+        self._dirty = True
+        self._writes += 1
+
+    def _add_kpi_deltas(self, deltas: dict[str, int]) -> None:
+        for name, delta in deltas.items():
+            self._kpi_deltas[name] = self._kpi_deltas.get(name, 0) + delta
+
+    def _capture_version(self) -> None:
+        # Read before the data, so the token is never newer than the data.
+        if self._base_version is None:
+            self._base_version = store_version(self._store)
+
+    def data_version(self):
+        """Return a version token for the data this scope sees."""
+        self._capture_version()
+        return (self._base_version, self._writes)
+
+    def collection_versions(self, keys: Iterable[str]) -> Mapping[str, tuple] | None:
+        """Return the backing store's collection versions (see ``store_versions``).
+
+        Staged writes are not described by any stored version, so a dirty
+        unit of work returns None.
+        """
+        if self._dirty:
+            return None
+        return store_versions(self._store, keys)
+
+    def commit(self) -> None:
+        """Flush staged changes to the backing store with a single save."""
+        if not self._dirty:
+            return
+        deltas = {name: delta for name, delta in self._kpi_deltas.items() if delta}
+        events = self._events
+        if self._full_save:
+            self._store.save(self._data, kpi_deltas=deltas, events=events)
+        elif self._data_saved:
+            self._store.save(self._data, changes=self._changes, kpi_deltas=deltas, events=events)
+        elif self._changes:
+            # Only record-level writes: the rest of the data is untouched.
+            self._store.save_changes(self._changes, kpi_deltas=deltas, events=events)
+        else:
+            if deltas:
+                self._store.adjust_kpis(deltas)
+            for event in events:
+                self._store.append_activity(event)
+        self.saves += 1
+        self._reset()
+
+    def rollback(self) -> None:
+        """Discard staged changes; the next read reloads from the store."""
+        self._view = None
+        self._data = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self._dirty = False
+        self._full_save = False
+        self._data_saved = False
+        self._changes = []
+        self._staged = {}
+        self._kpi_deltas = {}
+        self._events = []
+        self._base_version = None
+        self._writes = 0
+
+
+class ScopedStore:
+    """Store facade that delegates to the unit of work of the active scope.
+
+    *scope* is a callable returning a per-scope namespace object (for the
+    web app, ``flask.g`` during a request) or None when no scope is active.
+    Attributes not part of the core store interface (``ensure_schema``,
+    ``get_table_counts``, ...) are forwarded to the backing store.
+    """
+
+    _ATTR = "unit_of_work"
+
+    def __init__(self, store, scope: Callable[[], Any]):
+        self._store = store
+        self._scope = scope
+
+    @property
+    def backend(self):
+        return self._store
+
+    @property
+    def native_records(self) -> bool:
+        """True when the backend has record-level operations.
+
+        Inside a scope they go through the unit of work, which stages the
+        writes until ``commit()`` and keeps its snapshot consistent with them.
+        """
+        return bool(getattr(self._store, "native_records", False))
+
+    def current(self, create: bool = True) -> UnitOfWork | None:
+        """Return the active scope's unit of work, creating it on first use."""
+        namespace = self._scope()
+        if namespace is None:
+            return None
+        uow = getattr(namespace, self._ATTR, None)
+        if uow is None and create:
+            uow = UnitOfWork(self._store)
+            setattr(namespace, self._ATTR, uow)
+        return uow
+
+    def _target(self):
+        uow = self.current()
+        return uow if uow is not None else self._store
+
+    def load(self) -> dict:
+        return self._target().load()
+
+    def snapshot(self):
+        return read_snapshot(self._target())
+
+    def save(
+        self,
+        data: dict,
+        changes: list | None = None,
+        *,
+        kpi_deltas: dict | None = None,
+        events: Iterable[dict] = (),
+    ) -> None:
+        self._target().save(data, changes=changes, kpi_deltas=kpi_deltas, events=events)
+
+    def next_id(self, data: dict) -> int:
+        return self._store.next_id(data)
+
+    def allocate_id(self) -> int:
+        return self._store.allocate_id()
+
+    def primary_key(self, key: str) -> str:
+        return self._store.primary_key(key)
+
+    def get_record(self, key: str, record_id) -> dict | None:
+        return self._target().get_record(key, record_id)
+
+    def query_records(self, key: str, filters: dict | None = None, *, limit: int | None = None) -> list[dict]:
+        return self._target().query_records(key, filters, limit=limit)
+
+    def insert_record(self, key: str, item: dict) -> dict:
+        return self._target().insert_record(key, item)
+
+    def update_record(self, key: str, record_id, updates: dict) -> dict | None:
+        return self._target().update_record(key, record_id, updates)
+
+    def delete_record(self, key: str, record_id) -> bool:
+        return self._target().delete_record(key, record_id)
+
+    def adjust_kpis(self, deltas: dict[str, int]) -> None:
+        self._target().adjust_kpis(deltas)
+
+    def append_activity(self, event: dict) -> None:
+        self._target().append_activity(event)
+
+    def data_version(self):
+        return store_version(self._target())
+
+    def collection_versions(self, keys: Iterable[str]) -> Mapping[str, tuple] | None:
+        return store_versions(self._target(), keys)
+
+    def page_records(self, key: str, query: PageQuery) -> list[dict]:
+        """Return one keyset page of *key* (see ``crm.persistence.paging``).
+
+        Pages come from the backend unless the active scope has staged
+        writes, which only its own snapshot reflects.
+        """
+        uow = self.current(create=False)
+        if uow is not None and uow.dirty:
+            records = uow.snapshot().get(key, ())
+            return [_clone(r) for r in page_in_memory(records, PRIMARY_KEYS[key], query)]
+        return self._store.page_records(key, query)
+
+    def iter_records(self, key: str, query: PageQuery, *, chunk_size: int = 500) -> Iterator[dict]:
+        """Stream the records of *query*, under the same rule as ``page_records``."""
+        uow = self.current(create=False)
+        if uow is not None and uow.dirty:
+            records = uow.snapshot().get(key, ())
+            return (_clone(r) for r in page_in_memory(records, PRIMARY_KEYS[key], query))
+        return self._store.iter_records(key, query, chunk_size=chunk_size)
+
+    def commit(self) -> None:
+        """Flush the active unit of work, if it has staged changes."""
+        uow = self.current(create=False)
+        if uow is not None:
+            uow.commit()
+
+    def rollback(self) -> None:
+        """Discard the active unit of work's staged changes."""
+        uow = self.current(create=False)
+        if uow is not None:
+            uow.rollback()
+
+    def __getattr__(self, name: str):
+        return getattr(self._store, name)
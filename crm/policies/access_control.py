@@ -7,15 +7,27 @@ Hard constraints (never overridden by ACM edits):
 
 All other permissions are read from the ACM stored in data.json so that
 admins can fine-tune them from the Settings page.
+
+The roles table and the ACM are compiled into a ``PermissionTable`` that is
+reused until the store's data version changes or ``save_acm`` runs, so a
+permission check does not touch the store.  ``permissions_for(user)``
+returns a user's whole entity × action matrix at once and is memoized per
+request when the policy is given a request scope.
+
+Row-level scopes (which creators, employees, deals, ... a user may see) are
+precomputed as ID sets by ``visibility_for(user)`` and cached per user until
+the store's data version changes.  Managers see their whole reporting tree,
+answered from an ``OrgHierarchy`` index that is synced incrementally.
 """
 from __future__ import annotations
 
-from crm.persistence.json_store import JsonDataStore
-from crm.persistence.repositories import RoleRepository
+import threading
+from typing import Any, Callable
 
-
-# Roles that map to "Creator" for ACM look-up (their role_name may differ)
-_CREATOR_ROLE_NAMES: frozenset[str] = frozenset({"Creator", "Client", "Rep"})
+from crm.persistence.json_store import JsonDataStore, read_snapshot, store_version
+from crm.policies.hierarchy import OrgHierarchy
+from crm.policies.permission_table import PermissionTable, UserPermissions
+from crm.policies.visibility import VisibilityScope
 
 # Access hierarchy level (used for scope decisions)
 ROLE_HIERARCHY: dict[str, int] = {
@@ -28,12 +40,8 @@ ROLE_HIERARCHY: dict[str, int] = {
     "User": 1,
 }
 
-
-def _acm_role_key(role_name: str) -> str:
-    """Map a role_name to the matching ACM key."""
-    if role_name in _CREATOR_ROLE_NAMES:
-        return "Creator"
-    return role_name
+# The collections permission checks are computed from.
+PERMISSION_SOURCES: tuple[str, ...] = ("roles", "access_control_matrix")
 
 
 class AccessPolicy:
@@ -42,105 +50,137 @@ class AccessPolicy:
     # Kept for backward-compat with code that inspects AccessPolicy.ROLE_HIERARCHY
     ROLE_HIERARCHY = ROLE_HIERARCHY
 
-    def __init__(self, store: JsonDataStore):
+    _ATTR = "user_permissions"
+
+    def __init__(self, store: JsonDataStore, scope: Callable[[], Any] | None = None):
         self._store = store
-        self._roles = RoleRepository(store)
+        self._scope = scope
+        self._table: PermissionTable | None = None
+        self._scopes: tuple[Any, dict] = (None, {})
+        self._hierarchy = OrgHierarchy()
+        self._hierarchy_version: Any = None
+        self._hierarchy_lock = threading.Lock()
 
     # ------------------------------------------------------------------ #
     # Internal helpers                                                     #
     # ------------------------------------------------------------------ #
 
+    def permission_table(self) -> PermissionTable:
+        """Return the compiled table, rebuilding it if the data changed."""
+        version = store_version(self._store)
+        table = self._table
+        if table is None or version is None or table.version != version:
+            data = read_snapshot(self._store)
+            table = PermissionTable(data.get("roles", ()), self._acm_from(data), version)
+            self._table = table
+        return table
+
     def _get_role_name(self, user: dict) -> str:
-        role = self._roles.get(user.get("role_id"))
-        return role["role_name"] if role else "User"
+        return self.permissions_for(user).role_name
 
-    def _acm(self) -> dict:
-        data = self._store.load()
+    @staticmethod
+    def _acm_from(data) -> dict:
         acm = data.get("access_control_matrix", {})
         if not acm:
             acm = JsonDataStore.DEFAULT_ACM
         return acm
 
-    def _acm_perm(self, role_name: str, entity_type: str, action: str) -> bool:
-        """Look up a single ACM cell, falling back to DEFAULT_ACM."""
-        acm = self._acm()
-        key = _acm_role_key(role_name)
-        return bool(acm.get(key, {}).get(entity_type, {}).get(action, False))
-
-    def _get_employee_for_user(self, user: dict, data: dict) -> dict | None:
-        person_id = user.get("person_id")
-        return next(
-            (e for e in data.get("employees", []) if e.get("person_id") == person_id),
-            None,
-        )
+    def _acm(self) -> dict:
+        return self._acm_from(read_snapshot(self._store))
 
     # ------------------------------------------------------------------ #
     # ACM CRUD checks                                                      #
     # ------------------------------------------------------------------ #
 
+    def permissions_for(self, user: dict) -> UserPermissions:
+        """Return *user*'s full entity × action permission matrix.
+
+        The matrix is shared by every user with the same role and cached on
+        the active scope, so one request resolves it once.
+        """
+        namespace = self._scope() if self._scope is not None else None
+        memo = getattr(namespace, self._ATTR, None) if namespace is not None else None
+        key = (user.get("user_id"), user.get("role_id"))
+        if memo is not None and key in memo:
+            return memo[key]
+        table = self.permission_table()
+        perms = table.permissions(table.role_name(user.get("role_id")))
+        if namespace is not None:
+            if memo is None:
+                memo = {}
+                setattr(namespace, self._ATTR, memo)
+            memo[key] = perms
+        return perms
+
     def can_view(self, entity_type: str, user: dict) -> bool:
-        role_name = self._get_role_name(user)
-        if role_name == "Admin":
-            return True
-        return self._acm_perm(role_name, entity_type, "read")
+        return self.permissions_for(user).can(entity_type, "read")
 
     def can_edit(self, entity_type: str, user: dict) -> bool:
         """Check CREATE or UPDATE permission (generic edit gate)."""
-        role_name = self._get_role_name(user)
-        if role_name == "Admin":
-            return True
-        if _acm_role_key(role_name) == "Creator":
-            return False
-        return self._acm_perm(role_name, entity_type, "update") or self._acm_perm(role_name, entity_type, "create")
+        return self.permissions_for(user).can(entity_type, "edit")
 
     def can_create(self, entity_type: str, user: dict) -> bool:
-        role_name = self._get_role_name(user)
-        if role_name == "Admin":
-            return True
-        if _acm_role_key(role_name) == "Creator":
-            return False
-        return self._acm_perm(role_name, entity_type, "create")
+        return self.permissions_for(user).can(entity_type, "create")
 
     def can_update(self, entity_type: str, user: dict, target: dict | None = None) -> bool:
         """Check update permission, honouring manager-vs-manager restriction."""
-        role_name = self._get_role_name(user)
-        if role_name == "Admin":
-            return True
-        if _acm_role_key(role_name) == "Creator":
-            return False
-        if role_name == "Manager" and entity_type == "employees" and target:
+        perms = self.permissions_for(user)
+        if perms.role_name == "Manager" and entity_type == "employees" and target:
             # Managers cannot update *other* managers; they can update their own record
             if target.get("is_manager") and target.get("person_id") != user.get("person_id"):
                 return False
-        return self._acm_perm(role_name, entity_type, "update")
+        return perms.can(entity_type, "update")
 
     def can_delete(self, entity_type: str, user: dict, target: dict | None = None) -> bool:
-        role_name = self._get_role_name(user)
-        if role_name == "Admin":
-            return True
-        if _acm_role_key(role_name) == "Creator":
-            return False
+        perms = self.permissions_for(user)
         # Managers cannot delete *other* managers; they can delete their own record
-        if role_name == "Manager" and entity_type == "employees" and target:
+        if perms.role_name == "Manager" and entity_type == "employees" and target:
             if target.get("is_manager") and target.get("person_id") != user.get("person_id"):
                 return False
-        return self._acm_perm(role_name, entity_type, "delete")
+        return perms.can(entity_type, "delete")
 
     # ------------------------------------------------------------------ #
     # Scoping helpers                                                      #
     # ------------------------------------------------------------------ #
 
+    def employee_hierarchy(self) -> OrgHierarchy:
+        """Return the management hierarchy, synced to the current data."""
+        version = store_version(self._store)
+        with self._hierarchy_lock:
+            if version is None or version != self._hierarchy_version:
+                self._hierarchy.sync(read_snapshot(self._store).get("employees", ()))
+                self._hierarchy_version = version
+            return self._hierarchy
+
+    def manages(self, user: dict, employee_id) -> bool:
+        """True if *employee_id* is anywhere below *user* in the hierarchy."""
+        own = self.visibility_for(user).own_employee_id
+        return own is not None and self.employee_hierarchy().is_ancestor(own, employee_id)
+
+    def visibility_for(self, user: dict) -> VisibilityScope:
+        """Return *user*'s visible-ID sets, cached per (user, data version)."""
+        version = store_version(self._store)
+        cached_version, scopes = self._scopes
+        if version is None or version != cached_version:
+            scopes = {}
+            self._scopes = (version, scopes)
+        key = (user.get("user_id"), user.get("role_id"), user.get("person_id"))
+        scope = scopes.get(key)
+        if scope is None:
+            role_name = self._get_role_name(user)
+            scope = VisibilityScope.build(
+                role_name,
+                user,
+                read_snapshot(self._store),
+                version,
+                self.employee_hierarchy() if role_name == "Manager" else None,
+            )
+            scopes[key] = scope
+        return scope
+
     def scope_creators(self, user: dict, all_creators: list) -> list:
         """Return creators the user may see."""
-        role_name = self._get_role_name(user)
-        if role_name in {"Admin", "Manager"}:
-            return all_creators
-        data = self._store.load()
-        employee = self._get_employee_for_user(user, data)
-        if not employee:
-            return []
-        emp_id = employee["employee_id"]
-        return [c for c in all_creators if c.get("employee_id") == emp_id]
+        return self.visibility_for(user).filter("creators", all_creators)
 
     # Keep backward-compat name used in tests / old code
     def scope_clients(self, user: dict, all_clients: list) -> list:
@@ -148,22 +188,15 @@ class AccessPolicy:
 
     def scope_employees(self, user: dict, all_employees: list) -> list:
         """Return employees the user may see."""
-        role_name = self._get_role_name(user)
-        if role_name == "Admin":
-            return all_employees
-        if role_name == "Manager":
-            data = self._store.load()
-            mgr_record = self._get_employee_for_user(user, data)
-            if not mgr_record:
-                return []
-            mgr_id = mgr_record["employee_id"]
-            return [e for e in all_employees if e.get("manager_id") == mgr_id or e["employee_id"] == mgr_id]
-        # Employees only see themselves
-        data = self._store.load()
-        employee = self._get_employee_for_user(user, data)
-        if not employee:
-            return []
-        return [employee]
+        return self.visibility_for(user).filter("employees", all_employees)
+
+    def scope_deals(self, user: dict, all_deals: list) -> list:
+        """Return deals belonging to creators the user may see."""
+        return self.visibility_for(user).filter("deals", all_deals)
+
+    def scope_contracts(self, user: dict, all_contracts: list) -> list:
+        """Return contracts of deals the user may see."""
+        return self.visibility_for(user).filter("contracts", all_contracts)
 
     # ------------------------------------------------------------------ #
     # ACM admin helpers                                                    #
@@ -198,4 +231,9 @@ class AccessPolicy:
         data = self._store.load()
         data["access_control_matrix"] = new_acm
         self._store.save(data)
+        self._table = None
+        self._scopes = (None, {})
+        namespace = self._scope() if self._scope is not None else None
+        if namespace is not None and hasattr(namespace, self._ATTR):
+            delattr(namespace, self._ATTR)
 
@@ -0,0 +1,159 @@
+"""Transitive management hierarchy over ``employees.manager_id``.
+
+``OrgHierarchy`` is a closure table kept in memory: every employee maps to
+the frozen set of their managers at any depth, and every manager to the set
+of their reports at any depth.
+
+- ``is_ancestor(a, b)`` ("does *a* manage *b*, directly or not?") is one set
+  lookup.
+- ``reports(x)`` returns every report under *x* without walking the tree.
+- ``add`` / ``move`` / ``remove`` update only the affected subtree and its
+  old and new ancestors, and ``sync(employees)`` applies the difference
+  between the index and a fresh employee list through those operations.
+
+A ``manager_id`` of 0/None, one naming an unknown employee, or one that
+would close a cycle leaves the employee at the root of its own tree.
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Iterable, Mapping
+
+
+class OrgHierarchy:
+    """Closure-table index of who reports to whom."""
+
+    def __init__(self, employees: Iterable[Mapping] = ()):
+        self._lock = threading.RLock()
+        self._manager: dict[Any, Any] = {}
+        self._children: dict[Any, set] = {}
+        self._ancestors: dict[Any, frozenset] = {}
+        self._descendants: dict[Any, set] = {}
+        self.sync(employees)
+
+    @staticmethod
+    def _manager_id(employee: Mapping):
+        return employee.get("manager_id") or None
+
+    def __contains__(self, employee_id) -> bool:
+        return employee_id in self._manager
+
+    def __len__(self) -> int:
+        return len(self._manager)
+
+    # ------------------------------------------------------------------ #
+    # Queries                                                              #
+    # ------------------------------------------------------------------ #
+
+    def manager_of(self, employee_id):
+        """Return the attached manager of *employee_id* (None for roots)."""
+        return self._manager.get(employee_id)
+
+    def ancestors(self, employee_id) -> frozenset:
+        """Return every manager above *employee_id*."""
+        return self._ancestors.get(employee_id, frozenset())
+
+    def reports(self, manager_id) -> frozenset:
+        """Return every employee under *manager_id*, at any depth."""
+        with self._lock:
+            return frozenset(self._descendants.get(manager_id, ()))
+
+    def direct_reports(self, manager_id) -> frozenset:
+        with self._lock:
+            return frozenset(self._children.get(manager_id, ()))
+
+    def is_ancestor(self, manager_id, employee_id) -> bool:
+        """True if *manager_id* is above *employee_id* in the hierarchy."""
+        return manager_id in self._ancestors.get(employee_id, ())
+
+    def depth(self, employee_id) -> int:
+        return len(self._ancestors.get(employee_id, ()))
+
+    # ------------------------------------------------------------------ #
+    # Incremental maintenance                                              #
+    # ------------------------------------------------------------------ #
+
+    def add(self, employee_id, manager_id=None) -> None:
+        """Add a new employee (a leaf) under *manager_id*."""
+        with self._lock:
+            if employee_id in self._manager:
+                raise ValueError(f"employee {employee_id} is already indexed")
+            self._manager[employee_id] = None
+            self._children[employee_id] = set()
+            self._ancestors[employee_id] = frozenset()
+            self._descendants[employee_id] = set()
+            if manager_id is not None:
+                self.move(employee_id, manager_id)
+
+    def move(self, employee_id, manager_id) -> None:
+        """Re-parent *employee_id* (and its subtree) under *manager_id*."""
+        with self._lock:
+            if manager_id is not None:
+                if manager_id not in self._manager:
+                    raise KeyError(manager_id)
+                if manager_id == employee_id or manager_id in self._descendants[employee_id]:
+                    raise ValueError(f"moving {employee_id} under {manager_id} would create a cycle")
+            old_manager = self._manager[employee_id]
+            if old_manager == manager_id:
+                return
+            subtree = self._descendants[employee_id] | {employee_id}
+            old = self._ancestors[employee_id]
+            new = (
+                frozenset({manager_id}) | self._ancestors[manager_id]
+                if manager_id is not None
+                else frozenset()
+            )
+            for ancestor in old - new:
+                self._descendants[ancestor] -= subtree
+            for ancestor in new - old:
+                self._descendants[ancestor] |= subtree
+            for member in subtree:
+                self._ancestors[member] = (self._ancestors[member] - old) | new
+            if old_manager is not None:
+                self._children[old_manager].discard(employee_id)
+            if manager_id is not None:
+                self._children[manager_id].add(employee_id)
+            self._manager[employee_id] = manager_id
+
+    def remove(self, employee_id) -> None:
+        """Drop *employee_id*; its direct reports become roots."""
+        with self._lock:
+            if employee_id not in self._manager:
+                return
+            for child in list(self._children[employee_id]):
+                self.move(child, None)
+            self.move(employee_id, None)
+            del self._manager[employee_id]
+            del self._children[employee_id]
+            del self._ancestors[employee_id]
+            del self._descendants[employee_id]
+
+    def sync(self, employees: Iterable[Mapping]) -> int:
+        """Bring the index in line with *employees*; return how many changed."""
+        wanted = {
+            e["employee_id"]: self._manager_id(e)
+            for e in employees
+            if e.get("employee_id") is not None
+        }
+        touched = set()
+        with self._lock:
+            for employee_id in [e for e in self._manager if e not in wanted]:
+                self.remove(employee_id)
+                touched.add(employee_id)
+            for employee_id in wanted:
+                if employee_id not in self._manager:
+                    self.add(employee_id)
+                    touched.add(employee_id)
+            for employee_id, manager_id in wanted.items():
+                target = manager_id if manager_id in self._manager else None
+                if self._manager[employee_id] == target:
+                    continue
+                try:
+                    self.move(employee_id, target)
+                except ValueError:
+                    # A cycle in the data: keep the employee as a root.
+                    if self._manager[employee_id] is None:
+                        continue
+                    self.move(employee_id, None)
+                touched.add(employee_id)
+        return len(touched)
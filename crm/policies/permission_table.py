@@ -0,0 +1,147 @@
+"""Compiled, immutable form of the roles table and the Access Control Matrix.
+
+``PermissionTable`` resolves every role to an entity → action bitmask once,
+with the hard-coded rules already applied:
+
+- Admin has every action on every entity (including unknown ones).
+- Creator-type roles (Creator / Client / Rep) keep only their ACM ``read``.
+
+Permission checks against a compiled table are two dict lookups and a bit
+test.  ``AccessPolicy`` rebuilds the table when the store version changes
+or the ACM is saved.
+
+``UserPermissions`` is the whole entity × action matrix for one role, built
+once per role and table so templates and API responses can read any number
+of flags without further policy calls.
+"""
+from __future__ import annotations
+
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping
+
+READ = 1
+CREATE = 2
+UPDATE = 4
+DELETE = 8
+ALL = READ | CREATE | UPDATE | DELETE
+
+ACTION_BITS: Mapping[str, int] = MappingProxyType({
+    "read": READ,
+    "create": CREATE,
+    "update": UPDATE,
+    "delete": DELETE,
+})
+
+# Roles that map to "Creator" for ACM look-up (their role_name may differ)
+CREATOR_ROLE_NAMES: frozenset[str] = frozenset({"Creator", "Client", "Rep"})
+
+
+def acm_role_key(role_name: str) -> str:
+    """Map a role_name to the matching ACM key."""
+    if role_name in CREATOR_ROLE_NAMES:
+        return "Creator"
+    return role_name
+
+
+class UserPermissions:
+    """Read-only entity × action matrix for one role.
+
+    ``perms.can("deals", "update")`` answers a single check;
+    ``perms["deals"]["update"]`` (or ``permissions.deals.update`` in Jinja)
+    reads the same flag.  Besides the ACM actions each entity carries an
+    ``edit`` flag (create or update).  ``as_dict()`` gives the matrix as
+    plain JSON-ready dicts.
+    """
+
+    __slots__ = ("role_name", "version", "_table", "_entities")
+
+    def __init__(self, table: "PermissionTable", role_name: str):
+        self.role_name = role_name
+        self.version = table.version
+        self._table = table
+        self._entities: Mapping[str, Mapping[str, bool]] = MappingProxyType({
+            entity: self._flags(table.mask(role_name, entity)) for entity in table.entities
+        })
+
+    @staticmethod
+    def _flags(mask: int) -> Mapping[str, bool]:
+        flags = {action: bool(mask & bit) for action, bit in ACTION_BITS.items()}
+        flags["edit"] = bool(mask & (CREATE | UPDATE))
+        return MappingProxyType(flags)
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role_name == "Admin"
+
+    def __getitem__(self, entity_type: str) -> Mapping[str, bool]:
+        flags = self._entities.get(entity_type)
+        if flags is None:
+            flags = self._flags(self._table.mask(self.role_name, entity_type))
+        return flags
+
+    def __contains__(self, entity_type: str) -> bool:
+        return entity_type in self._entities
+
+    def __iter__(self):
+        return iter(self._entities)
+
+    def can(self, entity_type: str, action: str) -> bool:
+        """True if the role may perform *action* (read/create/update/delete/edit)."""
+        return self[entity_type].get(action, False)
+
+    def as_dict(self) -> dict[str, dict[str, bool]]:
+        return {entity: dict(flags) for entity, flags in self._entities.items()}
+
+
+class PermissionTable:
+    """Role → entity → action bitmask lookup built from roles and an ACM."""
+
+    __slots__ = ("version", "entities", "_role_names", "_masks", "_permissions")
+
+    def __init__(self, roles: Iterable[Mapping], acm: Mapping, version: Any = None):
+        self.version = version
+        role_names = {r.get("role_id"): r.get("role_name", "User") for r in roles}
+        masks: dict[str, Mapping[str, int]] = {}
+        for role_name in set(role_names.values()) | {"User"}:
+            masks[role_name] = MappingProxyType(self._compile(role_name, acm))
+        self._role_names: Mapping[Any, str] = MappingProxyType(role_names)
+        self._masks: Mapping[str, Mapping[str, int]] = MappingProxyType(masks)
+        self.entities: tuple[str, ...] = tuple(dict.fromkeys(
+            entity for perms in acm.values() for entity in perms
+        ))
+        self._permissions: dict[str, UserPermissions] = {}
+
+    @staticmethod
+    def _compile(role_name: str, acm: Mapping) -> dict[str, int]:
+        key = acm_role_key(role_name)
+        compiled: dict[str, int] = {}
+        for entity, perms in acm.get(key, {}).items():
+            mask = 0
+            for action, bit in ACTION_BITS.items():
+                if perms.get(action, False):
+                    mask |= bit
+            if key == "Creator":
+                mask &= READ
+            compiled[entity] = mask
+        return compiled
+
+    def role_name(self, role_id) -> str:
+        """Return the role name for *role_id* ("User" when unknown)."""
+        return self._role_names.get(role_id, "User")
+
+    def mask(self, role_name: str, entity_type: str) -> int:
+        """Return the action bitmask *role_name* has on *entity_type*."""
+        if role_name == "Admin":
+            return ALL
+        return self._masks.get(role_name, {}).get(entity_type, 0)
+
+    def allows(self, role_name: str, entity_type: str, bits: int) -> bool:
+        """True if *role_name* has any of the action *bits* on *entity_type*."""
+        return bool(self.mask(role_name, entity_type) & bits)
+
+    def permissions(self, role_name: str) -> UserPermissions:
+        """Return the full permission matrix for *role_name* (built once)."""
+        perms = self._permissions.get(role_name)
+        if perms is None:
+            perms = self._permissions.setdefault(role_name, UserPermissions(self, role_name))
+        return perms
@@ -0,0 +1,139 @@
+"""Precomputed per-user visibility scopes.
+
+A ``VisibilityScope`` holds, for one user and one version of the data, the
+set of record IDs the user may see for every scoped entity type:
+
+- ``employees``: Admin sees everyone, a Manager sees themself and every
+  report below them (at any depth), anyone else only their own employee
+  record.
+- ``creators``: Admin and Manager see every creator, anyone else the
+  creators assigned to their employee record.
+- ``social_media_accounts`` and ``deals`` follow their creator.
+- ``contracts`` follow their deal.
+
+``None`` in place of a set means "unrestricted".  Entity types without a
+scope rule (brands, persons, ...) are always unrestricted; whether the user
+may see the entity type at all is the permission matrix's job.
+"""
+from __future__ import annotations
+
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping
+
+from crm.policies.hierarchy import OrgHierarchy
+
+ID_FIELDS: Mapping[str, str] = MappingProxyType({
+    "employees": "employee_id",
+    "creators": "creator_id",
+    "social_media_accounts": "social_media_id",
+    "deals": "deal_id",
+    "contracts": "contract_id",
+})
+
+# The collections each entity type's scope is computed from.
+SCOPE_SOURCES: Mapping[str, tuple[str, ...]] = MappingProxyType({
+    "employees": ("employees",),
+    "creators": ("employees", "creators"),
+    "social_media_accounts": ("employees", "creators", "social_media_accounts"),
+    "deals": ("employees", "creators", "deals"),
+    "contracts": ("employees", "creators", "deals", "contracts"),
+})
+
+
+def deal_creator_id(deal: Mapping) -> Any:
+    """Return the creator a deal belongs to (legacy deals use ``client_id``)."""
+    value = deal.get("creator_id")
+    if value is not None:
+        return value
+    return deal.get("client_id")
+
+
+class VisibilityScope:
+    """Immutable entity → visible-ID-set lookup for one user."""
+
+    __slots__ = ("version", "own_employee_id", "_ids")
+
+    def __init__(
+        self,
+        ids: Mapping[str, frozenset | None],
+        version: Any = None,
+        own_employee_id: Any = None,
+    ):
+        self.version = version
+        self.own_employee_id = own_employee_id
+        self._ids: Mapping[str, frozenset | None] = MappingProxyType(dict(ids))
+
+    @classmethod
+    def build(
+        cls,
+        role_name: str,
+        user: Mapping,
+        data: Mapping,
+        version: Any = None,
+        hierarchy: OrgHierarchy | None = None,
+    ) -> "VisibilityScope":
+        """Compute every entity's visible IDs for *user* from *data* in one pass.
+
+        *hierarchy* must reflect ``data["employees"]``; one is built on the
+        fly when it is not given.
+        """
+        employees = data.get("employees", [])
+        own = next((e for e in employees if e.get("person_id") == user.get("person_id")), None)
+        own_id = own.get("employee_id") if own is not None else None
+
+        if role_name == "Admin":
+            employee_ids = None
+        elif role_name == "Manager":
+            if own_id is None:
+                employee_ids = frozenset()
+            else:
+                if hierarchy is None:
+                    hierarchy = OrgHierarchy(employees)
+                employee_ids = hierarchy.reports(own_id) | {own_id}
+        else:
+            employee_ids = frozenset() if own_id is None else frozenset({own_id})
+
+        if role_name in {"Admin", "Manager"}:
+            return cls({
+                "employees": employee_ids,
+                "creators": None,
+                "social_media_accounts": None,
+                "deals": None,
+                "contracts": None,
+            }, version, own_id)
+
+        creator_ids = frozenset(
+            c.get("creator_id") for c in data.get("creators", [])
+            if own_id is not None and c.get("employee_id") == own_id
+        )
+        deal_ids = frozenset(
+            d.get("deal_id") for d in data.get("deals", []) if deal_creator_id(d) in creator_ids
+        )
+        return cls({
+            "employees": employee_ids,
+            "creators": creator_ids,
+            "social_media_accounts": frozenset(
+                s.get("social_media_id") for s in data.get("social_media_accounts", [])
+                if s.get("creator_id") in creator_ids
+            ),
+            "deals": deal_ids,
+            "contracts": frozenset(
+                c.get("contract_id") for c in data.get("contracts", []) if c.get("deal_id") in deal_ids
+            ),
+        }, version, own_id)
+
+    def ids(self, entity_type: str) -> frozenset | None:
+        """Return the visible IDs for *entity_type* (None = unrestricted)."""
+        return self._ids.get(entity_type)
+
+    def visible(self, entity_type: str, record_id) -> bool:
+        ids = self._ids.get(entity_type)
+        return ids is None or record_id in ids
+
+    def filter(self, entity_type: str, records: Iterable[Mapping]) -> list:
+        """Return the *records* of *entity_type* the user may see."""
+        ids = self._ids.get(entity_type)
+        if ids is None:
+            return list(records)
+        id_field = ID_FIELDS[entity_type]
+        return [r for r in records if r.get(id_field) in ids]
@@ -1,17 +1,178 @@
 from __future__ import annotations
 
-from crm.persistence.json_store import JsonDataStore
+import base64
+import binascii
+import json
+import re
+from dataclasses import replace
+from functools import cached_property
+from itertools import islice
+from typing import Iterable, Iterator, Mapping
+
+from crm.persistence.activity import iter_activity
+from crm.persistence.changes import PRIMARY_KEYS
+from crm.persistence.json_store import JsonDataStore, read_snapshot
+from crm.persistence.filters import Condition, parse_filters
+from crm.persistence.paging import PageQuery, SortedRecords, page_in_memory
+from crm.policies.access_control import PERMISSION_SOURCES
+from crm.policies.visibility import ID_FIELDS, SCOPE_SOURCES, deal_creator_id
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+MAX_BATCH_REQUESTS = 50
+EXPORT_CHUNK_SIZE = 500
+MAX_BATCH_IDS = 1000
+
+# Fields never serialized, so never sortable either.
+_HIDDEN_FIELDS: Mapping[str, frozenset] = {"users": frozenset({"password"})}
+_FIELD_NAME = re.compile(r"[A-Za-z_][A-Za-z0-9_]*\Z")
+
+# entity -> expand option -> related entity type
+EXPANSIONS: Mapping[str, Mapping[str, str]] = {
+    "users": {"person": "persons"},
+    "employees": {"person": "persons"},
+    "creators": {"person": "persons", "employee": "employees", "deals": "deals"},
+    "brand_contacts": {"person": "persons"},
+    "brands": {"deals": "deals"},
+}
+
+# entity -> CSV export columns, in order, when ``?fields`` is not given
+EXPORT_COLUMNS: Mapping[str, tuple[str, ...]] = {
+    "roles": ("id", "role_id", "role_name"),
+    "persons": (
+        "id", "person_id", "first_name", "last_name", "full_name", "display_name",
+        "email", "phone", "address", "city", "state", "zip",
+    ),
+    "users": ("id", "user_id", "username", "role_id", "person_id"),
+    "employees": (
+        "id", "employee_id", "person_id", "position", "title", "manager_id",
+        "start_date", "end_date", "is_active", "is_manager",
+    ),
+    "creators": (
+        "id", "creator_id", "person_id", "employee_id", "name", "description",
+        "created_at", "updated_at",
+    ),
+    "social_media_accounts": ("id", "social_media_id", "creator_id", "account_type", "link"),
+    "brands": ("id", "brand_id", "name", "industry", "website", "notes", "created_at", "updated_at"),
+    "brand_contacts": ("id", "brand_contact_id", "person_id", "brand_id", "notes"),
+    "deals": (
+        "id", "deal_id", "creator_id", "brand_id", "brand_contact_id", "pitch_date",
+        "is_active", "is_successful", "created_at", "updated_at",
+    ),
+    "contracts": (
+        "id", "contract_id", "deal_id", "details", "payment", "agency_percentage",
+        "start_date", "end_date", "status", "is_approved", "created_at", "updated_at",
+    ),
+}
+
+
+def _names(value) -> tuple[str, ...]:
+    """Accept a list of names or a comma-separated string of them."""
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, list) or not all(isinstance(name, str) for name in value):
+        raise ValueError("expected a list of names or a comma-separated string")
+    return tuple(name.strip() for name in value if name.strip())
+
+
+class _Joins:
+    """Lookup maps over one snapshot, each built on first use."""
+
+    def __init__(self, data: Mapping):
+        self._data = data
+        self._by_id: dict[str, dict] = {}
+
+    def by_id(self, entity: str, id_field: str) -> dict:
+        """Return *entity*'s records keyed by *id_field*."""
+        index = self._by_id.get(entity)
+        if index is None:
+            index = {r.get(id_field): r for r in self._data.get(entity, [])}
+            self._by_id[entity] = index
+        return index
+
+    @cached_property
+    def persons(self) -> dict:
+        return {p.get("person_id"): p for p in self._data.get("persons", [])}
+
+    @cached_property
+    def employees(self) -> dict:
+        return {e.get("employee_id"): e for e in self._data.get("employees", [])}
+
+    @cached_property
+    def deals_by_creator(self) -> dict:
+        groups: dict = {}
+        for deal in self._data.get("deals", []):
+            groups.setdefault(deal_creator_id(deal), []).append(deal)
+        return groups
+
+    @cached_property
+    def deals_by_brand(self) -> dict:
+        groups: dict = {}
+        for deal in self._data.get("deals", []):
+            groups.setdefault(deal.get("brand_id"), []).append(deal)
+        return groups
+
+
+class _SnapshotStore:
+    """Read-only store over one snapshot, for answering a batch consistently.
+
+    Pages are served from one sorted order per (collection, sort field).
+    """
+
+    def __init__(self, data: Mapping):
+        self._data = data
+        self._orders: dict[tuple, SortedRecords] = {}
+
+    def load(self):
+        return self._data
+
+    def snapshot(self):
+        return self._data
+
+    def page_records(self, key: str, query: PageQuery) -> list:
+        order = self._orders.get((key, query.sort))
+        if order is None:
+            order = SortedRecords(self._data.get(key, ()), PRIMARY_KEYS[key], query.sort)
+            self._orders[(key, query.sort)] = order
+        return order.page(query)
+
+
+class _FixedScope:
+    """An access policy whose visibility scope was computed once up front."""
+
+    def __init__(self, policy, visibility):
+        self._policy = policy
+        self._visibility = visibility
+
+    def can_view(self, entity: str, user: dict) -> bool:
+        return self._policy.can_view(entity, user)
+
+    def visibility_for(self, user: dict):
+        return self._visibility
 
 
 class ApiV1Service:
+    """Serializes records for the ``/api/v1`` endpoints.
+
+    Every call reads one snapshot and builds the join maps it needs once
+    (``_Joins``), so serializing N records costs O(N) lookups rather than a
+    reload and a scan per record.  ``expand`` inlines related records from
+    the same maps (see ``EXPANSIONS``); expanded records are subject to the
+    caller's permissions and visibility scope like top-level ones.
+
+    ``page_for_user`` serves one keyset page instead of a whole collection.
+    The store does the scoping, sorting and slicing (``page_records``), and
+    only the page's related records are fetched for serialization, so a
+    page costs the same however large the collection grows.
+    """
+
     def __init__(self, store: JsonDataStore):
         self._store = store
 
     def _load(self) -> dict:
-        return self._store.load()
-
-    def _records(self, entity: str) -> list:
-        return list(self._load().get(entity, []))
+        return read_snapshot(self._store)
 
     def _id_field(self, entity: str) -> str:
         return {
@@ -41,41 +202,132 @@ class ApiV1Service:
             "contracts": "contract",
         }[entity]
 
-    def _creator_id(self, record: dict) -> int | None:
-        value = record.get("creator_id")
-        if value is not None:
-            return value
-        return record.get("client_id")
+    def check_expand(self, entity: str, expand: Iterable[str]) -> tuple[str, ...]:
+        """Validate *expand* options for *entity*; raise ValueError on unknown ones."""
+        expand = tuple(dict.fromkeys(name for name in expand if name))
+        allowed = EXPANSIONS.get(entity, {})
+        unknown = [name for name in expand if name not in allowed]
+        if unknown:
+            options = ", ".join(allowed) or "none"
+            raise ValueError(f"cannot expand {', '.join(unknown)} on {entity} (allowed: {options})")
+        return expand
 
-    def _scope_records(self, entity: str, user: dict, policy, records: list[dict]) -> list[dict]:
-        if entity == "employees":
-            return policy.scope_employees(user, records)
+    def sources_for(self, entity: str, expand: Iterable[str] = ()) -> tuple[str, ...]:
+        """Return the collections *entity*'s responses (with *expand*) are built from.
+
+        Besides the records themselves: the permission matrix, the
+        collections visibility scopes are computed from and those related
+        records are serialized from.  Unknown expand options are ignored.
+        """
+        sources = {entity, *PERMISSION_SOURCES, *SCOPE_SOURCES.get(entity, ())}
+        if entity == "creators":
+            sources.add("persons")
+        for name in expand:
+            related = EXPANSIONS.get(entity, {}).get(name)
+            if related is not None:
+                sources.update((related, *SCOPE_SOURCES.get(related, ())))
+        return tuple(sorted(sources))
+
+    def _page(self, entity: str, query: PageQuery) -> list:
+        page_records = getattr(self._store, "page_records", None)
+        if page_records is not None:
+            return page_records(entity, query)
+        records = read_snapshot(self._store).get(entity, ())
+        return page_in_memory(records, self._id_field(entity), query)
+
+    def _fetch(self, entity: str, ids) -> list:
+        ids = frozenset(i for i in ids if i is not None)
+        return self._page(entity, PageQuery(ids=ids)) if ids else []
+
+    def _fetch_deals(self, entity: str, records: list) -> list:
         if entity == "creators":
-            return policy.scope_creators(user, records)
-        if entity == "social_media_accounts":
-            data = self._load()
-            visible_creators = {creator.get("creator_id") for creator in policy.scope_creators(user, data.get("creators", []))}
-            return [record for record in records if record.get("creator_id") in visible_creators]
-        if entity == "deals":
-            data = self._load()
-            visible_creators = {creator.get("creator_id") for creator in policy.scope_creators(user, data.get("creators", []))}
-            return [record for record in records if self._creator_id(record) in visible_creators]
-        if entity == "contracts":
-            visible_deals = {
-                record.get("deal_id")
-                for record in self._scope_records("deals", user, policy, self._records("deals"))
-            }
-            return [record for record in records if record.get("deal_id") in visible_deals]
-        return records
+            # Legacy deals point at their creator through ``client_id``.
+            owner_fields = ("creator_id", "client_id")
+            owners = tuple({r.get("creator_id") for r in records} - {None})
+        else:
+            owner_fields = ("brand_id",)
+            owners = tuple({r.get("brand_id") for r in records} - {None})
+        deals: dict = {}
+        for field in owner_fields if owners else ():
+            for deal in self._page("deals", PageQuery(filters=(Condition(field, "in", owners),))):
+                deals.setdefault(deal.get("deal_id"), deal)
+        return sorted(deals.values(), key=lambda deal: deal.get("deal_id") or 0)
+
+    def _related(self, entity: str, records: list, expand) -> dict:
+        """Return the related records serializing *records* needs, by collection.
+
+        Only the records related to *records* are fetched: persons and
+        employees by ID, deals by their creator or brand.
+        """
+        related: dict = {}
+        if entity == "creators" or "person" in expand:
+            related["persons"] = self._fetch("persons", (r.get("person_id") for r in records))
+        if "employee" in expand:
+            related["employees"] = self._fetch("employees", (r.get("employee_id") for r in records))
+        if "deals" in expand:
+            related["deals"] = self._fetch_deals(entity, records)
+        return related
+
+    def _parse_filters(self, entity: str, args: Iterable[tuple[str, str]]) -> tuple[Condition, ...]:
+        conditions = []
+        known = {"id", *EXPORT_COLUMNS.get(entity, ())}
+        for condition in parse_filters(args):
+            if condition.field in _HIDDEN_FIELDS.get(entity, ()):
+                raise ValueError(f"cannot filter {entity} by {condition.field!r}")
+            if condition.field not in known:
+                # A typo or cache-buster would otherwise match nothing.
+                raise ValueError(f"unknown {entity} field {condition.field!r}")
+            if condition.field == "id":
+                condition = condition._replace(field=self._id_field(entity))
+            conditions.append(condition)
+        return tuple(conditions)
+
+    def _parse_sort(self, entity: str, sort: str | None) -> tuple[str | None, bool]:
+        """Parse ``field`` / ``-field`` into (field or None for the ID, descending)."""
+        if not sort:
+            return None, False
+        descending = sort.startswith("-")
+        field = sort[1:] if descending else sort
+        if not _FIELD_NAME.match(field) or field in _HIDDEN_FIELDS.get(entity, ()):
+            raise ValueError(f"cannot sort {entity} by {field!r}")
+        if field in ("id", self._id_field(entity)):
+            field = None
+        return field, descending
+
+    @staticmethod
+    def _encode_cursor(sort: str | None, descending: bool, value, record_id) -> str:
+        raw = json.dumps([sort, descending, value, record_id], separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def _decode_cursor(cursor: str, sort: str | None, descending: bool) -> tuple:
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            cursor_sort, cursor_descending, value, record_id = json.loads(raw)
+        except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+            raise ValueError("invalid cursor") from None
+        if (cursor_sort, cursor_descending) != (sort, descending):
+            raise ValueError("cursor does not match the requested sort")
+        return value, record_id
+
+    @staticmethod
+    def _select_fields(item: dict, fields, expand) -> dict:
+        keep = {"id", *fields, *expand}
+        return {name: value for name, value in item.items() if name in keep}
+
+    def _scope_records(self, entity: str, user: dict, policy, records: list[dict]) -> list[dict]:
+        if entity not in ID_FIELDS:
+            return records
+        return policy.visibility_for(user).filter(entity, records)
 
     def _serialize_user(self, record: dict) -> dict:
         data = dict(record)
         data.pop("password", None)
         return data
 
-    def _serialize_creator(self, record: dict) -> dict:
+    def _serialize_creator(self, record: dict, joins: _Joins) -> dict:
         data = dict(record)
-        person = next((person for person in self._load().get("persons", []) if person.get("person_id") == record.get("person_id")), None)
+        person = joins.persons.get(record.get("person_id"))
         name = ""
         if person:
             name = person.get("display_name") or person.get("full_name") or ""
@@ -90,18 +342,22 @@ class ApiV1Service:
 
     def _serialize_deal(self, record: dict) -> dict:
         data = dict(record)
+        creator_id = deal_creator_id(record)
+        if creator_id is not None:
+            # Legacy deals only carry ``client_id``.
+            data["creator_id"] = creator_id
         return data
 
     def _serialize_contract(self, record: dict) -> dict:
         data = dict(record)
         return data
 
-    def _serialize(self, entity: str, record: dict) -> dict:
+    def _serialize(self, entity: str, record: dict, joins: _Joins) -> dict:
         data = dict(record)
         if entity == "users":
             data = self._serialize_user(data)
         elif entity == "creators":
-            data = self._serialize_creator(data)
+            data = self._serialize_creator(data, joins)
         elif entity == "deals":
             data = self._serialize_deal(data)
         elif entity == "contracts":
@@ -109,21 +365,269 @@ class ApiV1Service:
         data.setdefault("id", data.get(self._id_field(entity)))
         return data
 
-    def list_for_user(self, entity: str, user: dict, policy) -> list[dict] | None:
+    def _expand(self, entity: str, record: dict, data: dict, expand, joins: _Joins, readable, visibility) -> None:
+        """Inline the *expand* relations of *record* into its serialized *data*.
+
+        *readable* maps each relation to whether the caller may view its
+        entity type; an unreadable relation is ``None`` (``[]`` for deals).
+        """
+        for name in expand:
+            if name == "deals":
+                if not readable[name]:
+                    data["deals"] = []
+                    continue
+                if entity == "creators":
+                    deals = joins.deals_by_creator.get(record.get("creator_id"), ())
+                else:
+                    deals = joins.deals_by_brand.get(record.get("brand_id"), ())
+                data["deals"] = [
+                    self._serialize("deals", deal, joins)
+                    for deal in visibility.filter("deals", deals)
+                ]
+                continue
+            if name == "person":
+                target = joins.persons.get(record.get("person_id"))
+            else:
+                employee_id = record.get("employee_id")
+                target = joins.employees.get(employee_id)
+                if not visibility.visible("employees", employee_id):
+                    target = None
+            if not readable[name] or target is None:
+                data[name] = None
+            else:
+                data[name] = self._serialize(EXPANSIONS[entity][name], target, joins)
+
+    def _serialize_all(self, entity: str, records, joins: _Joins, expand, user, policy) -> list[dict]:
+        if not expand:
+            return [self._serialize(entity, record, joins) for record in records]
+        readable = {name: policy.can_view(EXPANSIONS[entity][name], user) for name in expand}
+        visibility = policy.visibility_for(user)
+        items = []
+        for record in records:
+            item = self._serialize(entity, record, joins)
+            self._expand(entity, record, item, expand, joins, readable, visibility)
+            items.append(item)
+        return items
+
+    def list_for_user(self, entity: str, user: dict, policy, expand: Iterable[str] = ()) -> list[dict] | None:
+        """Return the *entity* records *user* may see, or None without permission.
+
+        Raises ValueError for an *expand* option *entity* does not offer.
+        """
         if not policy.can_view(entity, user):
             return None
-        records = self._scope_records(entity, user, policy, self._records(entity))
-        return [self._serialize(entity, record) for record in records]
+        expand = self.check_expand(entity, expand)
+        data = self._load()
+        records = self._scope_records(entity, user, policy, data.get(entity, []))
+        return self._serialize_all(entity, records, _Joins(data), expand, user, policy)
 
-    def get_for_user(self, entity: str, item_id: int, user: dict, policy) -> dict | None:
+    def get_for_user(self, entity: str, item_id: int, user: dict, policy, expand: Iterable[str] = ()) -> dict | None:
         if not policy.can_view(entity, user):
             return None
-        records = self._records(entity)
+        expand = self.check_expand(entity, expand)
+        if entity in ID_FIELDS and not policy.visibility_for(user).visible(entity, item_id):
+            return None
+        data = self._load()
         id_field = self._id_field(entity)
-        target = next((record for record in records if record.get(id_field) == item_id), None)
+        target = next((record for record in data.get(entity, []) if record.get(id_field) == item_id), None)
         if target is None:
             return None
-        scoped_ids = {record.get(id_field) for record in self._scope_records(entity, user, policy, records)}
-        if item_id not in scoped_ids:
+        return self._serialize_all(entity, [target], _Joins(data), expand, user, policy)[0]
+
+    def page_for_user(
+        self,
+        entity: str,
+        user: dict,
+        policy,
+        *,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: str | None = None,
+        sort: str | None = None,
+        fields: Iterable[str] = (),
+        expand: Iterable[str] = (),
+        filters: Iterable[tuple[str, str]] = (),
+    ) -> tuple[list[dict], str | None] | None:
+        """Return one page of the *entity* records *user* may see.
+
+        Records are ordered by *sort* (``field`` or ``-field``, the ID by
+        default) and then by ID.  *cursor* is the ``next_cursor`` of the
+        previous page; *fields* keeps only those fields (plus ``id`` and any
+        expansions).  *filters* are ``(name, value)`` query arguments (see
+        ``crm.persistence.filters``), applied in the store together with
+        the user's scope.  Returns ``(items, next_cursor)``, where
+        ``next_cursor`` is None on the last page, or None without
+        permission.  Raises ValueError for a bad sort, cursor, filter or
+        expand option.
+        """
+        if not policy.can_view(entity, user):
             return None
-        return self._serialize(entity, target)
+        expand = self.check_expand(entity, expand)
+        conditions = self._parse_filters(entity, filters)
+        sort_field, descending = self._parse_sort(entity, sort)
+        after = self._decode_cursor(cursor, sort_field, descending) if cursor else None
+        ids = policy.visibility_for(user).ids(entity) if entity in ID_FIELDS else None
+        query = PageQuery(sort_field, descending, after, limit + 1, ids, conditions)
+        records = self._page(entity, query)
+        next_cursor = None
+        if len(records) > limit:
+            records = records[:limit]
+            last = records[-1]
+            id_field = self._id_field(entity)
+            next_cursor = self._encode_cursor(
+                sort_field, descending, last.get(sort_field or id_field), last.get(id_field)
+            )
+        related = self._related(entity, records, expand)
+        items = self._serialize_all(entity, records, _Joins(related), expand, user, policy)
+        fields = tuple(fields)
+        if fields:
+            items = [self._select_fields(item, fields, expand) for item in items]
+        return items, next_cursor
+
+    def export_for_user(
+        self,
+        entity: str,
+        user: dict,
+        policy,
+        *,
+        sort: str | None = None,
+        fields: Iterable[str] = (),
+        expand: Iterable[str] = (),
+        filters: Iterable[tuple[str, str]] = (),
+    ) -> Iterator[dict] | None:
+        """Stream every *entity* record *user* may see, serialized.
+
+        Takes the arguments of ``page_for_user`` minus paging; they are
+        validated before this returns (ValueError), so a bad request fails
+        before anything is streamed.  Returns None without permission.
+        Records come from the store's ``iter_records`` (a server-side
+        cursor on the SQL stores) and are serialized ``EXPORT_CHUNK_SIZE``
+        at a time, so memory stays flat however many are exported.
+        """
+        if not policy.can_view(entity, user):
+            return None
+        expand = self.check_expand(entity, expand)
+        conditions = self._parse_filters(entity, filters)
+        sort_field, descending = self._parse_sort(entity, sort)
+        ids = policy.visibility_for(user).ids(entity) if entity in ID_FIELDS else None
+        query = PageQuery(sort_field, descending, None, None, ids, conditions)
+        return self._export(entity, query, tuple(fields), expand, user, policy)
+
+    def _export(self, entity: str, query: PageQuery, fields, expand, user, policy) -> Iterator[dict]:
+        records = self._iter(entity, query)
+        while True:
+            chunk = list(islice(records, EXPORT_CHUNK_SIZE))
+            if not chunk:
+                return
+            related = self._related(entity, chunk, expand)
+            items = self._serialize_all(entity, chunk, _Joins(related), expand, user, policy)
+            for item in items:
+                yield self._select_fields(item, fields, expand) if fields else item
+
+    def _iter(self, entity: str, query: PageQuery) -> Iterator:
+        iter_records = getattr(self._store, "iter_records", None)
+        if iter_records is not None:
+            return iter_records(entity, query, chunk_size=EXPORT_CHUNK_SIZE)
+        return self._iter_pages(entity, query)
+
+    def _iter_pages(self, entity: str, query: PageQuery) -> Iterator:
+        """Walk *query* page by page, for stores without ``iter_records``."""
+        id_field = self._id_field(entity)
+        after = None
+        while True:
+            page = self._page(entity, replace(query, after=after, limit=EXPORT_CHUNK_SIZE))
+            yield from page
+            if len(page) < EXPORT_CHUNK_SIZE:
+                return
+            last = page[-1]
+            after = (last.get(query.sort or id_field), last.get(id_field))
+
+    def batch_for_user(self, user: dict, policy, requests: Iterable[Mapping]) -> list[dict]:
+        """Answer several sub-requests against one snapshot and one scope.
+
+        Each sub-request names an ``entity`` and either ``ids`` to fetch
+        (``missing`` lists the IDs that do not exist or are out of scope) or
+        the list arguments of ``page_for_user`` (``limit``, ``cursor``,
+        ``sort``, ``fields``, ``expand`` and a ``filters`` object).  Every
+        response carries the sub-request's HTTP-style ``status``; a failing
+        sub-request does not fail the others.
+        """
+        data = self._load()
+        snapshot = ApiV1Service(_SnapshotStore(data))
+        scoped = _FixedScope(policy, policy.visibility_for(user))
+        joins = _Joins(data)
+        return [snapshot._batch_one(request, user, scoped, joins) for request in requests]
+
+    def _batch_one(self, request: Mapping, user: dict, policy, joins: _Joins) -> dict:
+        entity = request.get("entity")
+        try:
+            if entity not in PRIMARY_KEYS:
+                raise ValueError(f"unknown entity {entity!r}")
+            if not policy.can_view(entity, user):
+                return {"entity": entity, "status": 403, "error": "Forbidden"}
+            expand = self.check_expand(entity, _names(request.get("expand")))
+            fields = _names(request.get("fields"))
+            if "ids" in request:
+                items, missing = self._get_many(entity, request["ids"], user, policy, expand, joins)
+                if fields:
+                    items = [self._select_fields(item, fields, expand) for item in items]
+                return {"entity": entity, "status": 200, "items": items, "missing": missing}
+            filters = request.get("filters") or {}
+            if not isinstance(filters, Mapping):
+                raise ValueError("filters must be an object")
+            limit = request.get("limit", DEFAULT_PAGE_SIZE)
+            if isinstance(limit, bool) or not isinstance(limit, int) or not 1 <= limit <= MAX_PAGE_SIZE:
+                raise ValueError(f"limit must be an integer between 1 and {MAX_PAGE_SIZE}")
+            items, next_cursor = self.page_for_user(
+                entity, user, policy,
+                limit=limit,
+                cursor=request.get("cursor") or None,
+                sort=request.get("sort") or None,
+                fields=fields,
+                expand=expand,
+                filters=[(str(name), str(value)) for name, value in filters.items()],
+            )
+            return {"entity": entity, "status": 200, "items": items, "next_cursor": next_cursor}
+        except ValueError as exc:
+            return {"entity": entity, "status": 400, "error": str(exc)}
+
+    def _get_many(self, entity: str, ids, user: dict, policy, expand, joins: _Joins) -> tuple[list[dict], list]:
+        if not isinstance(ids, list) or any(isinstance(i, bool) or not isinstance(i, int) for i in ids):
+            raise ValueError("ids must be a list of integers")
+        if len(ids) > MAX_BATCH_IDS:
+            raise ValueError(f"at most {MAX_BATCH_IDS} ids per request")
+        index = joins.by_id(entity, self._id_field(entity))
+        visibility = policy.visibility_for(user)
+        scoped = entity in ID_FIELDS
+        found, missing = [], []
+        for item_id in dict.fromkeys(ids):
+            record = index.get(item_id)
+            if record is None or (scoped and not visibility.visible(entity, item_id)):
+                missing.append(item_id)
+            else:
+                found.append(record)
+        return self._serialize_all(entity, found, joins, expand, user, policy), missing
+
+    def activity_for_user(
+        self, user: dict, policy, limit: int, cursor: int | None = None
+    ) -> tuple[list[dict], int | None]:
+        """Return up to *limit* activity events *user* may see, newest first.
+
+        Events older than *cursor* (a ``seq``) are returned when it is given.
+        The second value is the cursor for the next page, or None on the
+        last page.
+        """
+        visibility = policy.visibility_for(user)
+        readable: dict[str, bool] = {}
+        events = []
+        for event in iter_activity(self._load(), before=cursor):
+            entity = event.get("entity")
+            if entity not in readable:
+                readable[entity] = policy.can_view(entity, user)
+            if not readable[entity]:
+                continue
+            if entity in ID_FIELDS and not visibility.visible(entity, event.get("id")):
+                continue
+            if len(events) == limit:
+                return events, events[-1]["seq"]
+            events.append(dict(event))
+        return events, None
@@ -27,4 +27,4 @@ class BrandContactService:
         return self._contacts.delete(BrandContactRepository.ID_FIELD, brand_contact_id)
 
     def get_contacts_for_brand(self, brand_id: int) -> list:
-        return self._contacts.find(lambda c: c.get("brand_id") == brand_id)
+        return self._contacts.find_by("brand_id", brand_id)
@@ -0,0 +1,28 @@
+from crm.persistence.json_store import JsonDataStore
+from crm.persistence.repositories import BrandRepository
+
+
+class BrandService:
+    def __init__(self, store: JsonDataStore):
+        self._store = store
+        self._brands = BrandRepository(store)
+
+    def list_brands(self) -> list:
+        return self._brands.all()
+
+    def get_brand(self, brand_id: int) -> dict | None:
+        return self._brands.get(brand_id)
+
+    def create_brand(self, name: str, industry: str = "", website: str = "", notes: str = "") -> dict:
+        return self._brands.add({
+            "name": name,
+            "industry": industry,
+            "website": website,
+            "notes": notes,
+        })
+
+    def update_brand(self, brand_id: int, **updates) -> dict | None:
+        return self._brands.update(BrandRepository.ID_FIELD, brand_id, updates)
+
+    def delete_brand(self, brand_id: int) -> bool:
+        return self._brands.delete(BrandRepository.ID_FIELD, brand_id)
@@ -10,6 +10,9 @@ class ContractService:
     def list_contracts(self) -> list:
         return self._contracts.all()
 
+    def get_contract(self, contract_id: int) -> dict | None:
+        return self._contracts.get(contract_id)
+
     def create_contract(
         self,
         deal_id: int,
@@ -31,3 +34,9 @@ class ContractService:
             "status": status,
             "is_approved": is_approved,
         })
+
+    def update_contract(self, contract_id: int, **updates) -> dict | None:
+        return self._contracts.update(ContractRepository.ID_FIELD, contract_id, updates)
+
+    def delete_contract(self, contract_id: int) -> bool:
+        return self._contracts.delete(ContractRepository.ID_FIELD, contract_id)
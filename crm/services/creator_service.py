@@ -27,7 +27,7 @@ class CreatorService:
         return self._creators.delete(CreatorRepository.ID_FIELD, creator_id)
 
     def get_creators_for_employee(self, employee_id: int) -> list:
-        return self._creators.find(lambda c: c.get("employee_id") == employee_id)
+        return self._creators.find_by("employee_id", employee_id)
 
     def _serialize_creator(self, creator: dict, person: dict | None = None) -> dict:
         name = ""
@@ -59,8 +59,7 @@ class CreatorService:
         creator = next((c for c in data.get("creators", []) if c.get("creator_id") == creator_id), None)
         if creator is None:
             return None
-        visible_ids = {item.get("creator_id") for item in policy.scope_creators(user, data.get("creators", []))}
-        if creator_id not in visible_ids:
+        if not policy.visibility_for(user).visible("creators", creator_id):
             return None
         person = next((p for p in data.get("persons", []) if p.get("person_id") == creator.get("person_id")), None)
         return self._serialize_creator(creator, person)
@@ -0,0 +1,192 @@
+"""Per-user cache of built dashboard view-models.
+
+``DashboardCache.get(user)`` returns the view-model ``DashboardService``
+would build for *user*, reusing a previous build when possible:
+
+- Entries are keyed by the user's scope (user and role) and remember the
+  data version they were built from (the store version plus today's date,
+  since expiry windows move at midnight).
+- A *fresh* entry (same version, younger than ``ttl`` seconds) is returned
+  as is.
+- A *stale* entry (the data changed or ``ttl`` passed, but it is younger
+  than ``ttl + stale_ttl``) is returned immediately while one background
+  refresh per key rebuilds it (stale-while-revalidate).
+- Anything else is rebuilt synchronously.
+
+At most ``max_entries`` users are kept; the least recently used entry is
+evicted first.  ``stats()`` reports hit / miss counts and rebuild times.
+
+``tasks()`` caches the Tasks page's needs-attention list the same way, as
+one entry shared by every user.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable
+
+from crm.persistence.json_store import store_version
+from crm.services.dashboard_service import DashboardService
+
+
+def _spawn_thread(target: Callable[[], None]) -> None:
+    threading.Thread(target=target, name="dashboard-refresh", daemon=True).start()
+
+
+class DashboardCache:
+    """LRU + TTL cache in front of ``DashboardService.build``.
+
+    *store* must be the backend store, not a per-request ``ScopedStore``:
+    refreshes run outside the request.  *spawn* starts a background
+    refresh (a daemon thread by default); *clock* is injectable for tests.
+    """
+
+    _TASKS_KEY = ("tasks",)
+
+    def __init__(
+        self,
+        store,
+        *,
+        max_entries: int = 256,
+        ttl: float = 30.0,
+        stale_ttl: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+        spawn: Callable[[Callable[[], None]], None] | None = None,
+    ):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self._store = store
+        self._service = DashboardService(store)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._spawn = spawn or _spawn_thread
+        self._lock = threading.Lock()
+        # key -> (view_model, version, built_at)
+        self._entries: OrderedDict[Any, tuple[dict, Any, float]] = OrderedDict()
+        self._refreshing: set = set()
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "refresh_failures": 0,
+            "rebuilds": 0,
+            "rebuild_time_total": 0.0,
+            "rebuild_time_max": 0.0,
+            "rebuild_time_last": 0.0,
+        }
+
+    @staticmethod
+    def _key(user: dict):
+        return (user.get("user_id"), user.get("role_id"))
+
+    def _version(self):
+        return (store_version(self._store), date.today())
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get(self, user: dict) -> dict:
+        """Return the dashboard view-model for *user*."""
+        return self._get(self._key(user), lambda: self._service.build(user))
+
+    def tasks(self) -> dict:
+        """Return the needs-attention task list (``DashboardService.build_tasks``).
+
+        One entry is shared by every user; like the dashboards it is
+        rebuilt when the data changes or the day rolls over.
+        """
+        return self._get(self._TASKS_KEY, self._service.build_tasks)
+
+    def _get(self, key, build: Callable[[], dict]) -> dict:
+        version = self._version()
+        now = self._clock()
+        schedule = False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                model, built_version, built_at = entry
+                age = now - built_at
+                if built_version == version and age < self.ttl:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return model
+                if age < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self._stats["stale_hits"] += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        schedule = True
+                else:
+                    entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+        if entry is None:
+            return self._rebuild(key, build)
+        if schedule:
+            self._spawn(lambda: self._refresh(key, build))
+        return entry[0]
+
+    def invalidate(self, user: dict | None = None) -> None:
+        """Drop the entry for *user*, or every entry when *user* is None."""
+        with self._lock:
+            if user is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(self._key(user), None)
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit / miss counters, rebuild times and the cache size."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update(size=len(self._entries), max_entries=self.max_entries)
+        rebuilds = stats["rebuilds"]
+        stats["rebuild_time_avg"] = stats["rebuild_time_total"] / rebuilds if rebuilds else 0.0
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["hits"] + stats["stale_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ------------------------------------------------------------------
+    # Rebuilding
+    # ------------------------------------------------------------------
+
+    def _rebuild(self, key, build: Callable[[], dict]) -> dict:
+        # Read the version before building so a write racing the build
+        # leaves the entry stale rather than wrongly fresh.
+        version = self._version()
+        started = time.perf_counter()
+        model = build()
+        elapsed = time.perf_counter() - started
+        built_at = self._clock()
+        with self._lock:
+            self._entries[key] = (model, version, built_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._stats["rebuilds"] += 1
+            self._stats["rebuild_time_total"] += elapsed
+            self._stats["rebuild_time_last"] = elapsed
+            if elapsed > self._stats["rebuild_time_max"]:
+                self._stats["rebuild_time_max"] = elapsed
+        return model
+
+    def _refresh(self, key, build: Callable[[], dict]) -> None:
+        try:
+            self._rebuild(key, build)
+        except Exception:
+            with self._lock:
+                self._stats["refresh_failures"] += 1
+        else:
+            with self._lock:
+                self._stats["refreshes"] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
@@ -1,19 +1,20 @@
 """Dashboard service – builds the view-model for the CRM command-centre dashboard."""
 from __future__ import annotations
 
-from datetime import date, datetime, timedelta
+import heapq
+import threading
+from collections import Counter
+from datetime import date
+from itertools import chain, islice
+from operator import itemgetter
+from typing import Iterator
 
+from crm.persistence.activity import ACTIVITY_KEY, recent_activity
+from crm.persistence.json_store import read_snapshot, store_version
+from crm.persistence.kpis import KPI_KEY
+from crm.services.expiry_index import ContractExpiryIndex
 
-def _parse_date(value: str | None) -> date | None:
-    """Parse an ISO-8601 date string (YYYY-MM-DD) or return None."""
-    if not value:
-        return None
-    for fmt in ("%Y-%m-%d", "%Y/%m/%d"):
-        try:
-            return datetime.strptime(value[:10], fmt).date()
-        except (ValueError, TypeError):
-            continue
-    return None
+_UNSYNCED = object()
 
 
 class DashboardService:
@@ -21,12 +22,34 @@ class DashboardService:
 
     Works with any store that exposes a ``load()`` method returning the
     standard data dict (json / sqlite / postgres backends all qualify).
+
+    ``build`` walks each collection once (``_scan``), collecting the counts,
+    the id → record indexes and the contracts that need attention; cards,
+    needs-attention items and recent activity are then rendered from that
+    scan.  Only the items that make it into the capped lists are formatted.
+
+    Card counts come from the materialized KPI counters (``_kpis``) and
+    recent activity from the activity feed (``_activity``) when the data has
+    them, falling back to the scan's own counts and the newest IDs.
+
+    Expiring contracts come from a ``ContractExpiryIndex`` the service keeps
+    across builds and resyncs only when the store's data version changes,
+    so long-lived instances parse each ``end_date`` once.
+
+    ``build_tasks`` gives the full, uncapped needs-attention list behind
+    the Tasks page, with a wider expiry window.
     """
 
     EXPIRY_WINDOW_DAYS = 30
+    TASKS_EXPIRY_WINDOW_DAYS = 90
+    NEEDS_ATTENTION_LIMIT = 10
+    RECENT_ACTIVITY_LIMIT = 8
 
     def __init__(self, store):
         self._store = store
+        self._expiry_index = ContractExpiryIndex()
+        self._expiry_version = _UNSYNCED
+        self._expiry_lock = threading.Lock()
 
     # ------------------------------------------------------------------
     # Public API
@@ -34,38 +57,95 @@ class DashboardService:
 
     def build(self, user: dict) -> dict:
         """Return the complete dashboard view-model for *user*."""
-        data = self._store.load()
-        today = date.today()
+        data = self._read()
+        scan = self._scan(data, date.today(), self.EXPIRY_WINDOW_DAYS)
 
         return {
-            "cards": self._build_cards(data, today),
-            "needs_attention": self._build_needs_attention(data, today),
+            "cards": self._build_cards(scan),
+            "needs_attention": self._build_needs_attention(scan),
             "quick_actions": self._build_quick_actions(),
-            "recent_activity": self._build_recent_activity(data),
+            "recent_activity": self._build_recent_activity(scan),
+        }
+
+    def build_tasks(self, today: date | None = None) -> dict:
+        """Return every needs-attention item (uncapped) and the count per type.
+
+        Contracts are flagged up to ``TASKS_EXPIRY_WINDOW_DAYS`` ahead.
+        """
+        today = today or date.today()
+        scan = self._scan(self._read(), today, self.TASKS_EXPIRY_WINDOW_DAYS)
+        items = list(self._iter_needs_attention(scan))
+        return {
+            "date": today,
+            "expiry_window_days": self.TASKS_EXPIRY_WINDOW_DAYS,
+            "items": items,
+            "counts": dict(Counter(item["type"] for item in items)),
         }
 
+    def _read(self):
+        """Return the snapshot, with the expiry index synced to it."""
+        # Read the version first: a write racing the read leaves the index
+        # marked out of date rather than wrongly current.
+        version = store_version(self._store)
+        data = read_snapshot(self._store)
+        with self._expiry_lock:
+            if version is None or version != self._expiry_version:
+                self._expiry_index.sync(data.get("contracts", []))
+                self._expiry_version = version
+        return data
+
     # ------------------------------------------------------------------
-    # Cards (summary KPIs)
+    # Single pass over the snapshot
     # ------------------------------------------------------------------
 
-    def _build_cards(self, data: dict, today: date) -> list[dict]:
+    def _scan(self, data, today: date, expiry_window: int) -> dict:
         creators = data.get("creators", [])
         brands = data.get("brands", [])
         deals = data.get("deals", [])
         contracts = data.get("contracts", [])
 
-        active_deals = [d for d in deals if d.get("is_active")]
-        expiring = [
-            c for c in contracts
-            if self._days_until(c.get("end_date"), today) is not None
-            and 0 <= self._days_until(c.get("end_date"), today) <= self.EXPIRY_WINDOW_DAYS
-        ]
+        deals_map: dict = {}
+        active_deals = 0
+        for d in deals:
+            # First record wins when ids repeat.
+            deals_map.setdefault(d.get("deal_id"), d)
+            if d.get("is_active"):
+                active_deals += 1
+
+        missing_dates: list[dict] = []
+        contract_deal_ids = set()
+        for c in contracts:
+            contract_deal_ids.add(c.get("deal_id"))
+            if not c.get("start_date") or not c.get("end_date"):
+                missing_dates.append(c)
 
+        kpis = data.get(KPI_KEY) or {}
+        return {
+            "data": data,
+            "persons": {p["person_id"]: p for p in data.get("persons", [])},
+            "brands": {b["brand_id"]: b for b in brands},
+            "creators": {c["creator_id"]: c for c in creators},
+            "deals": deals_map,
+            "creator_count": kpis.get("creators", len(creators)),
+            "brand_count": kpis.get("brands", len(brands)),
+            "active_deal_count": kpis.get("active_deals", active_deals),
+            "contract_count": kpis.get("contracts", len(contracts)),
+            "missing_dates": missing_dates,
+            "expiring": self._expiry_index.expiring(today, expiry_window),
+            "contract_deal_ids": contract_deal_ids,
+        }
+
+    # ------------------------------------------------------------------
+    # Cards (summary KPIs)
+    # ------------------------------------------------------------------
+
+    def _build_cards(self, scan: dict) -> list[dict]:
+        expiring = len(scan["expiring"])
         return [
             {
                 "id": "talent",
                 "label": "Talent / Creators",
-                "value": len(creators),
+                "value": scan["creator_count"],
                 "icon": "\U0001f31f",
                 "url": "/portal/creators",
                 "color_class": "card-stat--blue",
@@ -73,7 +153,7 @@ class DashboardService:
             {
                 "id": "brands",
                 "label": "Brands",
-                "value": len(brands),
+                "value": scan["brand_count"],
                 "icon": "\U0001f381",
                 "url": "/portal/brands",
                 "color_class": "card-stat--purple",
@@ -81,7 +161,7 @@ class DashboardService:
             {
                 "id": "active_deals",
                 "label": "Active Deals",
-                "value": len(active_deals),
+                "value": scan["active_deal_count"],
                 "icon": "\U0001f91d",
                 "url": "/portal/deals",
                 "color_class": "card-stat--green",
@@ -89,12 +169,12 @@ class DashboardService:
             {
                 "id": "contracts",
                 "label": "Contracts",
-                "value": len(contracts),
+                "value": scan["contract_count"],
                 "icon": "\U0001f4c4",
                 "url": "/portal/contracts",
                 "color_class": "card-stat--orange",
                 "secondary": (
-                    f"{len(expiring)} expiring soon"
+                    f"{expiring} expiring soon"
                     if expiring
                     else None
                 ),
@@ -105,46 +185,45 @@ class DashboardService:
     # Needs-attention items
     # ------------------------------------------------------------------
 
-    def _build_needs_attention(self, data: dict, today: date) -> list[dict]:
-        items: list[dict] = []
+    def _build_needs_attention(self, scan: dict) -> list[dict]:
+        # Cap to keep the list scannable; later checks only run if needed.
+        return list(islice(self._iter_needs_attention(scan), self.NEEDS_ATTENTION_LIMIT))
 
-        persons = {p["person_id"]: p for p in data.get("persons", [])}
-        brands_map = {b["brand_id"]: b for b in data.get("brands", [])}
-        creators_map = {c["creator_id"]: c for c in data.get("creators", [])}
-        deals = data.get("deals", [])
-        contracts = data.get("contracts", [])
+    def _iter_needs_attention(self, scan: dict) -> Iterator[dict]:
+        persons = scan["persons"]
+        brands_map = scan["brands"]
+        creators_map = scan["creators"]
+        deals_map = scan["deals"]
+        data = scan["data"]
 
         # Contracts with a missing start or end date
-        for c in contracts:
-            if not c.get("start_date") or not c.get("end_date"):
-                items.append({
-                    "type": "contract_missing_dates",
-                    "label": "Contract missing dates",
-                    "detail": f"Contract #{c['contract_id']} — start or end date not set",
-                    "url": "/portal/contracts",
-                })
-
-        # Contracts expiring within EXPIRY_WINDOW_DAYS
-        for c in contracts:
-            days = self._days_until(c.get("end_date"), today)
-            if days is not None and 0 <= days <= self.EXPIRY_WINDOW_DAYS:
-                deal = next((d for d in deals if d.get("deal_id") == c.get("deal_id")), None)
-                brand_name = ""
-                if deal:
-                    brand = brands_map.get(deal.get("brand_id"))
-                    if brand:
-                        brand_desc = brand.get("description") or f"Brand #{deal['brand_id']}"
-                        brand_name = f" ({brand_desc})"
-                items.append({
-                    "type": "contract_expiring",
-                    "label": "Contract expiring soon",
-                    "detail": f"Contract #{c['contract_id']}{brand_name} — ends in {days} day{'s' if days != 1 else ''}",
-                    "url": "/portal/contracts",
-                })
+        for c in scan["missing_dates"]:
+            yield {
+                "type": "contract_missing_dates",
+                "label": "Contract missing dates",
+                "detail": f"Contract #{c['contract_id']} — start or end date not set",
+                "url": "/portal/contracts",
+            }
+
+        # Contracts expiring within the window, soonest first
+        for c, days in scan["expiring"]:
+            deal = deals_map.get(c.get("deal_id"))
+            brand_name = ""
+            if deal:
+                brand = brands_map.get(deal.get("brand_id"))
+                if brand:
+                    brand_desc = brand.get("description") or f"Brand #{deal['brand_id']}"
+                    brand_name = f" ({brand_desc})"
+            yield {
+                "type": "contract_expiring",
+                "label": "Contract expiring soon",
+                "detail": f"Contract #{c['contract_id']}{brand_name} — ends in {days} day{'s' if days != 1 else ''}",
+                "url": "/portal/contracts",
+            }
 
         # Deals without any linked contract
-        contract_deal_ids = {c.get("deal_id") for c in contracts}
-        for d in deals:
+        contract_deal_ids = scan["contract_deal_ids"]
+        for d in data.get("deals", []):
             if d.get("deal_id") not in contract_deal_ids:
                 creator = creators_map.get(d.get("client_id"))
                 brand = brands_map.get(d.get("brand_id"))
@@ -156,40 +235,36 @@ class DashboardService:
                 detail = f"Deal #{d['deal_id']}"
                 if creator_label or brand_label:
                     detail += f" — {creator_label}" + (" × " + brand_label if brand_label else "")
-                items.append({
+                yield {
                     "type": "deal_no_contract",
                     "label": "Deal has no contract",
                     "detail": detail,
                     "url": "/portal/deals",
-                })
+                }
 
         # Creators (talent) missing email or phone
         for creator in data.get("creators", []):
             person = persons.get(creator.get("person_id"), {})
             if not person.get("email") and not person.get("phone"):
                 label = person.get("display_name") or person.get("full_name") or f"Creator #{creator['creator_id']}"
-                items.append({
+                yield {
                     "type": "creator_missing_contact",
                     "label": "Talent missing contact info",
                     "detail": f"{label} — no email or phone on record",
                     "url": "/portal/creators",
-                })
+                }
 
         # Brand contacts missing email
-        bc_persons = {p["person_id"]: p for p in data.get("persons", [])}
         for contact in data.get("brand_contacts", []):
-            person = bc_persons.get(contact.get("person_id"), {})
+            person = persons.get(contact.get("person_id"), {})
             if not person.get("email"):
                 label = person.get("display_name") or person.get("full_name") or f"Brand Contact #{contact['brand_contact_id']}"
-                items.append({
+                yield {
                     "type": "brand_contact_missing_email",
                     "label": "Brand contact missing email",
                     "detail": f"{label} — no email on record",
                     "url": "/portal/brand_contacts",
-                })
-
-        # Cap to keep the list scannable
-        return items[:10]
+                }
 
     # ------------------------------------------------------------------
     # Quick actions
@@ -205,62 +280,53 @@ class DashboardService:
         ]
 
     # ------------------------------------------------------------------
-    # Recent activity (created-order; most-recent first)
+    # Recent activity (most-recent first)
     # ------------------------------------------------------------------
 
-    def _build_recent_activity(self, data: dict) -> list[dict]:
-        persons = {p["person_id"]: p for p in data.get("persons", [])}
-        items: list[dict] = []
-
-        for creator in data.get("creators", []):
-            person = persons.get(creator.get("person_id"), {})
-            label = person.get("display_name") or person.get("full_name") or f"Creator #{creator['creator_id']}"
-            items.append({
-                "type": "Creator",
-                "label": label,
-                "url": "/portal/creators",
-                "sort_key": creator.get("creator_id", 0),
-            })
-
-        for brand in data.get("brands", []):
-            items.append({
-                "type": "Brand",
-                "label": brand.get("description") or brand.get("name") or f"Brand #{brand['brand_id']}",
-                "url": "/portal/brands",
-                "sort_key": brand.get("brand_id", 0),
-            })
-
-        for deal in data.get("deals", []):
-            items.append({
-                "type": "Deal",
-                "label": f"Deal #{deal['deal_id']}",
-                "url": "/portal/deals",
-                "sort_key": deal.get("deal_id", 0),
-            })
-
-        for contract in data.get("contracts", []):
-            items.append({
-                "type": "Contract",
-                "label": f"Contract #{contract['contract_id']}",
-                "url": "/portal/contracts",
-                "sort_key": contract.get("contract_id", 0),
-            })
-
-        # Sort by descending id (proxy for "most recently created")
-        items.sort(key=lambda x: x.get("sort_key", 0), reverse=True)
-        # Remove internal sort key before returning
-        for item in items:
-            item.pop("sort_key", None)
-        return items[:8]
-
-    # ------------------------------------------------------------------
-    # Helpers
-    # ------------------------------------------------------------------
+    # feed entity -> (badge, list page)
+    _ACTIVITY_KINDS = {
+        "creators": ("Creator", "/portal/creators"),
+        "brands": ("Brand", "/portal/brands"),
+        "deals": ("Deal", "/portal/deals"),
+        "contracts": ("Contract", "/portal/contracts"),
+    }
+
+    def _build_recent_activity(self, scan: dict) -> list[dict]:
+        data = scan["data"]
+        if data.get(ACTIVITY_KEY) is not None:
+            # Read the newest events straight off the activity feed.
+            items = []
+            for event in recent_activity(data, self.RECENT_ACTIVITY_LIMIT):
+                kind, url = self._ACTIVITY_KINDS.get(event.get("entity"), ("Record", "/portal/dashboard"))
+                items.append({
+                    "type": kind,
+                    "label": event.get("label", ""),
+                    "url": url,
+                    "action": event.get("action"),
+                    "at": event.get("at"),
+                })
+            return items
+        # Data without a feed yet: newest records by ID.
+        candidates = chain(
+            (("Creator", c.get("creator_id", 0), c) for c in data.get("creators", [])),
+            (("Brand", b.get("brand_id", 0), b) for b in data.get("brands", [])),
+            (("Deal", d.get("deal_id", 0), d) for d in data.get("deals", [])),
+            (("Contract", c.get("contract_id", 0), c) for c in data.get("contracts", [])),
+        )
+        # Descending id (proxy for "most recently created"); nlargest keeps
+        # the input order for ties, like a stable reverse sort.
+        newest = heapq.nlargest(self.RECENT_ACTIVITY_LIMIT, candidates, key=itemgetter(1))
+        return [self._activity_item(kind, record, scan["persons"]) for kind, _, record in newest]
 
     @staticmethod
-    def _days_until(date_str: str | None, today: date) -> int | None:
-        """Return the number of days until *date_str*, or None if unparseable."""
-        d = _parse_date(date_str)
-        if d is None:
-            return None
-        return (d - today).days
+    def _activity_item(kind: str, record: dict, persons: dict) -> dict:
+        if kind == "Creator":
+            person = persons.get(record.get("person_id"), {})
+            label = person.get("display_name") or person.get("full_name") or f"Creator #{record['creator_id']}"
+            return {"type": "Creator", "label": label, "url": "/portal/creators"}
+        if kind == "Brand":
+            label = record.get("description") or record.get("name") or f"Brand #{record['brand_id']}"
+            return {"type": "Brand", "label": label, "url": "/portal/brands"}
+        if kind == "Deal":
+            return {"type": "Deal", "label": f"Deal #{record['deal_id']}", "url": "/portal/deals"}
+        return {"type": "Contract", "label": f"Contract #{record['contract_id']}", "url": "/portal/contracts"}
@@ -10,6 +10,9 @@ class DealService:
     def list_deals(self) -> list:
         return self._deals.all()
 
+    def get_deal(self, deal_id: int) -> dict | None:
+        return self._deals.get(deal_id)
+
     def create_deal(
         self,
         client_id: int,
@@ -27,3 +30,9 @@ class DealService:
             "is_active": is_active,
             "is_successful": is_successful,
         })
+
+    def update_deal(self, deal_id: int, **updates) -> dict | None:
+        return self._deals.update(DealRepository.ID_FIELD, deal_id, updates)
+
+    def delete_deal(self, deal_id: int) -> bool:
+        return self._deals.delete(DealRepository.ID_FIELD, deal_id)
@@ -42,4 +42,4 @@ class EmployeeService:
         return self._employees.delete(EmployeeRepository.ID_FIELD, employee_id)
 
     def get_direct_reports(self, manager_employee_id: int) -> list:
-        return self._employees.find(lambda e: e.get("manager_id") == manager_employee_id)
+        return self._employees.find_by("manager_id", manager_employee_id)
@@ -0,0 +1,175 @@
+"""Contracts indexed by their parsed ``end_date``.
+
+``ContractExpiryIndex`` keeps the contracts with a parseable end date in a
+list sorted by that date, so "which contracts end between *a* and *b*?" is
+two bisections plus the matches (O(log n + k)) instead of a parse of every
+``end_date`` string.
+
+- ``upsert`` / ``remove`` maintain the order one contract at a time.
+- ``sync(contracts)`` applies the difference between the index and a fresh
+  contract list through those operations; only contracts whose
+  ``end_date`` string changed are re-parsed and moved.
+
+Contracts without an ID or without a parseable end date are not indexed.
+"""
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, Iterable, Mapping
+
+
+@lru_cache(maxsize=65536)
+def parse_date(value: str | None) -> date | None:
+    """Parse an ISO-8601 date string (YYYY-MM-DD) or return None.
+
+    Results are memoized, so each distinct date string is parsed once.
+    """
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value[:10])
+    except (ValueError, TypeError):
+        pass
+    for fmt in ("%Y-%m-%d", "%Y/%m/%d"):
+        try:
+            return datetime.strptime(value[:10], fmt).date()
+        except (ValueError, TypeError):
+            continue
+    return None
+
+
+class ContractExpiryIndex:
+    """Sorted (end date, contract) index with range queries."""
+
+    # Below this many moves, per-contract insertion beats a full re-sort.
+    _BULK_THRESHOLD = 64
+
+    def __init__(self, contracts: Iterable[Mapping] = ()):
+        self._lock = threading.RLock()
+        # Parallel lists sorted by end date; ties keep insertion order.
+        self._dates: list[date] = []
+        self._ids: list[Any] = []
+        # contract_id -> (raw end_date, parsed end date or None)
+        self._end_dates: dict[Any, tuple[Any, date | None]] = {}
+        self._records: dict[Any, Mapping] = {}
+        self.sync(contracts)
+
+    def __len__(self) -> int:
+        return len(self._dates)
+
+    def __contains__(self, contract_id) -> bool:
+        return self._end_dates.get(contract_id, (None, None))[1] is not None
+
+    # ------------------------------------------------------------------ #
+    # Queries                                                              #
+    # ------------------------------------------------------------------ #
+
+    def ending_between(self, start: date, end: date) -> list[tuple[Mapping, date]]:
+        """Return ``(contract, end_date)`` for contracts ending in [*start*, *end*],
+        soonest first."""
+        with self._lock:
+            lo = bisect_left(self._dates, start)
+            hi = bisect_right(self._dates, end, lo)
+            return [
+                (self._records[contract_id], end_date)
+                for end_date, contract_id in zip(self._dates[lo:hi], self._ids[lo:hi])
+            ]
+
+    def expiring(self, today: date, days: int) -> list[tuple[Mapping, int]]:
+        """Return ``(contract, days_left)`` for contracts ending within *days* of *today*."""
+        return [
+            (contract, (end_date - today).days)
+            for contract, end_date in self.ending_between(today, today + timedelta(days=days))
+        ]
+
+    # ------------------------------------------------------------------ #
+    # Incremental maintenance                                              #
+    # ------------------------------------------------------------------ #
+
+    def _unlink(self, contract_id, end_date: date) -> None:
+        lo = bisect_left(self._dates, end_date)
+        hi = bisect_right(self._dates, end_date, lo)
+        position = self._ids.index(contract_id, lo, hi)
+        del self._dates[position]
+        del self._ids[position]
+
+    def upsert(self, contract: Mapping) -> None:
+        """Index a new contract or move an existing one to its new end date."""
+        contract_id = contract.get("contract_id")
+        if contract_id is None:
+            return
+        raw = contract.get("end_date")
+        with self._lock:
+            self._records[contract_id] = contract
+            previous = self._end_dates.get(contract_id)
+            if previous is not None and previous[0] == raw:
+                return
+            if previous is not None and previous[1] is not None:
+                self._unlink(contract_id, previous[1])
+            parsed = parse_date(raw)
+            self._end_dates[contract_id] = (raw, parsed)
+            if parsed is not None:
+                position = bisect_right(self._dates, parsed)
+                self._dates.insert(position, parsed)
+                self._ids.insert(position, contract_id)
+
+    def remove(self, contract_id) -> None:
+        with self._lock:
+            previous = self._end_dates.pop(contract_id, None)
+            self._records.pop(contract_id, None)
+            if previous is not None and previous[1] is not None:
+                self._unlink(contract_id, previous[1])
+
+    def sync(self, contracts: Iterable[Mapping]) -> int:
+        """Bring the index in line with *contracts*; return how many moved.
+
+        Every contract's record reference is refreshed, but only contracts
+        that were added, removed or had their ``end_date`` changed count
+        as moved (and are re-parsed).  When most of the index moves (the
+        first sync, a bulk import) the sorted lists are rebuilt with one
+        sort instead of one insertion per contract.
+        """
+        wanted: dict[Any, Mapping] = {}
+        for contract in contracts:
+            contract_id = contract.get("contract_id")
+            if contract_id is not None:
+                # First record wins when ids repeat.
+                wanted.setdefault(contract_id, contract)
+        with self._lock:
+            removed = [c for c in self._end_dates if c not in wanted]
+            changed = []
+            for contract_id, contract in wanted.items():
+                previous = self._end_dates.get(contract_id)
+                if previous is not None and previous[0] == contract.get("end_date"):
+                    self._records[contract_id] = contract
+                else:
+                    changed.append(contract)
+            moved = len(removed) + len(changed)
+            if moved > self._BULK_THRESHOLD and moved * 4 > len(wanted):
+                self._rebuild(wanted)
+                return moved
+            for contract_id in removed:
+                self.remove(contract_id)
+            for contract in changed:
+                self.upsert(contract)
+        return moved
+
+    def _rebuild(self, contracts: Mapping[Any, Mapping]) -> None:
+        end_dates = {}
+        for contract_id, contract in contracts.items():
+            raw = contract.get("end_date")
+            previous = self._end_dates.get(contract_id)
+            end_dates[contract_id] = previous if previous is not None and previous[0] == raw else (raw, parse_date(raw))
+        # sorted() is stable, so ties keep the contract list's order.
+        entries = sorted(
+            ((parsed, contract_id) for contract_id, (_raw, parsed) in end_dates.items() if parsed is not None),
+            key=itemgetter(0),
+        )
+        self._dates = [parsed for parsed, _contract_id in entries]
+        self._ids = [contract_id for _parsed, contract_id in entries]
+        self._end_dates = end_dates
+        self._records = dict(contracts)
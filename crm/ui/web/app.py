@@ -1,23 +1,28 @@
+import hashlib
 import os
 import sys
+from functools import lru_cache
 from pathlib import Path
 
 # Add project root to Python path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
-from flask import Flask
+from flask import Flask, g, has_request_context
 from dotenv import load_dotenv
 
 from crm.persistence.json_store import JsonDataStore
 from crm.persistence.migration import run_migration
+from crm.persistence.unit_of_work import ScopedStore
 from crm.services.auth_service import AuthService
 from crm.services.employee_service import EmployeeService
 from crm.services.creator_service import CreatorService
 from crm.services.brand_contact_service import BrandContactService
+from crm.services.brand_service import BrandService
 from crm.services.person_service import PersonService
 from crm.services.deal_service import DealService
 from crm.services.contract_service import ContractService
 from crm.services.api_v1_service import ApiV1Service
+from crm.services.dashboard_cache import DashboardCache
 from crm.policies.access_control import AccessPolicy
 
 load_dotenv()
@@ -38,6 +43,28 @@ def _require_env(name: str) -> str:
     return value
 
 
+@lru_cache(maxsize=None)
+def _source_digest() -> str:
+    """Hash the package's code and templates (the same in every worker)."""
+    digest = hashlib.blake2b(digest_size=8)
+    root = Path(__file__).resolve().parents[2]
+    for path in sorted(root.rglob("*")):
+        if path.suffix in {".py", ".html"} and "__pycache__" not in path.parts:
+            digest.update(str(path.relative_to(root)).encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _build_version() -> str:
+    """Identify the deployed build: ``CRM_BUILD_VERSION``, else a source digest."""
+    return os.environ.get("CRM_BUILD_VERSION", "").strip() or _source_digest()
+
+
+def _request_scope():
+    """Namespace holding the per-request unit of work (None outside requests)."""
+    return g if has_request_context() else None
+
+
 def create_app(data_path: str | None = None, storage_backend: str | None = None) -> Flask:
     """Flask application factory.
 
@@ -47,6 +74,10 @@ def create_app(data_path: str | None = None, storage_backend: str | None = None)
       CRM_STORAGE_BACKEND=postgres  – uses PostgreSQL (requires DATABASE_URL)
       DATABASE_URL=...              – connection URL for sqlite or postgres backends
       CRM_AUTO_IMPORT=1             – auto-import data.json into the DB on startup
+      CRM_JSON_JOURNAL=1            – journal JSON writes to data.json.wal
+      CRM_PG_POOL_MIN_SIZE / CRM_PG_POOL_MAX_SIZE / CRM_PG_POOL_TIMEOUT /
+      CRM_PG_POOL_IDLE_TIMEOUT      – PostgreSQL connection pool settings
+      CRM_BUILD_VERSION=...         – build identifier mixed into ETags
     """
     app = Flask(
         __name__,
@@ -81,7 +112,13 @@ def create_app(data_path: str | None = None, storage_backend: str | None = None)
 
     if backend == "postgres":
         from crm.persistence.postgres_store import PostgresDataStore
-        store = PostgresDataStore(database_url)
+        store = PostgresDataStore(
+            database_url,
+            pool_min_size=int(os.environ.get("CRM_PG_POOL_MIN_SIZE", "1")),
+            pool_max_size=int(os.environ.get("CRM_PG_POOL_MAX_SIZE", "10")),
+            pool_timeout=float(os.environ.get("CRM_PG_POOL_TIMEOUT", "30")),
+            pool_idle_timeout=float(os.environ.get("CRM_PG_POOL_IDLE_TIMEOUT", "300")),
+        )
         store.ensure_schema()
 
         # Optional automatic import from data.json at startup
@@ -104,11 +141,15 @@ def create_app(data_path: str | None = None, storage_backend: str | None = None)
                 import json
                 from crm.persistence.migration import migrate, needs_migration
                 from crm.persistence.json_store import JsonDataStore as _JDS
+                from crm.persistence.activity import ACTIVITY_KEY, seed_activity
+                from crm.persistence.kpis import KPI_KEY, count_kpis
                 if os.path.exists(resolved_path):
                     with open(resolved_path) as f:
                         raw = json.load(f)
                     seeded = migrate(raw) if needs_migration(raw) else raw
                     seeded.setdefault("access_control_matrix", _JDS.DEFAULT_ACM)
+                    seeded[KPI_KEY] = count_kpis(seeded)
+                    seeded.setdefault(ACTIVITY_KEY, seed_activity(seeded))
                     store.save(seeded)
                     print("[app] Auto-seeded SQLite DB from data.json.")
 
@@ -116,21 +157,57 @@ def create_app(data_path: str | None = None, storage_backend: str | None = None)
         backend = "json"
         # Run schema migration once (no-op if already migrated)
         run_migration(resolved_path)
-        store = JsonDataStore(resolved_path)
+        # Cached snapshots: repeated reads within and across requests cost a
+        # stat() until the file actually changes.
+        store = JsonDataStore(
+            resolved_path,
+            cache=True,
+            journal=_is_truthy(os.environ.get("CRM_JSON_JOURNAL", "0")),
+        )
+
+    # Built dashboards are shared across requests, so the cache reads the
+    # backend store directly rather than the per-request unit of work.
+    dashboard_cache = DashboardCache(
+        store,
+        max_entries=int(os.environ.get("CRM_DASHBOARD_CACHE_SIZE", "256")),
+        ttl=float(os.environ.get("CRM_DASHBOARD_CACHE_TTL", "30")),
+        stale_ttl=float(os.environ.get("CRM_DASHBOARD_CACHE_STALE_TTL", "300")),
+    )
+
+    # Every request gets its own unit of work: the store is loaded at most
+    # once per request and staged writes are flushed in a single save.
+    store = ScopedStore(store, _request_scope)
+
+    @app.after_request
+    def commit_unit_of_work(response):
+        # Only successful requests and redirects persist their writes; a
+        # commit that fails raises, so the client gets a 500 instead.
+        if response.status_code < 400:
+            store.commit()
+        else:
+            store.rollback()
+        return response
+
+    @app.teardown_request
+    def discard_unit_of_work(exc):
+        store.rollback()
 
     # Attach services to app context so routes can reach them via current_app
     app.config["store"] = store
     app.config["storage_backend"] = backend
     app.config["data_path"] = resolved_path
+    app.config["BUILD_VERSION"] = _build_version()
     app.config["auth_service"] = AuthService(store)
     app.config["employee_service"] = EmployeeService(store)
     app.config["creator_service"] = CreatorService(store)
     app.config["brand_contact_service"] = BrandContactService(store)
+    app.config["brand_service"] = BrandService(store)
     app.config["person_service"] = PersonService(store)
     app.config["deal_service"] = DealService(store)
     app.config["contract_service"] = ContractService(store)
     app.config["api_v1_service"] = ApiV1Service(store)
-    app.config["access_policy"] = AccessPolicy(store)
+    app.config["access_policy"] = AccessPolicy(store, _request_scope)
+    app.config["dashboard_cache"] = dashboard_cache
 
     # Register blueprints
     from crm.ui.web.routes.auth_routes import auth_bp
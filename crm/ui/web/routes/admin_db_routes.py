@@ -47,6 +47,9 @@ def db_dashboard():
         "is_db_backend": backend in ("postgres", "sqlite"),
         "active_page": "admin_db",
     }
+    dashboard_cache = current_app.config.get("dashboard_cache")
+    if dashboard_cache is not None:
+        ctx["dashboard_cache_stats"] = dashboard_cache.stats()
 
     if backend in ("postgres", "sqlite"):
         ok, status_msg = store.check_connectivity()
@@ -108,6 +111,7 @@ def db_dashboard():
             if backend == "postgres":
                 from crm.persistence.postgres_import import get_last_import_timestamp
                 ctx["last_import_at"] = get_last_import_timestamp(store)
+                ctx["pool_stats"] = store.pool_stats()
             else:
                 ctx["last_import_at"] = None
 
@@ -140,6 +144,8 @@ def db_import():
         import os
         from crm.persistence.migration import migrate, needs_migration
         from crm.persistence.json_store import JsonDataStore
+        from crm.persistence.activity import ACTIVITY_KEY, seed_activity
+        from crm.persistence.kpis import KPI_KEY, count_kpis
 
         existing = store.load()
         if existing.get("roles"):
@@ -152,6 +158,8 @@ def db_import():
                     raw = _json.load(f)
                 seeded = migrate(raw) if needs_migration(raw) else raw
                 seeded.setdefault("access_control_matrix", JsonDataStore.DEFAULT_ACM)
+                seeded[KPI_KEY] = count_kpis(seeded)
+                seeded.setdefault(ACTIVITY_KEY, seed_activity(seeded))
                 store.save(seeded)
                 flash("Import completed successfully.", "success")
             except Exception as exc:
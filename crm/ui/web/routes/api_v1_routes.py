@@ -1,9 +1,20 @@
 """Versioned API routes for JSON clients."""
+import csv
+import io
+import json
 from functools import wraps
+from typing import Iterable, Iterator
 
-from flask import Blueprint, current_app, jsonify
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
 
-from crm.ui.web.routes.helpers import get_current_user
+from crm.policies.access_control import PERMISSION_SOURCES
+from crm.services.api_v1_service import (
+    DEFAULT_PAGE_SIZE,
+    EXPORT_COLUMNS,
+    MAX_BATCH_REQUESTS,
+    MAX_PAGE_SIZE,
+)
+from crm.ui.web.routes.helpers import conditional_get, get_current_user
 
 
 api_v1_bp = Blueprint("api_v1", __name__, url_prefix="/api/v1")
@@ -19,17 +30,71 @@ def api_login_required(f):
     return decorated
 
 
+# Query arguments of list endpoints that are not filters.
+_PAGE_ARGS = frozenset({"limit", "cursor", "sort", "fields", "expand", "format"})
+
+# Streamed responses are sent in pieces of about this many characters.
+_STREAM_BUFFER = 64 * 1024
+
+
+def _filter_args() -> list[tuple[str, str]]:
+    """Return the ``(name, value)`` filter arguments (``field[__op]=value``)."""
+    return [(name, value) for name, value in request.args.items(multi=True) if name not in _PAGE_ARGS]
+
+
+def _list_arg(name: str) -> list[str]:
+    """Parse a comma-separated, repeatable query argument into its values."""
+    return [
+        part.strip()
+        for value in request.args.getlist(name)
+        for part in value.split(",")
+        if part.strip()
+    ]
+
+
+def _expand_arg() -> list[str]:
+    """Parse ``?expand=person,deals`` into option names."""
+    return _list_arg("expand")
+
+
+def _sources(entity: str):
+    """Return a callable naming the collections a response about *entity*
+    (with the request's ``?expand=``) is built from."""
+    return lambda: current_app.config["api_v1_service"].sources_for(entity, _expand_arg())
+
+
 def _json_list(entity: str, response_key: str):
     @api_v1_bp.get(f"/{entity}", endpoint=f"{entity}_list")
     @api_login_required
+    @conditional_get(_sources(entity))
     def list_view():
+        """One page: ``?limit=``, ``?cursor=``, ``?sort=[-]field``, ``?fields=``,
+        ``?expand=``; any other argument is a filter (``field[__op]=value``)."""
+        try:
+            limit = int(request.args.get("limit", DEFAULT_PAGE_SIZE))
+        except ValueError:
+            return jsonify({"error": "limit must be an integer"}), 400
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            return jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400
         user = get_current_user()
         api_svc = current_app.config["api_v1_service"]
         policy = current_app.config["access_policy"]
-        items = api_svc.list_for_user(entity, user, policy)
-        if items is None:
+        try:
+            page = api_svc.page_for_user(
+                entity, user, policy,
+                limit=limit,
+                cursor=request.args.get("cursor") or None,
+                sort=request.args.get("sort") or None,
+                fields=_list_arg("fields"),
+                expand=_expand_arg(),
+                filters=_filter_args(),
+            )
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        if page is None:
             return jsonify({"error": "Forbidden"}), 403
-        return jsonify({response_key: items})
+        items, next_cursor = page
+        return jsonify({response_key: items, "next_cursor": next_cursor})
 
     list_view.__name__ = f"list_{entity}"
     return list_view
@@ -38,11 +103,15 @@ def _json_list(entity: str, response_key: str):
 def _json_detail(entity: str, response_key: str):
     @api_v1_bp.get(f"/{entity}/<int:item_id>", endpoint=f"{entity}_detail")
     @api_login_required
+    @conditional_get(_sources(entity))
     def detail_view(item_id: int):
         user = get_current_user()
         api_svc = current_app.config["api_v1_service"]
         policy = current_app.config["access_policy"]
-        item = api_svc.get_for_user(entity, item_id, user, policy)
+        try:
+            item = api_svc.get_for_user(entity, item_id, user, policy, _expand_arg())
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
         if item is None:
             return jsonify({"error": "Not found"}), 404
         return jsonify({response_key[:-1] if response_key.endswith("s") else response_key: item})
@@ -51,6 +120,94 @@ def _json_detail(entity: str, response_key: str):
     return detail_view
 
 
+def _buffered(pieces: Iterable[str]) -> Iterator[str]:
+    """Join small *pieces* into ``_STREAM_BUFFER``-sized chunks."""
+    buffer: list[str] = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= _STREAM_BUFFER:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def _ndjson_lines(items: Iterable[dict]) -> Iterator[str]:
+    for item in items:
+        yield json.dumps(item, separators=(",", ":")) + "\n"
+
+
+def _csv_cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (dict, list, tuple)):
+        return json.dumps(value, separators=(",", ":"))
+    return value
+
+
+def _csv_lines(items: Iterable[dict], columns: list[str]) -> Iterator[str]:
+    """Render *items* as CSV, one column per name in *columns*."""
+    out = io.StringIO()
+    writer = csv.writer(out)
+
+    def line(row) -> str:
+        out.seek(0)
+        out.truncate()
+        writer.writerow(row)
+        return out.getvalue()
+
+    yield line(columns)
+    for item in items:
+        yield line([_csv_cell(item.get(c)) for c in columns])
+
+
+def _json_export(entity: str):
+    @api_v1_bp.get(f"/{entity}/export", endpoint=f"{entity}_export")
+    @api_login_required
+    @conditional_get(_sources(entity))
+    def export_view():
+        """Stream the whole (scoped) collection: ``?format=ndjson|csv``, plus
+        ``?sort=``, ``?fields=``, ``?expand=`` and filters as on the list."""
+        fmt = request.args.get("format", "ndjson")
+        if fmt not in ("ndjson", "csv"):
+            return jsonify({"error": "format must be ndjson or csv"}), 400
+        if "limit" in request.args or "cursor" in request.args:
+            return jsonify({"error": "export returns every record; use filters instead of limit or cursor"}), 400
+        user = get_current_user()
+        api_svc = current_app.config["api_v1_service"]
+        policy = current_app.config["access_policy"]
+        fields = _list_arg("fields")
+        expand = _expand_arg()
+        try:
+            items = api_svc.export_for_user(
+                entity, user, policy,
+                sort=request.args.get("sort") or None,
+                fields=fields,
+                expand=expand,
+                filters=_filter_args(),
+            )
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        if items is None:
+            return jsonify({"error": "Forbidden"}), 403
+        if fmt == "csv":
+            # A fixed header: records need not all carry the same keys.
+            columns = list(dict.fromkeys(["id", *fields, *expand] if fields else [*EXPORT_COLUMNS[entity], *expand]))
+            body, mimetype = _csv_lines(items, columns), "text/csv"
+        else:
+            body, mimetype = _ndjson_lines(items), "application/x-ndjson"
+        response = Response(stream_with_context(_buffered(body)), mimetype=mimetype)
+        response.headers["Content-Disposition"] = f"attachment; filename={entity}.{fmt}"
+        return response
+
+    export_view.__name__ = f"export_{entity}"
+    return export_view
+
+
 ENTITY_SPECS = [
     ("roles", "roles"),
     ("persons", "persons"),
@@ -67,15 +224,71 @@ ENTITY_SPECS = [
 for entity, response_key in ENTITY_SPECS:
     _json_list(entity, response_key)
     _json_detail(entity, response_key)
+    _json_export(entity)
+
+
+@api_v1_bp.get("/permissions")
+@api_login_required
+@conditional_get(PERMISSION_SOURCES)
+def get_permissions():
+    user = get_current_user()
+    perms = current_app.config["access_policy"].permissions_for(user)
+    return jsonify({"role": perms.role_name, "permissions": perms.as_dict()})
+
+
+@api_v1_bp.post("/batch")
+@api_login_required
+def batch():
+    """Several fetches in one round trip, answered from one snapshot.
+
+    Body: ``{"requests": [{"entity": "deals", "ids": [1, 2]},
+    {"entity": "contracts", "filters": {"deal_id__in": "1,2"}}, ...]}``.
+    """
+    body = request.get_json(silent=True)
+    requests = body.get("requests") if isinstance(body, dict) else None
+    if not isinstance(requests, list) or not all(isinstance(r, dict) for r in requests):
+        return jsonify({"error": "body must be {\"requests\": [{...}, ...]}"}), 400
+    if len(requests) > MAX_BATCH_REQUESTS:
+        return jsonify({"error": f"at most {MAX_BATCH_REQUESTS} requests per batch"}), 400
+    user = get_current_user()
+    api_svc = current_app.config["api_v1_service"]
+    policy = current_app.config["access_policy"]
+    return jsonify({"responses": api_svc.batch_for_user(user, policy, requests)})
+
+
+@api_v1_bp.get("/activity")
+@api_login_required
+def list_activity():
+    """Recent record writes, newest first: ``?limit=`` (1-100) and ``?cursor=``."""
+    try:
+        limit = int(request.args.get("limit", 20))
+        cursor = request.args.get("cursor")
+        cursor = int(cursor) if cursor else None
+    except ValueError:
+        return jsonify({"error": "limit and cursor must be integers"}), 400
+    if not 1 <= limit <= 100:
+        return jsonify({"error": "limit must be between 1 and 100"}), 400
+    user = get_current_user()
+    api_svc = current_app.config["api_v1_service"]
+    policy = current_app.config["access_policy"]
+    events, next_cursor = api_svc.activity_for_user(user, policy, limit, cursor)
+    return jsonify({
+        "activity": events,
+        "next_cursor": str(next_cursor) if next_cursor is not None else None,
+    })
 
 
 @api_v1_bp.get("/items")
 @api_login_required
+@conditional_get(_sources("creators"))
 def list_items():
     user = get_current_user()
     api_svc = current_app.config["api_v1_service"]
     policy = current_app.config["access_policy"]
-    items = api_svc.list_for_user("creators", user, policy)
+    try:
+        items = api_svc.list_for_user("creators", user, policy, _expand_arg())
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
     if items is None:
         return jsonify({"error": "Forbidden"}), 403
     return jsonify({"items": items})
@@ -83,11 +296,15 @@ def list_items():
 
 @api_v1_bp.get("/items/<int:item_id>")
 @api_login_required
+@conditional_get(_sources("creators"))
 def get_item(item_id: int):
     user = get_current_user()
     api_svc = current_app.config["api_v1_service"]
     policy = current_app.config["access_policy"]
-    item = api_svc.get_for_user("creators", item_id, user, policy)
+    try:
+        item = api_svc.get_for_user("creators", item_id, user, policy, _expand_arg())
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
     if item is None:
         return jsonify({"error": "Not found"}), 404
     return jsonify({"item": item})
\ No newline at end of file
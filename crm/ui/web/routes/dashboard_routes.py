@@ -2,7 +2,6 @@
 from flask import Blueprint, render_template, current_app
 
 from crm.ui.web.routes.helpers import login_required, get_current_user, portal_context
-from crm.services.dashboard_service import DashboardService
 
 dashboard_bp = Blueprint("dashboard", __name__, url_prefix="/portal")
 
@@ -14,8 +13,6 @@ def dashboard():
     ctx = portal_context(user)
     ctx["active_page"] = "home"
 
-    store = current_app.config["store"]
-    svc = DashboardService(store)
-    ctx["dash"] = svc.build(user)
+    ctx["dash"] = current_app.config["dashboard_cache"].get(user)
 
     return render_template("dashboard.html", **ctx)
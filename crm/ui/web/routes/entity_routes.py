@@ -4,16 +4,27 @@ from flask import (
     flash, current_app, abort
 )
 
-from crm.ui.web.routes.helpers import login_required, get_current_user, portal_context, get_person
+from crm.policies.access_control import PERMISSION_SOURCES
+from crm.policies.visibility import SCOPE_SOURCES
+from crm.ui.web.routes.helpers import (
+    conditional_get, login_required, get_current_user, portal_context, get_person
+)
 
 entity_bp = Blueprint("entity", __name__, url_prefix="/portal")
 
 
+def _page_sources(entity: str, *shown: str) -> tuple[str, ...]:
+    """Return the collections a list page is built from: *entity*, its
+    visibility scope, the *shown* related collections and what every portal
+    page shows (the user's person and permissions)."""
+    return (entity, *shown, *SCOPE_SOURCES.get(entity, ()), "persons", *PERMISSION_SOURCES)
+
+
 # ---------------------------------------------------------------------------
 # Persons (helper – used by create flows)
 # ---------------------------------------------------------------------------
 
-def _handle_person_form(f, store, person_svc) -> int:
+def _handle_person_form(f, person_svc) -> int:
     """Parse person form fields and return a valid person_id."""
     mode = f.get("person_mode")
     if mode not in {"existing", "new"}:
@@ -21,11 +32,8 @@ def _handle_person_form(f, store, person_svc) -> int:
         mode = "existing" if f.get("person_id") else "new"
     if mode == "existing":
         pid = int(f.get("person_id", 0) or 0)
-        if pid:
-            data = store.load()
-            exists = next((p for p in data.get("persons", []) if p["person_id"] == pid), None)
-            if exists:
-                return pid
+        if pid and person_svc.get_person(pid):
+            return pid
     person = person_svc.create_person(
         first_name=f.get("first_name", ""),
         last_name=f.get("last_name", ""),
@@ -46,6 +54,7 @@ def _handle_person_form(f, store, person_svc) -> int:
 
 @entity_bp.route("/employees")
 @login_required
+@conditional_get(_page_sources("employees"), shows_flashes=True)
 def employees():
     user = get_current_user()
     policy = current_app.config["access_policy"]
@@ -65,8 +74,8 @@ def employees():
         "employees": enriched,
         "all_employees": all_emp,
         "all_persons": data.get("persons", []),
-        "can_edit": policy.can_edit("employees", user),
-        "can_delete": policy.can_delete("employees", user),
+        "can_edit": ctx["permissions"].can("employees", "edit"),
+        "can_delete": ctx["permissions"].can("employees", "delete"),
         "active_page": "employees",
     })
     return render_template("entities/employees.html", **ctx)
@@ -79,12 +88,11 @@ def employees_add():
     policy = current_app.config["access_policy"]
     if not policy.can_create("employees", user):
         abort(403)
-    store = current_app.config["store"]
     emp_svc = current_app.config["employee_service"]
     person_svc = current_app.config["person_service"]
     f = request.form
     try:
-        person_id = _handle_person_form(f, store, person_svc)
+        person_id = _handle_person_form(f, person_svc)
         emp_svc.add_employee(
             person_id=person_id,
             position=f.get("position", ""),
@@ -106,12 +114,10 @@ def employees_add():
 def employees_edit(emp_id: int):
     user = get_current_user()
     policy = current_app.config["access_policy"]
-    store = current_app.config["store"]
-    data = store.load()
-    target = next((e for e in data.get("employees", []) if e["employee_id"] == emp_id), None)
+    emp_svc = current_app.config["employee_service"]
+    target = emp_svc.get_employee(emp_id)
     if not policy.can_update("employees", user, target):
         abort(403)
-    emp_svc = current_app.config["employee_service"]
     f = request.form
     updates = {
         "position": f.get("position", ""),
@@ -135,12 +141,10 @@ def employees_edit(emp_id: int):
 def employees_delete(emp_id: int):
     user = get_current_user()
     policy = current_app.config["access_policy"]
-    store = current_app.config["store"]
-    data = store.load()
-    target = next((e for e in data.get("employees", []) if e["employee_id"] == emp_id), None)
+    emp_svc = current_app.config["employee_service"]
+    target = emp_svc.get_employee(emp_id)
     if not policy.can_delete("employees", user, target):
         abort(403)
-    emp_svc = current_app.config["employee_service"]
     if emp_svc.delete_employee(emp_id):
         flash("Employee deleted.", "success")
     else:
@@ -154,6 +158,7 @@ def employees_delete(emp_id: int):
 
 @entity_bp.route("/creators")
 @login_required
+@conditional_get(_page_sources("creators", "employees"), shows_flashes=True)
 def creators():
     user = get_current_user()
     policy = current_app.config["access_policy"]
@@ -176,8 +181,8 @@ def creators():
         "creators": enriched,
         "employees": data.get("employees", []),
         "all_persons": data.get("persons", []),
-        "can_edit": policy.can_edit("creators", user),
-        "can_delete": policy.can_delete("creators", user),
+        "can_edit": ctx["permissions"].can("creators", "edit"),
+        "can_delete": ctx["permissions"].can("creators", "delete"),
         "active_page": "creators",
     })
     return render_template("entities/creators.html", **ctx)
@@ -197,12 +202,11 @@ def creators_add():
     policy = current_app.config["access_policy"]
     if not policy.can_create("creators", user):
         abort(403)
-    store = current_app.config["store"]
     creator_svc = current_app.config["creator_service"]
     person_svc = current_app.config["person_service"]
     f = request.form
     try:
-        person_id = _handle_person_form(f, store, person_svc)
+        person_id = _handle_person_form(f, person_svc)
         creator_svc.add_creator(
             person_id=person_id,
             employee_id=int(f.get("employee_id", 0) or 0),
@@ -255,6 +259,7 @@ def creators_delete(creator_id: int):
 
 @entity_bp.route("/brand_contacts")
 @login_required
+@conditional_get(_page_sources("brand_contacts", "brands"), shows_flashes=True)
 def brand_contacts():
     user = get_current_user()
     policy = current_app.config["access_policy"]
@@ -275,8 +280,8 @@ def brand_contacts():
         "brand_contacts": enriched,
         "brands": data.get("brands", []),
         "all_persons": data.get("persons", []),
-        "can_edit": policy.can_edit("brand_contacts", user),
-        "can_delete": policy.can_delete("brand_contacts", user),
+        "can_edit": ctx["permissions"].can("brand_contacts", "edit"),
+        "can_delete": ctx["permissions"].can("brand_contacts", "delete"),
         "active_page": "brand_contacts",
     })
     return render_template("entities/brand_contacts.html", **ctx)
@@ -289,12 +294,11 @@ def brand_contacts_add():
     policy = current_app.config["access_policy"]
     if not policy.can_create("brand_contacts", user):
         abort(403)
-    store = current_app.config["store"]
     bc_svc = current_app.config["brand_contact_service"]
     person_svc = current_app.config["person_service"]
     f = request.form
     try:
-        person_id = _handle_person_form(f, store, person_svc)
+        person_id = _handle_person_form(f, person_svc)
         bc_svc.add_brand_contact(
             person_id=person_id,
             brand_id=int(f.get("brand_id", 0) or 0),
@@ -347,18 +351,17 @@ def brand_contacts_delete(bc_id: int):
 
 @entity_bp.route("/brands")
 @login_required
+@conditional_get(_page_sources("brands"), shows_flashes=True)
 def brands():
     user = get_current_user()
     policy = current_app.config["access_policy"]
     if not policy.can_view("brands", user):
         abort(403)
-    store = current_app.config["store"]
-    data = store.load()
     ctx = portal_context(user)
     ctx.update({
-        "brands": data.get("brands", []),
-        "can_edit": policy.can_edit("brands", user),
-        "can_delete": policy.can_delete("brands", user),
+        "brands": current_app.config["brand_service"].list_brands(),
+        "can_edit": ctx["permissions"].can("brands", "edit"),
+        "can_delete": ctx["permissions"].can("brands", "delete"),
         "active_page": "brands",
     })
     return render_template("entities/brands.html", **ctx)
@@ -371,19 +374,14 @@ def brands_add():
     policy = current_app.config["access_policy"]
     if not policy.can_create("brands", user):
         abort(403)
-    store = current_app.config["store"]
+    brand_svc = current_app.config["brand_service"]
     f = request.form
-    data = store.load()
-    new_id = store.next_id(data)
-    brand = {
-        "brand_id": new_id,
-        "name": f.get("name", ""),
-        "industry": f.get("industry", ""),
-        "website": f.get("website", ""),
-        "notes": f.get("notes", ""),
-    }
-    data.setdefault("brands", []).append(brand)
-    store.save(data)
+    brand_svc.create_brand(
+        name=f.get("name", ""),
+        industry=f.get("industry", ""),
+        website=f.get("website", ""),
+        notes=f.get("notes", ""),
+    )
     flash("Brand added.", "success")
     return redirect(url_for("entity.brands"))
 
@@ -395,18 +393,15 @@ def brands_edit(brand_id: int):
     policy = current_app.config["access_policy"]
     if not policy.can_update("brands", user):
         abort(403)
-    store = current_app.config["store"]
+    brand_svc = current_app.config["brand_service"]
     f = request.form
-    data = store.load()
-    brand = next((b for b in data.get("brands", []) if b["brand_id"] == brand_id), None)
-    if brand:
-        brand.update({
-            "name": f.get("name", ""),
-            "industry": f.get("industry", ""),
-            "website": f.get("website", ""),
-            "notes": f.get("notes", ""),
-        })
-        store.save(data)
+    updates = {
+        "name": f.get("name", ""),
+        "industry": f.get("industry", ""),
+        "website": f.get("website", ""),
+        "notes": f.get("notes", ""),
+    }
+    if brand_svc.update_brand(brand_id, **updates):
         flash("Brand updated.", "success")
     else:
         flash("Brand not found.", "danger")
@@ -420,12 +415,8 @@ def brands_delete(brand_id: int):
     policy = current_app.config["access_policy"]
     if not policy.can_delete("brands", user):
         abort(403)
-    store = current_app.config["store"]
-    data = store.load()
-    original = data.get("brands", [])
-    data["brands"] = [b for b in original if b["brand_id"] != brand_id]
-    if len(data["brands"]) < len(original):
-        store.save(data)
+    brand_svc = current_app.config["brand_service"]
+    if brand_svc.delete_brand(brand_id):
         flash("Brand deleted.", "success")
     else:
         flash("Brand not found.", "danger")
@@ -438,6 +429,7 @@ def brands_delete(brand_id: int):
 
 @entity_bp.route("/deals")
 @login_required
+@conditional_get(_page_sources("deals", "creators", "brands", "brand_contacts"), shows_flashes=True)
 def deals():
     user = get_current_user()
     policy = current_app.config["access_policy"]
@@ -447,12 +439,13 @@ def deals():
     data = store.load()
     ctx = portal_context(user)
     ctx.update({
-        "deals": data.get("deals", []),
+        # Same scope as /api/v1/deals: deals of the creators the user may see.
+        "deals": policy.scope_deals(user, data.get("deals", [])),
         "creators": data.get("creators", []),
         "brands": data.get("brands", []),
         "brand_contacts": data.get("brand_contacts", []),
-        "can_edit": policy.can_edit("deals", user),
-        "can_delete": policy.can_delete("deals", user),
+        "can_edit": ctx["permissions"].can("deals", "edit"),
+        "can_delete": ctx["permissions"].can("deals", "delete"),
         "active_page": "deals",
     })
     return render_template("entities/deals.html", **ctx)
@@ -489,20 +482,19 @@ def deals_edit(deal_id: int):
     policy = current_app.config["access_policy"]
     if not policy.can_update("deals", user):
         abort(403)
-    store = current_app.config["store"]
+    deal_svc = current_app.config["deal_service"]
     f = request.form
-    data = store.load()
-    deal = next((d for d in data.get("deals", []) if d["deal_id"] == deal_id), None)
+    deal = deal_svc.get_deal(deal_id)
     if deal:
-        deal.update({
-            "creator_id": int(f.get("creator_id", deal.get("creator_id", deal.get("client_id", 0)))),
-            "brand_id": int(f.get("brand_id", deal.get("brand_id", 0))),
-            "brand_contact_id": int(f.get("brand_contact_id", 0) or 0),
-            "pitch_date": f.get("pitch_date", ""),
-            "is_active": f.get("is_active") == "on",
-            "is_successful": f.get("is_successful") == "on",
-        })
-        store.save(data)
+        deal_svc.update_deal(
+            deal_id,
+            creator_id=int(f.get("creator_id", deal.get("creator_id", deal.get("client_id", 0)))),
+            brand_id=int(f.get("brand_id", deal.get("brand_id", 0))),
+            brand_contact_id=int(f.get("brand_contact_id", 0) or 0),
+            pitch_date=f.get("pitch_date", ""),
+            is_active=f.get("is_active") == "on",
+            is_successful=f.get("is_successful") == "on",
+        )
         flash("Deal updated.", "success")
     else:
         flash("Deal not found.", "danger")
@@ -516,12 +508,8 @@ def deals_delete(deal_id: int):
     policy = current_app.config["access_policy"]
     if not policy.can_delete("deals", user):
         abort(403)
-    store = current_app.config["store"]
-    data = store.load()
-    original = data.get("deals", [])
-    data["deals"] = [d for d in original if d["deal_id"] != deal_id]
-    if len(data["deals"]) < len(original):
-        store.save(data)
+    deal_svc = current_app.config["deal_service"]
+    if deal_svc.delete_deal(deal_id):
         flash("Deal deleted.", "success")
     else:
         flash("Deal not found.", "danger")
@@ -534,6 +522,7 @@ def deals_delete(deal_id: int):
 
 @entity_bp.route("/contracts")
 @login_required
+@conditional_get(_page_sources("contracts", "deals"), shows_flashes=True)
 def contracts():
     user = get_current_user()
     policy = current_app.config["access_policy"]
@@ -543,10 +532,11 @@ def contracts():
     data = store.load()
     ctx = portal_context(user)
     ctx.update({
-        "contracts": data.get("contracts", []),
+        # Contracts follow their deal's scope.
+        "contracts": policy.scope_contracts(user, data.get("contracts", [])),
         "deals": data.get("deals", []),
-        "can_edit": policy.can_edit("contracts", user),
-        "can_delete": policy.can_delete("contracts", user),
+        "can_edit": ctx["permissions"].can("contracts", "edit"),
+        "can_delete": ctx["permissions"].can("contracts", "delete"),
         "active_page": "contracts",
     })
     return render_template("entities/contracts.html", **ctx)
@@ -585,22 +575,21 @@ def contracts_edit(contract_id: int):
     policy = current_app.config["access_policy"]
     if not policy.can_update("contracts", user):
         abort(403)
-    store = current_app.config["store"]
+    contract_svc = current_app.config["contract_service"]
     f = request.form
-    data = store.load()
-    contract = next((c for c in data.get("contracts", []) if c["contract_id"] == contract_id), None)
+    contract = contract_svc.get_contract(contract_id)
     if contract:
-        contract.update({
-            "deal_id": int(f.get("deal_id", contract.get("deal_id", 0))),
-            "details": f.get("details", ""),
-            "payment": float(f.get("payment", 0) or 0),
-            "agency_percentage": float(f.get("agency_percentage", 0) or 0),
-            "start_date": f.get("start_date", ""),
-            "end_date": f.get("end_date", ""),
-            "status": f.get("status", ""),
-            "is_approved": f.get("is_approved") == "on",
-        })
-        store.save(data)
+        contract_svc.update_contract(
+            contract_id,
+            deal_id=int(f.get("deal_id", contract.get("deal_id", 0))),
+            details=f.get("details", ""),
+            payment=float(f.get("payment", 0) or 0),
+            agency_percentage=float(f.get("agency_percentage", 0) or 0),
+            start_date=f.get("start_date", ""),
+            end_date=f.get("end_date", ""),
+            status=f.get("status", ""),
+            is_approved=f.get("is_approved") == "on",
+        )
         flash("Contract updated.", "success")
     else:
         flash("Contract not found.", "danger")
@@ -614,12 +603,8 @@ def contracts_delete(contract_id: int):
     policy = current_app.config["access_policy"]
     if not policy.can_delete("contracts", user):
         abort(403)
-    store = current_app.config["store"]
-    data = store.load()
-    original = data.get("contracts", [])
-    data["contracts"] = [c for c in original if c["contract_id"] != contract_id]
-    if len(data["contracts"]) < len(original):
-        store.save(data)
+    contract_svc = current_app.config["contract_service"]
+    if contract_svc.delete_contract(contract_id):
         flash("Contract deleted.", "success")
     else:
         flash("Contract not found.", "danger")
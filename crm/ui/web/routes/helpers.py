@@ -1,28 +1,38 @@
 """Shared helpers for web routes."""
+import hashlib
+import json
+from datetime import datetime, timezone
 from functools import wraps
 
-from flask import session, redirect, url_for, current_app, abort
+from flask import session, redirect, request, url_for, current_app, abort
+
+from crm.persistence.json_store import read_snapshot, store_versions
+from crm.persistence.paging import PageQuery
 
 
 def get_current_user() -> dict | None:
-    """Return the currently logged-in user dict, or None."""
+    """Return the currently logged-in user dict, or None.
+
+    The user is fetched by ID (``page_records``), so checking a login does
+    not load the rest of the store.
+    """
     user_id = session.get("user_id")
     if user_id is None:
         return None
-    store = current_app.config["store"]
-    data = store.load()
-    return next((u for u in data.get("users", []) if u["user_id"] == user_id), None)
+    users = current_app.config["store"].page_records(
+        "users", PageQuery(limit=1, ids=frozenset({user_id}))
+    )
+    return dict(users[0]) if users else None
 
 
 def get_person(person_id: int) -> dict | None:
-    store = current_app.config["store"]
-    data = store.load()
-    return next((p for p in data.get("persons", []) if p["person_id"] == person_id), None)
+    data = read_snapshot(current_app.config["store"])
+    person = next((p for p in data.get("persons", []) if p["person_id"] == person_id), None)
+    return dict(person) if person is not None else None
 
 
 def get_role_name(user: dict) -> str:
-    store = current_app.config["store"]
-    data = store.load()
+    data = read_snapshot(current_app.config["store"])
     role = next((r for r in data.get("roles", []) if r["role_id"] == user.get("role_id")), None)
     return role["role_name"] if role else "User"
 
@@ -36,10 +46,72 @@ def login_required(f):
     return decorated
 
 
+def _validators(sources) -> tuple[str, float | None] | None:
+    """Return ``(etag, last modified)`` for the current request, or None.
+
+    The ETag hashes the build version, the request URL, the current user
+    and the versions of the *sources* collections, so it changes whenever
+    any of them does (a deploy that changes templates or the JSON shape
+    included).
+    """
+    user = get_current_user()
+    if user is None:
+        return None
+    versions = store_versions(current_app.config["store"], sorted(set(sources)))
+    if versions is None:
+        return None
+    identity = {name: value for name, value in user.items() if name != "password"}
+    payload = json.dumps(
+        [current_app.config.get("BUILD_VERSION"), request.full_path, identity, sorted(versions.items())],
+        sort_keys=True,
+        default=str,
+    )
+    etag = hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+    modified = max((m for _version, m in versions.values() if m is not None), default=None)
+    return etag, modified
+
+
+def conditional_get(sources, *, shows_flashes: bool = False):
+    """Answer GETs whose ``If-None-Match`` still matches with 304 Not Modified.
+
+    *sources* are the collections the view's response is built from (or a
+    callable returning them).  Their versions come from the store
+    (``store_versions``) without loading any records, so a match skips the
+    view entirely.  200 responses carry the ETag, a ``Last-Modified`` of
+    the newest source and ``Cache-Control: private, no-cache`` so browsers
+    revalidate instead of reusing them.  With *shows_flashes* (pages that
+    render flash messages) a pending message always renders the view.  Use
+    below ``login_required``.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if shows_flashes and session.get("_flashes"):
+                return f(*args, **kwargs)
+            validators = _validators(sources() if callable(sources) else sources)
+            if validators is None:
+                return f(*args, **kwargs)
+            etag, modified = validators
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            if modified is not None:
+                response.last_modified = datetime.fromtimestamp(modified, timezone.utc)
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+        return decorated
+    return decorator
+
+
 def portal_context(user: dict) -> dict:
     """Build the common template context for portal pages."""
     person = get_person(user.get("person_id"))
-    role_name = get_role_name(user)
+    permissions = current_app.config["access_policy"].permissions_for(user)
     display = (
         (person.get("display_name") or person.get("full_name", ""))
         if person
@@ -48,6 +120,7 @@ def portal_context(user: dict) -> dict:
     return {
         "current_user": user,
         "current_person": person,
-        "current_role": role_name,
+        "current_role": permissions.role_name,
         "display_name": display,
+        "permissions": permissions,
     }
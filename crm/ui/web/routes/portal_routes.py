@@ -90,7 +90,7 @@ def search():
 
         # Deals
         if policy.can_view("deals", user):
-            for deal in data.get("deals", []):
+            for deal in policy.scope_deals(user, data.get("deals", [])):
                 if _matches(deal):
                     results.append({
                         "type": "Deal",
@@ -101,7 +101,7 @@ def search():
 
         # Contracts
         if policy.can_view("contracts", user):
-            for contract in data.get("contracts", []):
+            for contract in policy.scope_contracts(user, data.get("contracts", [])):
                 if _matches(contract):
                     results.append({
                         "type": "Contract",
@@ -129,8 +129,8 @@ def performance():
 def tasks():
     user = get_current_user()
     ctx = portal_context(user)
-    ctx["page_title"] = "Tasks"
-    return render_template("portal/coming_soon.html", **ctx)
+    ctx["tasks"] = current_app.config["dashboard_cache"].tasks()
+    return render_template("portal/tasks.html", **ctx)
 
 
 @portal_bp.route("/discover")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Recount the dashboard KPI counters and correct any drift.
+
+Repositories keep the counters current on every write; this job catches
+writes that bypassed them (imports, manual edits).  Corrections are added
+to the stored counters under the store's write lock, so it is safe to run
+while the web app is serving writes.
+Run it from cron, or keep it running with ``--interval``.
+
+Usage::
+
+    python reconcile_kpis.py                 # reconcile once
+    python reconcile_kpis.py --interval 900  # reconcile every 15 minutes
+
+Environment variables (same as the web app):
+    CRM_STORAGE_BACKEND  – json (default) | sqlite | postgres
+    DATABASE_URL         – connection URL for sqlite or postgres
+    DATA_JSON_PATH       – path to data.json (default: ./data.json)
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+# Ensure the project root is on sys.path so 'crm' is importable.
+sys.path.insert(0, str(Path(__file__).parent))
+
+from crm.persistence.kpis import reconcile_kpis
+
+
+def _open_store():
+    backend = os.environ.get("CRM_STORAGE_BACKEND", "json").lower()
+    database_url = os.environ.get("DATABASE_URL", "").strip()
+    if backend == "postgres":
+        from crm.persistence.postgres_store import PostgresDataStore
+        return PostgresDataStore(database_url, pool_max_size=1)
+    if backend == "sqlite":
+        from crm.persistence.sqlite_store import SqliteDataStore
+        return SqliteDataStore(database_url or "sqlite:///project.db")
+    from crm.persistence.json_store import JsonDataStore
+    return JsonDataStore(
+        os.environ.get("DATA_JSON_PATH", "data.json"),
+        journal=os.environ.get("CRM_JSON_JOURNAL", "0").strip().lower() in {"1", "true", "yes", "on"},
+    )
+
+
+def run_once(store) -> None:
+    drift = reconcile_kpis(store)
+    if not drift:
+        print("[reconcile_kpis] counters are up to date")
+        return
+    for name, (stored, actual) in sorted(drift.items()):
+        print(f"[reconcile_kpis] {name}: {stored} -> {actual}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--interval", type=float, default=0,
+                        help="seconds between runs (0 = run once)")
+    args = parser.parse_args()
+
+    store = _open_store()
+    run_once(store)
+    while args.interval > 0:
+        time.sleep(args.interval)
+        run_once(store)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
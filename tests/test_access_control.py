@@ -117,6 +117,28 @@ class TestManagerAccess:
         target_emp = {"employee_id": 201, "person_id": 101, "is_manager": False}
         assert policy.can_update("employees", user, target_emp) is True
 
+    def test_sees_reports_at_any_depth(self, setup):
+        store, data, policy = setup
+        user = _user("Manager", data, person_id=100)
+        fresh = store.load()
+        fresh["employees"].append({"employee_id": 203, "person_id": 105, "manager_id": 201,
+                                   "is_active": True, "is_manager": False})
+        store.save(fresh)
+        scoped = policy.scope_employees(user, fresh["employees"])
+        assert {e["employee_id"] for e in scoped} == {200, 201, 203}
+        assert policy.manages(user, 203)
+        assert not policy.manages(user, 202)
+
+    def test_hierarchy_follows_reparenting(self, setup):
+        store, data, policy = setup
+        user = _user("Manager", data, person_id=100)
+        hierarchy = policy.employee_hierarchy()
+        fresh = store.load()
+        next(e for e in fresh["employees"] if e["employee_id"] == 201)["manager_id"] = 202
+        store.save(fresh)
+        assert policy.employee_hierarchy() is hierarchy
+        assert {e["employee_id"] for e in policy.scope_employees(user, fresh["employees"])} == {200}
+
     def test_cannot_edit_acm(self, setup):
         store, data, policy = setup
         user = _user("Manager", data)
@@ -200,3 +222,165 @@ class TestBackwardCompatAliases:
         scoped_via_alias = policy.scope_clients(user, all_creators)
         scoped_via_new = policy.scope_creators(user, all_creators)
         assert scoped_via_alias == scoped_via_new
+
+
+class TestPermissionTable:
+    def test_checks_reuse_compiled_table(self, setup, monkeypatch):
+        store, data, policy = setup
+        user = _user("Manager", data, person_id=100)
+        policy.can_view("creators", user)
+        table = policy.permission_table()
+        monkeypatch.setattr(store, "load", lambda: pytest.fail("store loaded"))
+        for _ in range(100):
+            assert policy.can_view("creators", user)
+            assert policy.can_edit("deals", user)
+        assert policy.permission_table() is table
+
+    def test_save_acm_rebuilds_table(self, setup):
+        store, data, policy = setup
+        user = _user("Employee", data, person_id=101)
+        assert not policy.can_delete("brand_contacts", user)
+        acm = policy.get_acm()
+        acm = {role: {e: dict(p) for e, p in ents.items()} for role, ents in acm.items()}
+        acm["Employee"]["brand_contacts"]["delete"] = True
+        policy.save_acm(acm)
+        assert policy.can_delete("brand_contacts", user)
+
+    def test_external_write_invalidates_table(self, setup):
+        store, data, policy = setup
+        user = _user("User", data)
+        assert not policy.can_view("brands", user)
+        other = JsonDataStore(store._filepath)
+        fresh = other.load()
+        fresh["access_control_matrix"] = JsonDataStore.DEFAULT_ACM | {
+            "User": {"brands": {"create": False, "read": True, "update": False, "delete": False}},
+        }
+        other.save(fresh)
+        assert policy.can_view("brands", user)
+
+    def test_creator_roles_are_read_only_even_if_acm_allows(self, setup):
+        store, data, policy = setup
+        acm = {"Creator": {"deals": {"create": True, "read": True, "update": True, "delete": True}}}
+        policy.save_acm(acm)
+        for role in ("Creator", "Client", "Rep"):
+            user = _user(role, data)
+            assert policy.can_view("deals", user)
+            assert not policy.can_edit("deals", user)
+            assert not policy.can_delete("deals", user)
+
+
+class TestPermissionsFor:
+    def test_matrix_matches_individual_checks(self, setup):
+        store, data, policy = setup
+        for role in ("Admin", "Manager", "Employee", "Creator", "User"):
+            user = _user(role, data)
+            perms = policy.permissions_for(user)
+            assert perms.role_name == role
+            for entity in perms:
+                assert perms[entity]["read"] == policy.can_view(entity, user)
+                assert perms[entity]["edit"] == policy.can_edit(entity, user)
+                assert perms.can(entity, "create") == policy.can_create(entity, user)
+                assert perms.can(entity, "delete") == policy.can_delete(entity, user)
+
+    def test_matrix_is_shared_per_role(self, setup):
+        store, data, policy = setup
+        a = _user("Employee", data)
+        b = dict(a, user_id=1000)
+        assert policy.permissions_for(a) is policy.permissions_for(b)
+
+    def test_admin_allows_unknown_entities(self, setup):
+        store, data, policy = setup
+        perms = policy.permissions_for(_user("Admin", data))
+        assert perms.is_admin
+        assert perms.can("not_in_acm", "delete")
+        assert not policy.permissions_for(_user("User", data)).can("not_in_acm", "read")
+
+    def test_as_dict_is_json_ready(self, setup):
+        store, data, policy = setup
+        matrix = policy.permissions_for(_user("Creator", data)).as_dict()
+        assert set(matrix) >= {"creators", "deals", "contracts"}
+        assert matrix["deals"] == {
+            "read": matrix["deals"]["read"], "create": False,
+            "update": False, "delete": False, "edit": False,
+        }
+
+    def test_memoized_on_scope_until_acm_saved(self, setup):
+        store, data, policy = setup
+
+        class Scope:
+            pass
+
+        scope = Scope()
+        policy = AccessPolicy(store, lambda: scope)
+        user = _user("Employee", data)
+        perms = policy.permissions_for(user)
+        policy.permission_table = lambda: pytest.fail("table rebuilt")
+        assert policy.permissions_for(user) is perms
+        assert policy.can_view("creators", user) == perms.can("creators", "read")
+        del policy.permission_table
+
+        acm = {role: {e: dict(p) for e, p in ents.items()} for role, ents in policy.get_acm().items()}
+        acm["Employee"]["brand_contacts"]["delete"] = True
+        policy.save_acm(acm)
+        assert policy.permissions_for(user).can("brand_contacts", "delete")
+
+
+class TestVisibilityScope:
+    def _add_deals(self, store):
+        data = store.load()
+        data["deals"] = [
+            {"deal_id": 400, "creator_id": 300, "brand_id": 1, "is_active": True},
+            {"deal_id": 401, "client_id": 301, "brand_id": 1, "is_active": True},
+        ]
+        data["contracts"] = [
+            {"contract_id": 500, "deal_id": 400},
+            {"contract_id": 501, "deal_id": 401},
+        ]
+        data["social_media_accounts"] = [
+            {"social_media_id": 600, "creator_id": 300},
+            {"social_media_id": 601, "creator_id": 301},
+        ]
+        store.save(data)
+        return store.load()
+
+    def test_employee_sees_chain_of_own_creators(self, setup):
+        store, data, policy = setup
+        data = self._add_deals(store)
+        scope = policy.visibility_for(_user("Employee", data, person_id=101))
+        assert scope.ids("employees") == {201}
+        assert scope.ids("creators") == {300}
+        assert scope.ids("deals") == {400}
+        assert scope.ids("contracts") == {500}
+        assert scope.ids("social_media_accounts") == {600}
+        assert [c["contract_id"] for c in scope.filter("contracts", data["contracts"])] == [500]
+
+    def test_manager_sees_reports_and_every_creator(self, setup):
+        store, data, policy = setup
+        data = self._add_deals(store)
+        scope = policy.visibility_for(_user("Manager", data, person_id=100))
+        assert scope.ids("employees") == {200, 201}
+        assert scope.ids("creators") is None
+        assert scope.visible("contracts", 501)
+        assert policy.scope_deals(_user("Manager", data, person_id=100), data["deals"]) == data["deals"]
+
+    def test_scope_is_cached_until_data_changes(self, setup, monkeypatch):
+        store, data, policy = setup
+        user = _user("Employee", data, person_id=101)
+        scope = policy.visibility_for(user)
+        monkeypatch.setattr(store, "load", lambda: pytest.fail("store loaded"))
+        assert policy.visibility_for(user) is scope
+        monkeypatch.undo()
+
+        fresh = store.load()
+        fresh["creators"].append({"creator_id": 302, "person_id": 105, "employee_id": 201, "description": "C"})
+        store.save(fresh)
+        rebuilt = policy.visibility_for(user)
+        assert rebuilt is not scope
+        assert rebuilt.ids("creators") == {300, 302}
+
+    def test_users_get_separate_scopes(self, setup):
+        store, data, policy = setup
+        emp = _user("Employee", data, person_id=101)
+        other = dict(emp, user_id=1000, person_id=102)
+        assert policy.visibility_for(emp).ids("creators") == {300}
+        assert policy.visibility_for(other).ids("creators") == frozenset()
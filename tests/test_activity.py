@@ -0,0 +1,158 @@
+"""Tests for record timestamps and the recent-activity feed."""
+import os
+import sqlite3
+
+import pytest
+
+from crm.persistence.activity import (
+    ACTIVITY_KEY,
+    append_activity,
+    recent_activity,
+    seed_activity,
+)
+from crm.persistence.json_store import JsonDataStore
+from crm.persistence.repositories import (
+    BrandRepository,
+    CreatorRepository,
+    DealRepository,
+    PersonRepository,
+)
+from crm.persistence.sqlite_store import SqliteDataStore
+from crm.persistence.unit_of_work import UnitOfWork
+from crm.services.dashboard_service import DashboardService
+
+
+def _seed(store):
+    data = store.load()
+    data["persons"] = [{"person_id": 1, "display_name": "Ava"}]
+    data["brands"] = [{"brand_id": 2, "name": "Acme"}]
+    data["deals"] = [{"deal_id": 3, "creator_id": 9, "brand_id": 2, "is_active": True}]
+    data["_next_id"] = 10
+    data[ACTIVITY_KEY] = seed_activity(data)
+    store.save(data)
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "json":
+        store = JsonDataStore(os.path.join(str(tmp_path), "data.json"))
+    else:
+        store = SqliteDataStore(f"sqlite:///{os.path.join(str(tmp_path), 'crm.db')}")
+        store.ensure_schema()
+    _seed(store)
+    return store
+
+
+def _feed(store):
+    return [(e["action"], e["entity"], e["id"], e["label"]) for e in recent_activity(store.load(), 100)]
+
+
+class TestFeed:
+    def test_seed_orders_newest_id_last(self):
+        feed = seed_activity({"brands": [{"brand_id": 5, "name": "B"}], "deals": [{"deal_id": 7}, {"deal_id": 2}]})
+        assert [(e["seq"], e["label"]) for e in feed["events"]] == [(1, "Deal #2"), (2, "B"), (3, "Deal #7")]
+        assert feed["seq"] == 3
+
+    def test_ring_buffer_keeps_the_newest_events(self):
+        data = {ACTIVITY_KEY: {"seq": 0, "events": []}}
+        for i in range(1, 8):
+            append_activity(data, {"entity": "deals", "id": i}, limit=5)
+        assert [e["seq"] for e in data[ACTIVITY_KEY]["events"]] == [3, 4, 5, 6, 7]
+        assert [e["id"] for e in recent_activity(data, 2)] == [7, 6]
+        assert [e["id"] for e in recent_activity(data, 2, before=6)] == [5, 4]
+
+    def test_first_append_seeds_without_duplicating_the_record(self):
+        data = {"deals": [{"deal_id": 1}, {"deal_id": 2}]}
+        append_activity(data, {"action": "created", "entity": "deals", "id": 2, "label": "Deal #2"})
+        assert [(e["seq"], e["id"]) for e in data[ACTIVITY_KEY]["events"]] == [(1, 1), (3, 2)]
+
+    def test_append_does_not_mutate_the_previous_feed(self):
+        data = {ACTIVITY_KEY: {"seq": 0, "events": []}}
+        before = data[ACTIVITY_KEY]
+        append_activity(data, {"entity": "deals", "id": 1})
+        assert before == {"seq": 0, "events": []}
+
+
+class TestRepositoryWrites:
+    def test_writes_are_stamped_and_recorded(self, store):
+        brands = BrandRepository(store)
+        added = brands.add({"name": "Zed"})
+        assert added["created_at"] == added["updated_at"]
+        assert added["created_at"].endswith("+00:00")
+        updated = brands.update("brand_id", added["brand_id"], {"name": "Zed Co", "updated_at": "2030-01-01T00:00:00+00:00"})
+        assert updated["created_at"] == added["created_at"]
+        assert updated["updated_at"] == "2030-01-01T00:00:00+00:00"
+        DealRepository(store).delete("deal_id", 3)
+        assert _feed(store)[:3] == [
+            ("deleted", "deals", 3, "Deal #3"),
+            ("updated", "brands", added["brand_id"], "Zed Co"),
+            ("created", "brands", added["brand_id"], "Zed"),
+        ]
+
+    def test_creator_events_use_the_person_name(self, store):
+        CreatorRepository(store).add({"person_id": 1, "employee_id": None, "description": ""})
+        assert _feed(store)[0][3] == "Ava"
+
+    def test_untracked_collections_are_not_recorded(self, store):
+        before = _feed(store)
+        person = PersonRepository(store).add({"display_name": "Bo"})
+        assert "created_at" not in person
+        assert _feed(store) == before
+
+    def test_writes_through_unit_of_work(self, store):
+        uow = UnitOfWork(store)
+        BrandRepository(uow).add({"name": "Uow"})
+        DealRepository(uow).update("deal_id", 3, {"is_active": False})
+        uow.commit()
+        assert [e[:2] for e in _feed(store)[:2]] == [("updated", "deals"), ("created", "brands")]
+
+    def test_concurrent_units_of_work_keep_every_event(self, store):
+        first, second = UnitOfWork(store), UnitOfWork(store)
+        first.load(), second.load()  # both hold the same, soon stale, feed
+        BrandRepository(first).add({"name": "First"})
+        BrandRepository(second).add({"name": "Second"})
+        first.commit()
+        second.commit()
+        events = store.load()[ACTIVITY_KEY]["events"]
+        assert [e["label"] for e in events[-2:]] == ["First", "Second"]
+        assert len({e["seq"] for e in events}) == len(events)
+
+
+class TestSqliteSchema:
+    def test_append_activity_trims_in_sql(self, tmp_path):
+        store = SqliteDataStore(f"sqlite:///{os.path.join(str(tmp_path), 'crm.db')}")
+        store.ensure_schema()
+        store.append_activity({"entity": "deals", "id": 0})  # no feed yet: no-op
+        assert ACTIVITY_KEY not in store.load()
+        data = store.load()
+        data[ACTIVITY_KEY] = {"seq": 0, "events": []}
+        store.save(data)
+        for i in range(1, 5):
+            store.append_activity({"entity": "deals", "id": i}, limit=3)
+        feed = store.load()[ACTIVITY_KEY]
+        assert feed["seq"] == 4
+        assert [(e["seq"], e["id"]) for e in feed["events"]] == [(2, 2), (3, 3), (4, 4)]
+
+    def test_ensure_schema_adds_timestamp_columns(self, tmp_path):
+        path = os.path.join(str(tmp_path), "old.db")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE brands (brand_id INTEGER PRIMARY KEY, name VARCHAR(200) NOT NULL, "
+                     "industry VARCHAR(200) NOT NULL, website VARCHAR(500) NOT NULL, notes TEXT NOT NULL)")
+        conn.execute("INSERT INTO brands VALUES (1, 'Old', '', '', '')")
+        conn.commit()
+        conn.close()
+        store = SqliteDataStore(f"sqlite:///{path}")
+        store.ensure_schema()
+        assert store.get_record("brands", 1)["created_at"] is None
+        assert BrandRepository(store).update("brand_id", 1, {"name": "New"})["updated_at"]
+
+
+class TestDashboardReadsFeed:
+    def test_recent_activity_comes_from_the_feed(self, store):
+        BrandRepository(store).update("brand_id", 2, {"name": "Acme 2"})
+        activity = DashboardService(store).build(user={})["recent_activity"]
+        assert [(a["type"], a["label"], a["action"]) for a in activity] == [
+            ("Brand", "Acme 2", "updated"),
+            ("Deal", "Deal #3", "created"),
+            ("Brand", "Acme", "created"),
+        ]
@@ -0,0 +1,77 @@
+"""Tests for ChangeTracker record diffing."""
+from crm.persistence.changes import DELETE, INSERT, UPDATE, ChangeTracker
+
+_KEYS = {"brands": "brand_id", "deals": "deal_id"}
+
+
+def _data():
+    return {
+        "brands": [{"brand_id": i, "name": f"B{i}"} for i in range(1, 4)],
+        "deals": [{"deal_id": 10, "brand_id": 1}],
+        "access_control_matrix": {"Admin": {}},
+        "_next_id": 10,
+    }
+
+
+class TestChangeTracker:
+    def test_no_baseline_means_no_diff(self):
+        assert ChangeTracker(_KEYS).diff(_data()) is None
+
+    def test_unchanged_data_has_no_changes(self):
+        tracker = ChangeTracker(_KEYS)
+        data = tracker.track(_data())
+        assert tracker.diff(data) == []
+        assert tracker.changed_settings(data) == set()
+
+    def test_inserts_updates_and_deletes(self):
+        tracker = ChangeTracker(_KEYS)
+        data = tracker.track(_data())
+        data["brands"][1]["name"] = "Renamed"
+        data["brands"].pop(0)
+        data["brands"].append({"brand_id": 11, "name": "New"})
+        data["deals"].append({"name": "no id yet"})
+        changes = {(c.op, c.key, c.record_id) for c in tracker.diff(data)}
+        assert changes == {
+            (UPDATE, "brands", 2),
+            (DELETE, "brands", 1),
+            (INSERT, "brands", 11),
+        }
+
+    def test_settings_changes(self):
+        tracker = ChangeTracker(_KEYS)
+        data = tracker.track(_data())
+        data["_next_id"] = 12
+        data["access_control_matrix"]["Admin"]["brands"] = {"read": True}
+        assert tracker.changed_settings(data) == {"_next_id", "access_control_matrix"}
+
+    def test_baseline_is_not_aliased_to_data(self):
+        tracker = ChangeTracker(_KEYS)
+        data = tracker.track(_data())
+        data["brands"][0]["name"] = "Changed in place"
+        assert [c.record_id for c in tracker.diff(data)] == [1]
+
+    def test_settle_with_changes_matches_full_settle(self):
+        tracker = ChangeTracker(_KEYS)
+        data = tracker.track(_data())
+        data["brands"][0]["name"] = "Renamed"
+        data["brands"].pop()
+        data["_next_id"] = 11
+        tracker.settle(data, tracker.diff(data))
+        assert tracker.diff(data) == []
+        assert tracker.changed_settings(data) == set()
+
+    def test_each_load_diffs_against_its_own_baseline(self):
+        tracker = ChangeTracker(_KEYS)
+        first = tracker.track(_data())
+        second = tracker.track(_data())
+        second["brands"][0]["name"] = "Second"
+        tracker.settle(second, tracker.diff(second))
+        first["brands"][1]["name"] = "First"
+        assert [c.record_id for c in tracker.diff(first)] == [2]
+
+    def test_data_from_another_owner_is_untracked(self):
+        data = ChangeTracker(_KEYS, owner="json").track(_data())
+        other = ChangeTracker(_KEYS, owner="sqlite")
+        assert other.diff(data) is None
+        other.settle(data)
+        assert other.diff(data) == []
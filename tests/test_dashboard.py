@@ -1,11 +1,13 @@
 """Tests for DashboardService and the /portal/dashboard route."""
 import os
+import time
 from datetime import date, timedelta
 
 import pytest
 
 from crm.persistence.json_store import JsonDataStore
 from crm.services.auth_service import AuthService
+from crm.services.dashboard_cache import DashboardCache
 from crm.services.dashboard_service import DashboardService
 from crm.ui.web.app import create_app
 
@@ -271,6 +273,200 @@ class TestDashboardServiceRecentActivity:
         assert len(activity) <= 8
 
 
+class TestDashboardServiceEngine:
+    def test_recent_activity_is_newest_first_across_collections(self, store):
+        data = store.load()
+        data["brands"].append({"brand_id": 5, "name": "B5", "description": ""})
+        data["deals"].append({"deal_id": 7, "client_id": 1, "brand_id": 5, "is_active": True})
+        data["contracts"].append({"contract_id": 6, "deal_id": 7, "start_date": "", "end_date": ""})
+        store.save(data)
+        activity = DashboardService(store).build(user={})["recent_activity"]
+        assert [a["label"] for a in activity] == ["Deal #7", "Contract #6", "B5"]
+
+    def test_expiring_detail_uses_deal_brand(self, store):
+        data = store.load()
+        data["brands"].append({"brand_id": 5, "name": "B5", "description": "Acme"})
+        data["deals"].append({"deal_id": 7, "client_id": 1, "brand_id": 5, "is_active": True})
+        data["contracts"].append({
+            "contract_id": 8, "deal_id": 7, "start_date": "2024-01-01",
+            "end_date": (date.today() + timedelta(days=1)).isoformat(),
+        })
+        store.save(data)
+        svc = DashboardService(store)
+        items = svc.build(user={})["needs_attention"]
+        assert items[0]["detail"] == "Contract #8 (Acme) — ends in 1 day"
+        cards = {c["id"]: c for c in svc.build(user={})["cards"]}
+        assert cards["contracts"]["secondary"] == "1 expiring soon"
+        assert cards["active_deals"]["value"] == 1
+
+    def test_build_reads_the_snapshot_without_copying(self, store, monkeypatch):
+        cached = JsonDataStore(store._filepath, cache=True)
+        cached.save(cached.load())
+        monkeypatch.setattr(cached, "load", lambda: pytest.fail("store copied"))
+        DashboardService(cached).build(user={})
+
+    def test_slash_dates_still_parse(self, store):
+        data = store.load()
+        soon = (date.today() + timedelta(days=3)).strftime("%Y/%m/%d")
+        data["contracts"].append({"contract_id": 1, "deal_id": 1, "start_date": "2024/01/01", "end_date": soon})
+        store.save(data)
+        items = DashboardService(store).build(user={})["needs_attention"]
+        assert any(i["type"] == "contract_expiring" for i in items)
+
+
+class TestDashboardServiceTasks:
+    def _add_contract(self, store, contract_id, days):
+        data = store.load()
+        data["contracts"].append({
+            "contract_id": contract_id, "deal_id": contract_id, "start_date": "2024-01-01",
+            "end_date": (date.today() + timedelta(days=days)).isoformat(),
+        })
+        store.save(data)
+
+    def test_tasks_use_the_wider_window_and_are_uncapped(self, store):
+        for i in range(1, 13):
+            self._add_contract(store, i, 60 if i == 1 else i)
+        svc = DashboardService(store)
+        assert len(svc.build(user={})["needs_attention"]) == svc.NEEDS_ATTENTION_LIMIT
+        tasks = svc.build_tasks()
+        assert tasks["date"] == date.today()
+        assert tasks["counts"]["contract_expiring"] == 12
+        assert len(tasks["items"]) >= 12
+        assert "ends in 60 days" in tasks["items"][11]["detail"]
+
+    def test_expiry_index_is_resynced_only_on_data_change(self, store, monkeypatch):
+        self._add_contract(store, 1, 5)
+        svc = DashboardService(store)
+        svc.build(user={})
+        calls = []
+        sync = svc._expiry_index.sync
+        monkeypatch.setattr(svc._expiry_index, "sync", lambda contracts: calls.append(1) or sync(contracts))
+        svc.build(user={})
+        assert calls == []
+        self._add_contract(store, 2, 6)
+        items = svc.build(user={})["needs_attention"]
+        assert calls == [1]
+        assert [i["detail"][:11] for i in items] == ["Contract #1", "Contract #2"]
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _add_brand(store, brand_id):
+    data = store.load()
+    data["brands"].append({"brand_id": brand_id, "name": f"B{brand_id}", "description": ""})
+    store.save(data)
+
+
+def _brand_count(model):
+    return next(c["value"] for c in model["cards"] if c["id"] == "brands")
+
+
+class TestDashboardCache:
+    USER = {"user_id": 1, "role_id": 4}
+
+    def _cache(self, store, **kwargs):
+        store.save(store.load())
+        self.clock = _Clock()
+        self.pending = []
+        kwargs.setdefault("spawn", self.pending.append)
+        return DashboardCache(store, clock=self.clock, **kwargs)
+
+    def test_second_get_is_a_hit(self, store):
+        cache = self._cache(store)
+        first = cache.get(self.USER)
+        assert cache.get(self.USER) is first
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["rebuilds"]) == (1, 1, 1)
+        assert stats["rebuild_time_last"] > 0
+
+    def test_users_are_cached_separately(self, store):
+        cache = self._cache(store)
+        cache.get(self.USER)
+        cache.get({"user_id": 2, "role_id": 1})
+        assert cache.stats()["misses"] == 2
+        assert len(cache) == 2
+
+    def test_data_change_serves_stale_then_refreshes(self, store):
+        cache = self._cache(store)
+        stale = cache.get(self.USER)
+        _add_brand(store, 5)
+
+        assert cache.get(self.USER) is stale
+        assert cache.get(self.USER) is stale
+        assert len(self.pending) == 1  # one refresh per key
+        self.pending.pop()()
+
+        fresh = cache.get(self.USER)
+        assert _brand_count(fresh) == 1
+        stats = cache.stats()
+        assert (stats["stale_hits"], stats["refreshes"], stats["hits"]) == (2, 1, 1)
+
+    def test_ttl_expiry_serves_stale(self, store):
+        cache = self._cache(store, ttl=10, stale_ttl=60)
+        model = cache.get(self.USER)
+        self.clock.now = 11
+        assert cache.get(self.USER) is model
+        assert cache.stats()["stale_hits"] == 1
+        assert len(self.pending) == 1
+
+    def test_entry_past_stale_window_is_rebuilt_synchronously(self, store):
+        cache = self._cache(store, ttl=10, stale_ttl=60)
+        cache.get(self.USER)
+        _add_brand(store, 5)
+        self.clock.now = 71
+        assert _brand_count(cache.get(self.USER)) == 1
+        assert cache.stats()["misses"] == 2
+        assert self.pending == []
+
+    def test_least_recently_used_entry_is_evicted(self, store):
+        cache = self._cache(store, max_entries=2)
+        a, b, c = ({"user_id": i, "role_id": 1} for i in (1, 2, 3))
+        cache.get(a)
+        cache.get(b)
+        cache.get(a)
+        cache.get(c)
+        assert len(cache) == 2
+        cache.get(a)
+        cache.get(b)
+        stats = cache.stats()
+        assert stats["misses"] == 4  # a, b, c, then b again
+
+    def test_failed_refresh_keeps_the_stale_entry(self, store, monkeypatch):
+        cache = self._cache(store)
+        model = cache.get(self.USER)
+        _add_brand(store, 5)
+        cache.get(self.USER)
+        monkeypatch.setattr(cache._service, "build", lambda user: 1 / 0)
+        self.pending.pop()()
+        assert cache.get(self.USER) is model
+        assert cache.stats()["refresh_failures"] == 1
+        assert len(self.pending) == 1  # retried on the next stale hit
+
+    def test_tasks_share_one_entry(self, store):
+        cache = self._cache(store)
+        first = cache.tasks()
+        assert cache.tasks() is first
+        assert cache.stats()["hits"] == 1
+
+    def test_background_thread_refresh(self, store):
+        store.save(store.load())
+        cache = DashboardCache(store)
+        cache.get(self.USER)
+        _add_brand(store, 5)
+        cache.get(self.USER)
+        for _ in range(200):
+            if cache.stats()["refreshes"]:
+                break
+            time.sleep(0.01)
+        assert _brand_count(cache.get(self.USER)) == 1
+
+
 # ---------------------------------------------------------------------------
 # Route tests
 # ---------------------------------------------------------------------------
@@ -308,3 +504,12 @@ class TestDashboardRoute:
         resp = _login(c)
         assert resp.status_code == 200
         assert b"Dashboard" in resp.data
+
+    def test_repeat_visits_use_the_dashboard_cache(self, client):
+        c, _ = client
+        _login(c)
+        c.get("/portal/dashboard")
+        c.get("/portal/dashboard")
+        stats = c.application.config["dashboard_cache"].stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] >= 1
@@ -0,0 +1,94 @@
+import random
+from datetime import date, timedelta
+
+from crm.services.expiry_index import ContractExpiryIndex, parse_date
+
+TODAY = date(2026, 3, 1)
+
+
+def _contract(contract_id, days=None, end_date=None):
+    if end_date is None and days is not None:
+        end_date = (TODAY + timedelta(days=days)).isoformat()
+    return {"contract_id": contract_id, "deal_id": contract_id, "end_date": end_date}
+
+
+def _scan(contracts, today, window):
+    """Reference implementation: parse every end date."""
+    found = []
+    for c in contracts:
+        end = parse_date(c.get("end_date"))
+        if end is not None and 0 <= (end - today).days <= window:
+            found.append(c["contract_id"])
+    return sorted(found)
+
+
+class TestQueries:
+    def test_expiring_is_inclusive_and_soonest_first(self):
+        index = ContractExpiryIndex([
+            _contract(1, 30), _contract(2, 0), _contract(3, 31), _contract(4, -1), _contract(5, 10),
+        ])
+        assert [(c["contract_id"], days) for c, days in index.expiring(TODAY, 30)] == [(2, 0), (5, 10), (1, 30)]
+
+    def test_unparseable_and_missing_dates_are_not_indexed(self):
+        index = ContractExpiryIndex([
+            _contract(1, end_date=""), _contract(2, end_date="soon"), _contract(3, end_date=None),
+            _contract(4, end_date="2026/03/05"), {"end_date": "2026-03-02"},
+        ])
+        assert len(index) == 1
+        assert 4 in index and 1 not in index
+        assert [c["contract_id"] for c, _ in index.ending_between(TODAY, TODAY + timedelta(days=7))] == [4]
+
+    def test_ties_keep_contract_order(self):
+        index = ContractExpiryIndex([_contract(3, 5), _contract(1, 5), _contract(2, 5)])
+        assert [c["contract_id"] for c, _ in index.expiring(TODAY, 5)] == [3, 1, 2]
+
+
+class TestMaintenance:
+    def test_upsert_moves_a_contract(self):
+        index = ContractExpiryIndex([_contract(1, 5), _contract(2, 60)])
+        index.upsert(_contract(2, 1))
+        index.upsert(_contract(1, 90))
+        assert [c["contract_id"] for c, _ in index.expiring(TODAY, 30)] == [2]
+        assert len(index) == 2
+
+    def test_remove(self):
+        index = ContractExpiryIndex([_contract(1, 5), _contract(2, 5)])
+        index.remove(1)
+        index.remove(99)
+        assert [c["contract_id"] for c, _ in index.expiring(TODAY, 30)] == [2]
+
+    def test_sync_counts_only_moved_contracts(self):
+        contracts = [_contract(i, i) for i in range(1, 11)]
+        index = ContractExpiryIndex(contracts)
+        updated = [dict(c) for c in contracts]
+        updated[0]["details"] = "edited"  # record refreshed, not moved
+        updated[1] = _contract(2, 100)
+        del updated[2]
+        updated.append(_contract(11, 3))
+        assert index.sync(updated) == 3
+        expiring = index.expiring(TODAY, 30)
+        assert expiring[0][0]["details"] == "edited"
+        assert [c["contract_id"] for c, _ in expiring] == [1, 11, 4, 5, 6, 7, 8, 9, 10]
+
+    def test_random_edits_match_a_full_scan(self):
+        rng = random.Random(7)
+        contracts = {i: _contract(i, rng.randint(-20, 120)) for i in range(1, 300)}
+        index = ContractExpiryIndex(contracts.values())
+        for step in range(400):
+            contract_id = rng.randint(1, 320)
+            roll = rng.random()
+            if roll < 0.2:
+                contracts.pop(contract_id, None)
+            elif roll < 0.3:
+                contracts[contract_id] = _contract(contract_id, end_date="")
+            else:
+                contracts[contract_id] = _contract(contract_id, rng.randint(-20, 120))
+            if step % 50 == 0:
+                index.sync(list(contracts.values()))
+            elif contract_id in contracts:
+                index.upsert(contracts[contract_id])
+            else:
+                index.remove(contract_id)
+            window = rng.randint(0, 90)
+            found = sorted(c["contract_id"] for c, _ in index.expiring(TODAY, window))
+            assert found == _scan(contracts.values(), TODAY, window)
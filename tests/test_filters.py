@@ -0,0 +1,116 @@
+"""Tests for record filters and their pushdown into the stores."""
+import os
+
+import pytest
+
+from crm.persistence.filters import Condition, compile_predicate, parse_filters
+from crm.persistence.json_store import JsonDataStore
+from crm.persistence.paging import PageQuery, page_in_memory
+from crm.persistence.sqlite_store import SqliteDataStore
+
+
+def _contract(contract_id, payment, end_date, status, is_approved, deal_id=None):
+    return {
+        "contract_id": contract_id, "deal_id": deal_id, "details": "", "payment": payment,
+        "agency_percentage": 10.0, "start_date": "2026-01-01", "end_date": end_date,
+        "status": status, "is_approved": is_approved,
+    }
+
+
+CONTRACTS = [
+    _contract(1, 1000.0, "2026-03-31", "Pending", False, deal_id=7),
+    _contract(2, 5000.0, "2026-06-30", "Signed", True),
+    _contract(3, 7500.5, "2026-12-31", "Signed", True, deal_id=8),
+    _contract(4, 200.0, "2027-01-31", "Cancelled", False),
+    _contract(5, 5000.0, "2026-06-01", "5000", False),
+]
+
+
+class TestParseFilters:
+    def test_parses_operators(self):
+        assert parse_filters([
+            ("is_approved", "true"), ("status__in", "Pending, Signed"), ("payment__gte", "5000"),
+        ]) == (
+            Condition("is_approved", "eq", ("true",)),
+            Condition("status", "in", ("Pending", "Signed")),
+            Condition("payment", "gte", ("5000",)),
+        )
+
+    @pytest.mark.parametrize("name", ["payment__between", "bad-field", "__lt"])
+    def test_rejects_bad_names(self, name):
+        with pytest.raises(ValueError):
+            parse_filters([(name, "1")])
+
+
+def _ids(records):
+    return [r["contract_id"] for r in records]
+
+
+def _match(*args):
+    predicate = compile_predicate(parse_filters(args))
+    return _ids(r for r in CONTRACTS if predicate(r))
+
+
+class TestPredicate:
+    def test_text_values_match_the_field_type(self):
+        assert _match(("payment", "5000")) == [2, 5]
+        assert _match(("status", "5000")) == [5]
+        assert _match(("is_approved", "true")) == [2, 3]
+
+    def test_ranges_only_compare_like_types(self):
+        assert _match(("payment__gt", "1000")) == [2, 3, 5]
+        assert _match(("end_date__lt", "2026-07-01")) == [1, 2, 5]
+        assert _match(("end_date__gte", "2026-06-30"), ("end_date__lte", "2026-12-31")) == [2, 3]
+
+    def test_null_matches_missing_values(self):
+        assert _match(("deal_id", "null")) == [2, 4, 5]
+        assert _match(("deal_id__in", "7,null")) == [1, 2, 4, 5]
+        assert _match(("deal_id__lt", "null")) == []
+
+    def test_typed_values_match_only_their_type(self):
+        predicate = compile_predicate([Condition("status", "eq", (5000,))])
+        assert _ids(r for r in CONTRACTS if predicate(r)) == []
+
+
+@pytest.fixture(params=["json", "sqlite", "memory"])
+def page(request, tmp_path):
+    """Return a ``PageQuery -> records`` callable over CONTRACTS for each backend."""
+    if request.param == "memory":
+        return lambda query: page_in_memory(CONTRACTS, "contract_id", query)
+    if request.param == "json":
+        store = JsonDataStore(os.path.join(str(tmp_path), "data.json"), cache=True)
+    else:
+        store = SqliteDataStore(f"sqlite:///{os.path.join(str(tmp_path), 'crm.db')}")
+        store.ensure_schema()
+    data = store.load()
+    data["contracts"] = [dict(c) for c in CONTRACTS]
+    store.save(data)
+    return lambda query: store.page_records("contracts", query)
+
+
+class TestPushdown:
+    @pytest.mark.parametrize("args", [
+        [("payment", "5000")],
+        [("status", "5000")],
+        [("is_approved", "false")],
+        [("status__in", "Signed,Cancelled")],
+        [("payment__gte", "5000"), ("end_date__lt", "2026-12-31")],
+        [("deal_id", "null")],
+        [("deal_id__in", "8,null")],
+        [("missing_field", "null")],
+        [("missing_field__gt", "1")],
+    ])
+    def test_backends_agree_with_the_predicate(self, page, args):
+        assert _ids(page(PageQuery(filters=parse_filters(args)))) == _match(*args)
+
+    def test_filters_combine_with_scope_sort_and_limit(self, page):
+        query = PageQuery(
+            sort="payment", descending=True, limit=2, ids=frozenset({2, 3, 4, 5}),
+            filters=parse_filters([("payment__gte", "1000")]),
+        )
+        rows = page(query)
+        assert _ids(rows) == [3, 5]
+        rest = page(PageQuery(
+            sort="payment", descending=True, after=(5000.0, 5), limit=2, ids=query.ids, filters=query.filters,
+        ))
+        assert _ids(rest) == [2]
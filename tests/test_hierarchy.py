@@ -0,0 +1,106 @@
+import random
+
+import pytest
+
+from crm.policies.hierarchy import OrgHierarchy
+
+
+def _emp(employee_id, manager_id=0):
+    return {"employee_id": employee_id, "manager_id": manager_id}
+
+
+def _walk_reports(employees, manager_id):
+    """Reference implementation: repeated tree walk."""
+    children = {}
+    for e in employees:
+        children.setdefault(e["manager_id"], []).append(e["employee_id"])
+    found, stack = set(), list(children.get(manager_id, []))
+    while stack:
+        eid = stack.pop()
+        if eid not in found:
+            found.add(eid)
+            stack.extend(children.get(eid, []))
+    return found
+
+
+@pytest.fixture
+def tree():
+    # 1 -> 2 -> 3 -> 4, 1 -> 5
+    return OrgHierarchy([_emp(1), _emp(2, 1), _emp(3, 2), _emp(4, 3), _emp(5, 1)])
+
+
+class TestQueries:
+    def test_reports_at_any_depth(self, tree):
+        assert tree.reports(1) == {2, 3, 4, 5}
+        assert tree.reports(2) == {3, 4}
+        assert tree.reports(4) == frozenset()
+        assert tree.direct_reports(1) == {2, 5}
+
+    def test_is_ancestor(self, tree):
+        assert tree.is_ancestor(1, 4)
+        assert tree.is_ancestor(3, 4)
+        assert not tree.is_ancestor(4, 1)
+        assert not tree.is_ancestor(5, 4)
+        assert not tree.is_ancestor(4, 4)
+        assert tree.depth(4) == 3
+
+    def test_unknown_manager_is_a_root(self):
+        tree = OrgHierarchy([_emp(1, 99), _emp(2, 1)])
+        assert tree.manager_of(1) is None
+        assert tree.reports(1) == {2}
+
+
+class TestIncrementalUpdates:
+    def test_add_leaf(self, tree):
+        tree.add(6, 4)
+        assert tree.ancestors(6) == {1, 2, 3, 4}
+        assert 6 in tree.reports(2)
+
+    def test_move_subtree(self, tree):
+        tree.move(3, 5)
+        assert tree.reports(2) == frozenset()
+        assert tree.reports(5) == {3, 4}
+        assert tree.ancestors(4) == {1, 5, 3}
+
+    def test_move_rejects_cycles(self, tree):
+        with pytest.raises(ValueError):
+            tree.move(2, 4)
+        assert tree.reports(1) == {2, 3, 4, 5}
+
+    def test_remove_promotes_reports_to_roots(self, tree):
+        tree.remove(2)
+        assert 2 not in tree
+        assert tree.manager_of(3) is None
+        assert tree.reports(1) == {5}
+        assert tree.reports(3) == {4}
+
+    def test_sync_applies_only_the_difference(self, tree):
+        employees = [_emp(1), _emp(2, 1), _emp(3, 5), _emp(4, 3), _emp(5, 1), _emp(6, 4)]
+        assert tree.sync(employees) == 2  # add 6, move 3
+        assert tree.sync(employees) == 0
+        assert tree.reports(5) == {3, 4, 6}
+
+    def test_sync_breaks_cycles_in_data(self):
+        tree = OrgHierarchy([_emp(1, 2), _emp(2, 1)])
+        assert len(tree) == 2
+        assert not (tree.is_ancestor(1, 2) and tree.is_ancestor(2, 1))
+        assert tree.sync([_emp(1, 2), _emp(2, 1)]) == 0
+
+    def test_matches_tree_walk_after_random_edits(self):
+        rng = random.Random(7)
+        employees = {1: _emp(1)}
+        tree = OrgHierarchy(employees.values())
+        for _ in range(300):
+            ids = list(employees)
+            if rng.random() < 0.6 or len(ids) < 3:
+                new_id = max(ids) + 1
+                employees[new_id] = _emp(new_id, rng.choice(ids))
+            else:
+                eid = rng.choice(ids)
+                candidate = rng.choice(ids)
+                if candidate == eid or candidate in _walk_reports(employees.values(), eid):
+                    continue
+                employees[eid] = _emp(eid, candidate)
+            tree.sync(employees.values())
+            for eid in rng.sample(list(employees), min(3, len(employees))):
+                assert tree.reports(eid) == _walk_reports(employees.values(), eid)
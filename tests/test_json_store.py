@@ -0,0 +1,282 @@
+"""Tests for JsonDataStore snapshot caching."""
+import json
+import os
+
+import pytest
+
+from crm.persistence.json_store import JsonDataStore
+
+
+@pytest.fixture
+def cached_store(tmp_path):
+    filepath = os.path.join(str(tmp_path), "data.json")
+    store = JsonDataStore(filepath, cache=True)
+    data = store.load()
+    data["brands"].append({"brand_id": 1, "name": "Acme"})
+    store.save(data)
+    return store
+
+
+class TestSnapshotCache:
+    def test_load_returns_isolated_copies(self, cached_store):
+        first = cached_store.load()
+        first["brands"][0]["name"] = "Mutated"
+        first["brands"].append({"brand_id": 2, "name": "Leaked"})
+        second = cached_store.load()
+        assert second["brands"] == [{"brand_id": 1, "name": "Acme"}]
+
+    def test_snapshot_is_read_only(self, cached_store):
+        view = cached_store.snapshot()
+        assert view["brands"][0]["name"] == "Acme"
+        with pytest.raises(TypeError):
+            view["brands"][0]["name"] = "Mutated"
+        with pytest.raises(AttributeError):
+            view["brands"].append({})
+
+    def test_snapshot_is_shared_while_file_unchanged(self, cached_store):
+        assert cached_store.snapshot() is cached_store.snapshot()
+
+    def test_unchanged_file_is_not_reparsed(self, cached_store, monkeypatch):
+        cached_store.load()
+        calls = []
+        original = json.load
+        monkeypatch.setattr(json, "load", lambda f: calls.append(1) or original(f))
+        for _ in range(5):
+            cached_store.load()
+            cached_store.snapshot()
+        assert calls == []
+
+    def test_external_write_is_picked_up(self, cached_store):
+        cached_store.load()
+        other = JsonDataStore(cached_store._filepath)
+        data = other.load()
+        data["brands"].append({"brand_id": 2, "name": "Globex Corporation"})
+        other.save(data)
+        names = [b["name"] for b in cached_store.load()["brands"]]
+        assert names == ["Acme", "Globex Corporation"]
+
+    def test_save_refreshes_cache(self, cached_store):
+        data = cached_store.load()
+        data["brands"][0]["name"] = "Renamed"
+        cached_store.save(data)
+        data["brands"][0]["name"] = "Changed after save"
+        assert cached_store.snapshot()["brands"][0]["name"] == "Renamed"
+
+    def test_collection_versions_follow_content(self, cached_store):
+        before = cached_store.collection_versions(["brands", "deals"])
+        data = cached_store.load()
+        data["deals"].append({"deal_id": 5, "brand_id": 1})
+        cached_store.save(data)
+        after = cached_store.collection_versions(["brands", "deals"])
+        assert after["brands"] == before["brands"]
+        assert after["deals"][0] != before["deals"][0]
+        # Another process rewriting the same content keeps the version.
+        other = JsonDataStore(cached_store._filepath)
+        other.save(other.load() | {"_next_id": 99})
+        assert cached_store.collection_versions(["brands", "deals"]) == after
+
+    def test_uncached_store_reads_from_disk(self, tmp_path):
+        store = JsonDataStore(os.path.join(str(tmp_path), "data.json"))
+        data = store.load()
+        data["brands"].append({"brand_id": 1, "name": "Acme"})
+        store.save(data)
+        assert store.snapshot()["brands"][0]["name"] == "Acme"
+        assert store.load() is not store.load()
+
+
+class TestDiffBasedSave:
+    def test_unchanged_save_skips_the_write(self, cached_store):
+        data = cached_store.load()
+        before = os.stat(cached_store._filepath).st_mtime_ns
+        os.utime(cached_store._filepath, ns=(before - 10**9, before - 10**9))
+        cached_store.save(data)
+        assert os.stat(cached_store._filepath).st_mtime_ns == before - 10**9
+
+    def test_changed_save_is_written(self, cached_store):
+        data = cached_store.load()
+        data["brands"][0]["name"] = "Renamed"
+        cached_store.save(data)
+        with open(cached_store._filepath) as f:
+            assert json.load(f)["brands"][0]["name"] == "Renamed"
+
+    @pytest.mark.parametrize("cache", [True, False])
+    def test_interleaved_loads_keep_both_edits(self, tmp_path, cache):
+        store = JsonDataStore(os.path.join(str(tmp_path), "data.json"), cache=cache)
+        data = store.load()
+        data["brands"] = [{"brand_id": 1, "name": "A"}, {"brand_id": 2, "name": "B"}]
+        store.save(data)
+        first, second = store.load(), store.load()
+        second["brands"][0]["name"] = "Second"
+        store.save(second)
+        first["brands"][1]["name"] = "First"
+        store.save(first)
+        assert [b["name"] for b in store.load()["brands"]] == ["Second", "First"]
+
+
+@pytest.fixture
+def journaled(tmp_path):
+    filepath = os.path.join(str(tmp_path), "data.json")
+    store = JsonDataStore(filepath, journal=True)
+    data = store.load()
+    data["brands"] = [{"brand_id": i, "name": f"Brand {i}"} for i in range(1, 4)]
+    store.save(data)
+    store.compact()
+    return store
+
+
+def _read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+class TestJournal:
+    def test_save_appends_only_the_change(self, journaled):
+        data = journaled.load()
+        data["brands"][1]["name"] = "Renamed"
+        journaled.save(data)
+        with open(journaled._wal_path) as f:
+            lines = f.readlines()
+        assert len(lines) == 1
+        assert json.loads(lines[0])["changes"] == [
+            ["update", "brands", 2, {"brand_id": 2, "name": "Renamed"}],
+        ]
+        assert _read_json(journaled._filepath)["brands"][1]["name"] == "Brand 2"
+
+    def test_load_replays_journal(self, journaled):
+        data = journaled.load()
+        data["brands"].pop(0)
+        data["brands"].append({"brand_id": 9, "name": "New"})
+        data["_next_id"] = 9
+        journaled.save(data)
+        reopened = JsonDataStore(journaled._filepath, journal=True).load()
+        assert [b["brand_id"] for b in reopened["brands"]] == [2, 3, 9]
+        assert reopened["_next_id"] == 9
+
+    def test_torn_final_line_is_ignored(self, journaled):
+        data = journaled.load()
+        data["brands"][0]["name"] = "Committed"
+        journaled.save(data)
+        with open(journaled._wal_path, "a") as f:
+            f.write('{"changes": [["delete", "brands", 1')
+        reopened = JsonDataStore(journaled._filepath, journal=True).load()
+        assert reopened["brands"][0]["name"] == "Committed"
+
+    def test_compaction_folds_journal_into_checkpoint(self, journaled):
+        data = journaled.load()
+        data["brands"][2]["name"] = "Compacted"
+        journaled.save(data)
+        journaled.compact()
+        assert not os.path.exists(journaled._wal_path)
+        assert _read_json(journaled._filepath)["brands"][2]["name"] == "Compacted"
+        assert not [n for n in os.listdir(os.path.dirname(journaled._filepath)) if n.endswith(".tmp")]
+
+    def test_journal_is_compacted_past_threshold(self, tmp_path):
+        store = JsonDataStore(os.path.join(str(tmp_path), "data.json"), journal=True, compact_bytes=500)
+        for i in range(20):
+            data = store.load()
+            data["brands"].append({"brand_id": i, "name": f"Brand {i}"})
+            store.save(data)
+        wal_size = os.path.getsize(store._wal_path) if os.path.exists(store._wal_path) else 0
+        assert wal_size < 500
+        assert len(_read_json(store._filepath)["brands"]) >= 10
+        assert len(store.load()["brands"]) == 20
+
+    def test_cached_store_sees_journal_appends(self, journaled):
+        cached = JsonDataStore(journaled._filepath, cache=True, journal=True)
+        assert cached.snapshot()["brands"][0]["name"] == "Brand 1"
+        data = journaled.load()
+        data["brands"][0]["name"] = "From another worker"
+        journaled.save(data)
+        assert cached.snapshot()["brands"][0]["name"] == "From another worker"
+
+    def test_replay_is_idempotent(self, journaled):
+        data = journaled.load()
+        data["brands"].pop()
+        data["brands"].append({"brand_id": 7, "name": "Seven"})
+        journaled.save(data)
+        with open(journaled._wal_path) as f:
+            entry = f.read()
+        journaled.compact()
+        with open(journaled._wal_path, "w") as f:
+            f.write(entry)  # crash between rename and journal removal
+        assert [b["brand_id"] for b in JsonDataStore(journaled._filepath, journal=True).load()["brands"]] == [1, 2, 7]
+
+
+def _add_brands(filepath, journal, worker, count):
+    from crm.persistence.repositories import BrandRepository
+
+    repo = BrandRepository(JsonDataStore(filepath, cache=True, journal=journal))
+    for i in range(count):
+        repo.add({"name": f"w{worker}-{i}"})
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+class TestConcurrentWriters:
+    @pytest.mark.parametrize("journal", [False, True])
+    def test_parallel_workers_lose_no_updates(self, tmp_path, journal):
+        import multiprocessing
+
+        filepath = os.path.join(str(tmp_path), "data.json")
+        JsonDataStore(filepath).load()
+        ctx = multiprocessing.get_context("fork")
+        workers = [ctx.Process(target=_add_brands, args=(filepath, journal, w, 25)) for w in range(4)]
+        for p in workers:
+            p.start()
+        for p in workers:
+            p.join()
+            assert p.exitcode == 0
+
+        brands = JsonDataStore(filepath, journal=journal).load()["brands"]
+        assert len(brands) == 100
+        assert len({b["brand_id"] for b in brands}) == 100
+        assert {b["name"] for b in brands} == {f"w{w}-{i}" for w in range(4) for i in range(25)}
+
+    @pytest.mark.parametrize("journal", [False, True])
+    def test_parallel_workers_keep_kpi_counters(self, tmp_path, journal):
+        import multiprocessing
+
+        from crm.persistence.kpis import KPI_KEY, count_kpis
+
+        filepath = os.path.join(str(tmp_path), "data.json")
+        seed = JsonDataStore(filepath)
+        data = seed.load()
+        data[KPI_KEY] = count_kpis(data)
+        seed.save(data)
+        ctx = multiprocessing.get_context("fork")
+        workers = [ctx.Process(target=_add_brands, args=(filepath, journal, w, 25)) for w in range(4)]
+        for p in workers:
+            p.start()
+        for p in workers:
+            p.join()
+            assert p.exitcode == 0
+
+        assert JsonDataStore(filepath, journal=journal).load()[KPI_KEY]["brands"] == 100
+
+    @pytest.mark.parametrize("journal", [False, True])
+    def test_parallel_workers_keep_activity_events(self, tmp_path, journal):
+        import multiprocessing
+
+        from crm.persistence.activity import ACTIVITY_KEY
+
+        filepath = os.path.join(str(tmp_path), "data.json")
+        seed = JsonDataStore(filepath)
+        data = seed.load()
+        data[ACTIVITY_KEY] = {"seq": 0, "events": []}
+        seed.save(data)
+        ctx = multiprocessing.get_context("fork")
+        workers = [ctx.Process(target=_add_brands, args=(filepath, journal, w, 20)) for w in range(4)]
+        for p in workers:
+            p.start()
+        for p in workers:
+            p.join()
+            assert p.exitcode == 0
+
+        feed = JsonDataStore(filepath, journal=journal).load()[ACTIVITY_KEY]
+        assert feed["seq"] == 80
+        assert [e["seq"] for e in feed["events"]] == list(range(1, 81))
+
+    def test_next_id_is_unique_across_stale_snapshots(self, tmp_path):
+        filepath = os.path.join(str(tmp_path), "data.json")
+        first, second = JsonDataStore(filepath), JsonDataStore(filepath)
+        a, b = first.load(), second.load()
+        assert first.next_id(a) != second.next_id(b)
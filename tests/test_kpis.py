@@ -0,0 +1,115 @@
+"""Tests for the materialized dashboard KPI counters."""
+import os
+
+import pytest
+
+from crm.persistence.json_store import JsonDataStore
+from crm.persistence.kpis import KPI_KEY, count_kpis, kpi_deltas, reconcile_kpis
+from crm.persistence.repositories import BrandRepository, DealRepository
+from crm.persistence.sqlite_store import SqliteDataStore
+from crm.persistence.unit_of_work import UnitOfWork
+from crm.services.dashboard_service import DashboardService
+
+
+def _seed(store):
+    data = store.load()
+    data["brands"] = [{"brand_id": 1, "name": "A"}, {"brand_id": 2, "name": "B"}]
+    data["deals"] = [
+        {"deal_id": 3, "creator_id": 9, "brand_id": 1, "is_active": True},
+        {"deal_id": 4, "creator_id": 9, "brand_id": 2, "is_active": False},
+    ]
+    data["_next_id"] = 10
+    store.save(data)
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "json":
+        store = JsonDataStore(os.path.join(str(tmp_path), "data.json"))
+    else:
+        store = SqliteDataStore(f"sqlite:///{os.path.join(str(tmp_path), 'crm.db')}")
+        store.ensure_schema()
+    _seed(store)
+    reconcile_kpis(store)
+    return store
+
+
+def _kpis(store):
+    return store.load()[KPI_KEY]
+
+
+class TestCounting:
+    def test_count_kpis(self):
+        data = {"creators": [{}], "brands": [{}, {}], "contracts": [],
+                "deals": [{"is_active": True}, {"is_active": False}, {}]}
+        assert count_kpis(data) == {"creators": 1, "brands": 2, "active_deals": 1, "contracts": 0}
+
+    def test_deltas(self):
+        assert kpi_deltas("brands", None, {"brand_id": 1}) == {"brands": 1}
+        assert kpi_deltas("brands", {"brand_id": 1}, {"brand_id": 1}) == {}
+        assert kpi_deltas("deals", {"is_active": False}, {"is_active": True}) == {"active_deals": 1}
+        assert kpi_deltas("deals", {"is_active": True}, None) == {"active_deals": -1}
+        assert kpi_deltas("persons", None, {"person_id": 1}) == {}
+
+
+class TestRepositoryMaintenance:
+    def test_reconcile_seeds_counters(self, store):
+        assert _kpis(store) == {"creators": 0, "brands": 2, "active_deals": 1, "contracts": 0}
+        assert reconcile_kpis(store) == {}
+
+    def test_writes_adjust_counters(self, store):
+        brands = BrandRepository(store)
+        deals = DealRepository(store)
+        brands.add({"name": "C"})
+        deals.update("deal_id", 4, {"is_active": True})
+        deals.add({"creator_id": 9, "brand_id": 1, "is_active": True})
+        brands.delete("brand_id", 1)
+        deals.delete("deal_id", 3)
+        assert _kpis(store) == {"creators": 0, "brands": 2, "active_deals": 2, "contracts": 0}
+        assert _kpis(store) == count_kpis(store.load())
+
+    def test_writes_through_unit_of_work(self, store):
+        uow = UnitOfWork(store)
+        DealRepository(uow).update("deal_id", 3, {"is_active": False})
+        BrandRepository(uow).add({"name": "C"})
+        uow.commit()
+        assert _kpis(store)["active_deals"] == 0
+        assert _kpis(store)["brands"] == 3
+
+    def test_concurrent_units_of_work_add_up(self, store):
+        first, second = UnitOfWork(store), UnitOfWork(store)
+        first.load(), second.load()  # both hold the same, soon stale, counters
+        BrandRepository(first).add({"name": "C"})
+        BrandRepository(second).add({"name": "D"})
+        first.commit()
+        second.commit()
+        assert _kpis(store)["brands"] == 4
+        assert _kpis(store) == count_kpis(store.load())
+
+    def test_reconcile_corrects_drift(self, store):
+        data = store.load()
+        data["brands"].append({"brand_id": 7, "name": "Imported"})
+        store.save(data)
+        assert reconcile_kpis(store) == {"brands": (2, 3)}
+        assert _kpis(store)["brands"] == 3
+
+
+    def test_reconcile_keeps_writes_made_after_its_recount(self, store, monkeypatch):
+        data = store.load()
+        data["brands"].append({"brand_id": 7, "name": "Imported"})
+        store.save(data)
+        recounted = store.load()
+        BrandRepository(store).add({"name": "Meanwhile"})
+        monkeypatch.setattr(store, "load", lambda: recounted)
+        assert reconcile_kpis(store) == {"brands": (2, 3)}
+        monkeypatch.undo()
+        assert _kpis(store)["brands"] == 4
+
+
+class TestDashboardReadsCounters:
+    def test_cards_use_stored_counters(self, store):
+        data = store.load()
+        data[KPI_KEY] = {"creators": 40, "brands": 41, "active_deals": 42, "contracts": 43}
+        store.save(data)
+        cards = {c["id"]: c["value"] for c in DashboardService(store).build(user={})["cards"]}
+        assert cards == {"talent": 40, "brands": 41, "active_deals": 42, "contracts": 43}
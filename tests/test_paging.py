@@ -0,0 +1,99 @@
+"""Tests for keyset paging (``PageQuery`` / ``page_records``)."""
+import os
+
+import pytest
+
+from crm.persistence.json_store import JsonDataStore
+from crm.persistence.paging import PageQuery, SortedRecords, page_in_memory
+from crm.persistence.sqlite_store import SqliteDataStore
+
+BRANDS = [
+    {"brand_id": 1, "name": "Delta", "industry": "", "website": "", "notes": "", "created_at": "2026-03-01"},
+    {"brand_id": 2, "name": "Alpha", "industry": "", "website": "", "notes": "", "created_at": None},
+    {"brand_id": 3, "name": "Charlie", "industry": "", "website": "", "notes": "", "created_at": "2026-01-01"},
+    {"brand_id": 4, "name": "Alpha", "industry": "", "website": "", "notes": "", "created_at": "2026-03-01"},
+    {"brand_id": 5, "name": "Bravo", "industry": "", "website": "", "notes": "", "created_at": None},
+]
+
+
+def _walk(page, sort=None, descending=False, limit=2, ids=None):
+    """Page through with *page* (a ``PageQuery -> records`` callable); return the IDs."""
+    seen, after = [], None
+    while True:
+        rows = page(PageQuery(sort, descending, after, limit, ids))
+        seen.extend(r["brand_id"] for r in rows)
+        if len(rows) < limit:
+            return seen
+        last = rows[-1]
+        after = (last.get(sort or "brand_id"), last["brand_id"])
+
+
+class TestSortedRecords:
+    def test_pages_by_id_by_default(self):
+        order = SortedRecords(BRANDS, "brand_id")
+        assert _walk(order.page) == [1, 2, 3, 4, 5]
+        assert _walk(order.page, descending=True) == [5, 4, 3, 2, 1]
+
+    def test_sort_field_breaks_ties_on_id(self):
+        order = SortedRecords(BRANDS, "brand_id", "name")
+        assert _walk(order.page, sort="name") == [2, 4, 5, 3, 1]
+        assert _walk(order.page, sort="name", descending=True) == [1, 3, 5, 4, 2]
+
+    def test_none_sorts_first_ascending_and_last_descending(self):
+        order = SortedRecords(BRANDS, "brand_id", "created_at")
+        assert _walk(order.page, sort="created_at") == [2, 5, 3, 1, 4]
+        assert _walk(order.page, sort="created_at", descending=True) == [4, 1, 3, 5, 2]
+
+    def test_ids_restrict_the_page(self):
+        def page(query):
+            return page_in_memory(BRANDS, "brand_id", query)
+
+        assert _walk(page, sort="name", ids=frozenset({1, 4, 5})) == [4, 5, 1]
+        assert page(PageQuery(ids=frozenset())) == []
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "json":
+        store = JsonDataStore(os.path.join(str(tmp_path), "data.json"), cache=True)
+    else:
+        store = SqliteDataStore(f"sqlite:///{os.path.join(str(tmp_path), 'crm.db')}")
+        store.ensure_schema()
+    data = store.load()
+    data["brands"] = [dict(b) for b in BRANDS]
+    store.save(data)
+    return store
+
+
+class TestPageRecords:
+    @pytest.mark.parametrize(("sort", "descending"), [
+        (None, False), (None, True), ("name", False), ("name", True),
+        ("created_at", False), ("created_at", True),
+    ])
+    def test_backends_agree_with_in_memory_order(self, store, sort, descending):
+        expected = _walk(SortedRecords(BRANDS, "brand_id", sort).page, sort, descending, limit=10)
+        for limit in (1, 2, 3):
+            page = lambda query: store.page_records("brands", query)
+            assert _walk(page, sort, descending, limit) == expected
+
+    @pytest.mark.parametrize("sort", [None, "name", "created_at"])
+    def test_iter_records_streams_the_whole_order(self, store, sort):
+        expected = _walk(SortedRecords(BRANDS, "brand_id", sort).page, sort, True, limit=10)
+        rows = store.iter_records("brands", PageQuery(sort=sort, descending=True), chunk_size=2)
+        assert [r["brand_id"] for r in rows] == expected
+
+    def test_scope_is_applied(self, store):
+        rows = store.page_records("brands", PageQuery(sort="name", ids=frozenset({3, 5})))
+        assert [r["brand_id"] for r in rows] == [5, 3]
+
+    def test_unknown_field_sorts_by_id(self, store):
+        page = lambda query: store.page_records("brands", query)
+        assert _walk(page, sort="nope") == [1, 2, 3, 4, 5]
+
+    def test_pages_follow_writes(self, store):
+        store.page_records("brands", PageQuery(sort="name"))
+        data = store.load()
+        data["brands"][0]["name"] = "Aardvark"
+        store.save(data)
+        rows = store.page_records("brands", PageQuery(sort="name", limit=1))
+        assert rows[0]["brand_id"] == 1
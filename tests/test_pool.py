@@ -0,0 +1,155 @@
+"""Tests for the PostgreSQL connection pool."""
+from __future__ import annotations
+
+import os
+import threading
+import time
+
+import pytest
+
+from crm.persistence.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self, n: int):
+        self.n = n
+        self.closed = False
+        self.commits = 0
+        self.rollbacks = 0
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+class Factory:
+    def __init__(self):
+        self.made: list[FakeConnection] = []
+
+    def __call__(self):
+        conn = FakeConnection(len(self.made))
+        self.made.append(conn)
+        return conn
+
+
+@pytest.fixture
+def factory():
+    return Factory()
+
+
+class TestConnectionPool:
+    def test_close_returns_connection_for_reuse(self, factory):
+        pool = ConnectionPool(factory, max_size=2)
+        conn = pool.getconn()
+        conn.commit()
+        conn.close()
+        conn.close()  # idempotent
+        again = pool.getconn()
+        assert again.raw is factory.made[0]
+        assert len(factory.made) == 1
+        assert pool.stats()["checkouts"] == 2
+
+    def test_context_manager_commits_and_returns(self, factory):
+        pool = ConnectionPool(factory)
+        with pool.getconn() as conn:
+            pass
+        assert factory.made[0].commits == 1
+        assert pool.stats()["idle"] == 1
+        with pytest.raises(ValueError):
+            with pool.getconn():
+                raise ValueError
+        assert factory.made[0].rollbacks == 1
+
+    def test_bounded_with_timeout(self, factory):
+        pool = ConnectionPool(factory, max_size=1, timeout=0.05)
+        held = pool.getconn()
+        with pytest.raises(PoolTimeout):
+            pool.getconn()
+        assert pool.stats()["timeouts"] == 1
+        held.close()
+        assert pool.getconn().raw is factory.made[0]
+
+    def test_waiters_are_woken_on_return(self, factory):
+        pool = ConnectionPool(factory, max_size=1, timeout=5)
+        held = pool.getconn()
+        threading.Timer(0.05, held.close).start()
+        conn = pool.getconn()
+        assert conn.raw is factory.made[0]
+        stats = pool.stats()
+        assert stats["waits"] == 1
+        assert stats["wait_time_max"] >= 0.04
+
+    def test_concurrent_checkouts_never_exceed_max(self, factory):
+        pool = ConnectionPool(factory, max_size=3, timeout=5)
+        peak = []
+        lock = threading.Lock()
+
+        def worker():
+            for _ in range(20):
+                conn = pool.getconn()
+                with lock:
+                    peak.append(pool.stats()["in_use"])
+                conn.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert max(peak) <= 3
+        assert len(factory.made) <= 3
+        assert pool.stats()["checkouts"] == 160
+
+    def test_idle_connections_expire_down_to_min_size(self, factory):
+        pool = ConnectionPool(factory, min_size=1, max_size=3, idle_timeout=0.01)
+        conns = [pool.getconn() for _ in range(3)]
+        for conn in conns:
+            conn.close()
+        time.sleep(0.03)
+        pool.getconn()
+        assert sum(c.closed for c in factory.made) == 2
+        assert pool.stats()["size"] == 1
+
+    def test_failed_health_check_replaces_connection(self, factory):
+        pool = ConnectionPool(factory, check_interval=0, check=lambda c: c.n > 0)
+        pool.getconn().close()
+        conn = pool.getconn()
+        assert conn.raw is factory.made[1]
+        assert factory.made[0].closed
+        assert pool.stats()["health_check_failures"] == 1
+
+    def test_reset_failure_discards_connection(self, factory):
+        pool = ConnectionPool(factory, reset=lambda c: False)
+        pool.getconn().close()
+        assert factory.made[0].closed
+        assert pool.stats()["size"] == 0
+
+    def test_reset_after_fork_drops_inherited_connections(self, factory):
+        pool = ConnectionPool(factory)
+        inherited = pool.getconn()
+        pool.getconn().close()
+        pool._pid = -1  # pretend we are now in a forked child
+        conn = pool.getconn()
+        assert conn.raw is factory.made[2]
+        assert not any(c.closed for c in factory.made[:2])
+        inherited.close()
+        assert pool.stats()["size"] == pool.stats()["idle"] + 1 == 1
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires os.fork")
+    def test_child_process_opens_its_own_connections(self, factory):
+        pool = ConnectionPool(factory)
+        pool.getconn().close()
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:  # child
+            ok = pool.stats()["size"] == 0 and pool.getconn().raw is not factory.made[0]
+            os.write(write_fd, b"1" if ok else b"0")
+            os._exit(0)
+        os.waitpid(pid, 0)
+        assert os.read(read_fd, 1) == b"1"
+        assert not factory.made[0].closed
@@ -0,0 +1,218 @@
+"""Tests for PostgresDataStore record-level operations.
+
+psycopg is patched with mocks, so these tests check the SQL issued rather
+than running it against a real database.
+"""
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import pytest
+
+from crm.persistence.activity import ACTIVITY_LIMIT
+from crm.persistence.changes import DELETE, UPDATE, RecordChange
+from crm.persistence.filters import parse_filters
+from crm.persistence.paging import PageQuery
+from crm.persistence.postgres_store import PostgresDataStore
+from crm.persistence.repositories import CreatorRepository
+from tests.test_postgres_schema import _make_mock_conn
+
+
+@pytest.fixture
+def pg():
+    mock_conn, mock_cur = _make_mock_conn()
+    with patch("crm.persistence.postgres_store.psycopg") as mock_psycopg:
+        mock_psycopg.connect.return_value = mock_conn
+        yield PostgresDataStore("postgresql://test"), mock_conn, mock_cur
+
+
+def _sql(mock_cur) -> list[str]:
+    return [c.args[0] for c in mock_cur.execute.call_args_list]
+
+
+class TestRecordOperations:
+    def test_query_uses_jsonb_field_operator(self, pg):
+        store, _conn, cur = pg
+        cur.fetchall.return_value = [({"creator_id": 3, "employee_id": 7},)]
+        rows = store.query_records("creators", {"employee_id": 7, "notes": None}, limit=5)
+        assert rows == [{"creator_id": 3, "employee_id": 7}]
+        sql, params = cur.execute.call_args.args
+        assert "NULLIF(data->'employee_id', 'null'::jsonb) = ANY(%s::jsonb[])" in sql
+        assert "NULLIF(data->'notes', 'null'::jsonb) IS NULL" in sql
+        assert "LIMIT %s" in sql
+        assert params == [["7"], 5]
+
+    def test_get_record_filters_on_primary_key_column(self, pg):
+        store, _conn, cur = pg
+        cur.fetchall.return_value = []
+        assert store.get_record("deals", 42) is None
+        sql, params = cur.execute.call_args.args
+        assert "WHERE deal_id = %s" in sql
+        assert params == [42, 1]
+
+    def test_update_merges_jsonb(self, pg):
+        store, conn, cur = pg
+        cur.fetchone.return_value = ({"brand_id": 1, "name": "New"},)
+        assert store.update_record("brands", 1, {"name": "New", "brand_id": 9}) == {"brand_id": 1, "name": "New"}
+        sql, params = cur.execute.call_args_list[0].args
+        assert "data = data || %s::jsonb" in sql
+        assert params == ['{"name": "New"}', 1]
+        conn.commit.assert_called_once()
+
+    def test_adjust_kpis_updates_counters_in_place(self, pg):
+        store, conn, cur = pg
+        store.adjust_kpis({"brands": 1, "active_deals": -1})
+        calls = cur.execute.call_args_list
+        assert len(calls) == 2
+        sql, params = calls[0].args
+        assert "jsonb_set(value, ARRAY[%s]" in sql
+        assert params == ["brands", "brands", 1, "_kpis"]
+        conn.commit.assert_called_once()
+
+    def test_append_activity_appends_and_trims_in_one_update(self, pg):
+        store, conn, cur = pg
+        store.append_activity({"entity": "deals", "id": 3}, limit=50)
+        sql, params = cur.execute.call_args.args
+        assert sql.startswith("UPDATE settings SET value = jsonb_build_object(")
+        assert "(value->'events') - 0" in sql
+        assert params == [50, '{"entity": "deals", "id": 3}', "_activity"]
+        conn.commit.assert_called_once()
+
+    def test_page_records_seeks_past_the_cursor(self, pg):
+        store, _conn, cur = pg
+        cur.fetchall.return_value = [({"brand_id": 4, "name": "Bravo"},)]
+        query = PageQuery(sort="name", after=("Acme", 3), limit=2, ids=frozenset({4}))
+        assert store.page_records("brands", query) == [{"brand_id": 4, "name": "Bravo"}]
+        sql, params = cur.execute.call_args.args
+        assert "brand_id = ANY(%s)" in sql
+        assert "NULLIF(data->'name', 'null'::jsonb) > %s::jsonb" in sql
+        assert sql.endswith("ORDER BY NULLIF(data->'name', 'null'::jsonb) ASC NULLS FIRST, brand_id ASC LIMIT %s")
+        assert params == [[4], '"Acme"', '"Acme"', 3, 2]
+
+    def test_page_records_by_id_descending(self, pg):
+        store, _conn, cur = pg
+        cur.fetchall.return_value = []
+        store.page_records("deals", PageQuery(descending=True, after=(9, 9), limit=5))
+        sql, params = cur.execute.call_args.args
+        assert sql == "SELECT data FROM deals WHERE deal_id < %s ORDER BY deal_id DESC LIMIT %s"
+        assert params == [9, 5]
+
+    def test_page_records_compiles_filters_to_jsonb(self, pg):
+        store, _conn, cur = pg
+        cur.fetchall.return_value = []
+        filters = parse_filters([("status__in", "Signed,null"), ("payment__gte", "5000")])
+        store.page_records("contracts", PageQuery(filters=filters))
+        sql, params = cur.execute.call_args.args
+        status = "NULLIF(data->'status', 'null'::jsonb)"
+        payment = "NULLIF(data->'payment', 'null'::jsonb)"
+        assert f"({status} = ANY(%s::jsonb[]) OR {status} IS NULL)" in sql
+        assert f"(jsonb_typeof({payment}) = %s AND {payment} >= %s::jsonb)" in sql
+        assert params == [['"Signed"', '"null"'], "string", '"5000"', "number", "5000"]
+
+    def test_field_names_are_quoted_literals(self, pg):
+        store, _conn, cur = pg
+        cur.fetchall.return_value = []
+        store.page_records("brands", PageQuery(sort="it's"))
+        sql, params = cur.execute.call_args.args
+        assert "ORDER BY NULLIF(data->'it''s', 'null'::jsonb) ASC" in sql
+        assert params == []
+
+    def test_queries_match_the_expression_indexes(self, pg):
+        store, _conn, cur = pg
+        store.ensure_schema()
+        index = next(sql for sql in _sql(cur) if "creators_employee_id_jsonb_idx" in sql)
+        assert index.endswith("ON creators ((NULLIF(data->'employee_id', 'null'::jsonb)))")
+        assert "DROP INDEX IF EXISTS creators_employee_id_idx" in _sql(cur)
+        cur.fetchall.return_value = []
+        store.query_records("creators", {"employee_id": 7})
+        assert "(NULLIF(data->'employee_id', 'null'::jsonb) = ANY(" in cur.execute.call_args.args[0]
+
+    def test_iter_records_streams_from_a_server_side_cursor(self, pg):
+        store, conn, cur = pg
+        cur.__iter__.return_value = iter([({"deal_id": 1},), ('{"deal_id": 2}',)])
+        rows = store.iter_records("deals", PageQuery(sort="pitch_date"), chunk_size=250)
+        assert list(rows) == [{"deal_id": 1}, {"deal_id": 2}]
+        conn.cursor.assert_called_once_with(name="deals_stream")
+        assert cur.itersize == 250
+        sql, params = cur.execute.call_args.args
+        assert "LIMIT" not in sql
+        assert "ORDER BY NULLIF(data->'pitch_date', 'null'::jsonb) ASC" in sql
+        assert params == []
+
+    def test_allocate_id_bumps_counter_in_place(self, pg):
+        store, _conn, cur = pg
+        cur.fetchone.return_value = (12,)
+        assert store.allocate_id() == 12
+        assert len(_sql(cur)) == 1
+
+
+class TestChangeBasedSave:
+    def test_only_changed_rows_are_written(self, pg):
+        store, conn, cur = pg
+        data = {"brands": [{"brand_id": i} for i in range(100)], "_next_id": 100}
+        store.save(data, changes=[
+            RecordChange(UPDATE, "brands", 5, {"brand_id": 5, "name": "Renamed"}),
+            RecordChange(DELETE, "deals", 8),
+        ])
+        statements = _sql(cur)
+        assert len(statements) == 4
+        assert statements[0].startswith("INSERT INTO brands")
+        assert statements[1].startswith("DELETE FROM deals WHERE deal_id")
+        assert "GREATEST" in statements[2]
+        assert "_data_version" in statements[3]
+        assert cur.execute.call_args_list[3].args[1][2] == ["brands", "deals"]
+        conn.commit.assert_called_once()
+
+    def test_save_changes_leaves_settings_alone(self, pg):
+        store, conn, cur = pg
+        store.save_changes([RecordChange(DELETE, "deals", 8)])
+        statements = _sql(cur)
+        assert len(statements) == 2
+        assert statements[0].startswith("DELETE FROM deals WHERE deal_id")
+        assert "_data_version" in statements[1]
+        conn.commit.assert_called_once()
+
+    def test_counters_move_by_deltas_in_the_same_transaction(self, pg):
+        store, conn, cur = pg
+        data = {"brands": [], "_kpis": {"brands": 0}, "_next_id": 5}
+        store.save(data, changes=[RecordChange(DELETE, "brands", 4)], kpi_deltas={"brands": -1})
+        statements = _sql(cur)
+        assert not any("_kpis" in str(c.args[1]) and "EXCLUDED" in c.args[0] for c in cur.execute.call_args_list)
+        kpi = next(c.args for c in cur.execute.call_args_list if "jsonb_set(value, ARRAY[%s]" in c.args[0])
+        assert kpi[1] == ["brands", "brands", -1, "_kpis"]
+        assert len(statements) == 4
+        conn.commit.assert_called_once()
+
+    def test_events_are_appended_in_the_same_transaction(self, pg):
+        store, conn, cur = pg
+        data = {"brands": [], "_activity": {"seq": 1, "events": []}, "_next_id": 5}
+        store.save(data, changes=[RecordChange(DELETE, "brands", 4)], events=[{"entity": "brands", "id": 4}])
+        assert not any("_activity" in str(c.args[1]) and "EXCLUDED" in c.args[0] for c in cur.execute.call_args_list)
+        feed = next(c.args for c in cur.execute.call_args_list if "jsonb_build_object(" in c.args[0])
+        assert feed[1] == [ACTIVITY_LIMIT, '{"entity": "brands", "id": 4}', "_activity"]
+        conn.commit.assert_called_once()
+
+    def test_repository_uses_record_queries(self, pg):
+        store, _conn, cur = pg
+        cur.fetchall.return_value = []
+        with patch.object(PostgresDataStore, "load", side_effect=AssertionError("full load")):
+            assert CreatorRepository(store).find_by("employee_id", 4) == []
+        assert "NULLIF(data->'employee_id', 'null'::jsonb) = ANY(%s::jsonb[])" in cur.execute.call_args.args[0]
+
+    def test_full_save_after_load_writes_only_the_diff(self, pg):
+        store, _conn, cur = pg
+        rows = {"brands": [({"brand_id": i, "name": f"B{i}"},) for i in range(50)]}
+        cur.fetchall.side_effect = lambda: rows.get(_sql(cur)[-1].split()[-1], [])
+        cur.fetchone.return_value = None
+        data = store.load()
+        assert len(data["brands"]) == 50
+        cur.execute.reset_mock()
+
+        data["brands"][3]["name"] = "Renamed"
+        store.save(data)
+        statements = _sql(cur)
+        assert [s.split(" (")[0] for s in statements] == [
+            "INSERT INTO brands",
+            "INSERT INTO settings",  # _next_id
+            "WITH bumped AS",  # _data_version, then the brands stamp
+        ]
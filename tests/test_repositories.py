@@ -0,0 +1,143 @@
+"""Tests for repository hash indexes."""
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from crm.persistence.json_store import JsonDataStore
+from crm.persistence.repositories import (
+    BrandRepository,
+    CreatorRepository,
+    UserRepository,
+)
+from crm.persistence.unit_of_work import ScopedStore
+
+
+@pytest.fixture
+def scoped(tmp_path):
+    store = JsonDataStore(os.path.join(str(tmp_path), "data.json"), cache=True)
+    data = store.load()
+    data["users"] = [
+        {"user_id": i, "username": f"user{i}", "password": "x", "role_id": 1, "person_id": i}
+        for i in range(1, 51)
+    ]
+    data["brands"] = [{"brand_id": 100 + i, "name": f"Brand {i}"} for i in range(10)]
+    data["_next_id"] = 200
+    store.save(data)
+    namespace = SimpleNamespace()
+    return ScopedStore(store, lambda: namespace), store
+
+
+class TestPrimaryKeyIndex:
+    def test_lookups_reuse_one_index_per_snapshot(self, scoped):
+        store, _backend = scoped
+        repo = UserRepository(store)
+        assert repo.get(7)["username"] == "user7"
+        state = repo._index_state
+        assert repo.get(42)["username"] == "user42"
+        assert repo.get_by_username("user13")["user_id"] == 13
+        assert repo.get(999) is None
+        assert repo._index_state is state
+
+    def test_returned_records_are_copies(self, scoped):
+        store, _backend = scoped
+        repo = BrandRepository(store)
+        brand = repo.get(101)
+        brand["name"] = "Mutated"
+        assert repo.get(101)["name"] == "Brand 1"
+
+    def test_add_update_delete_keep_index_current(self, scoped):
+        store, backend = scoped
+        repo = UserRepository(store)
+        repo.get(1)
+        created = repo.add({"username": "newbie", "password": "x", "role_id": 1, "person_id": 99})
+        assert repo.get(created["user_id"])["username"] == "newbie"
+        assert repo.get_by_username("newbie")["user_id"] == created["user_id"]
+
+        repo.update(UserRepository.ID_FIELD, created["user_id"], {"username": "renamed"})
+        assert repo.get_by_username("newbie") is None
+        assert repo.get_by_username("renamed")["user_id"] == created["user_id"]
+
+        assert repo.delete(UserRepository.ID_FIELD, 5) is True
+        assert repo.get(5) is None
+        assert repo.get_by_username("user5") is None
+        assert repo.delete(UserRepository.ID_FIELD, 5) is False
+
+        store.commit()
+        users = {u["user_id"]: u["username"] for u in backend.load()["users"]}
+        assert users[created["user_id"]] == "renamed"
+        assert 5 not in users
+
+    def test_writes_outside_repository_are_detected(self, scoped):
+        store, _backend = scoped
+        repo = BrandRepository(store)
+        assert repo.get(500) is None
+        data = store.load()
+        data["brands"].append({"brand_id": 500, "name": "Direct"})
+        store.save(data)
+        assert repo.get(500)["name"] == "Direct"
+        data["brands"] = [b for b in data["brands"] if b["brand_id"] != 500]
+        store.save(data)
+        assert repo.get(500) is None
+
+    def test_in_place_edit_to_a_new_key_is_found(self, scoped):
+        store, _backend = scoped
+        repo = UserRepository(store)
+        data = store.load()
+        assert repo.get_by_username("user3")["user_id"] == 3
+        next(u for u in data["users"] if u["user_id"] == 3)["username"] = "edited"
+        assert repo.get_by_username("edited")["user_id"] == 3
+        assert repo.get_by_username("user3") is None
+
+    def test_works_without_a_scope(self, tmp_path):
+        store = JsonDataStore(os.path.join(str(tmp_path), "plain.json"))
+        repo = BrandRepository(store)
+        brand = repo.add({"name": "Acme"})
+        assert repo.get(brand["brand_id"])["name"] == "Acme"
+        repo.update(BrandRepository.ID_FIELD, brand["brand_id"], {"name": "Acme 2"})
+        assert repo.get(brand["brand_id"])["name"] == "Acme 2"
+        assert repo.delete(BrandRepository.ID_FIELD, brand["brand_id"]) is True
+        assert repo.all() == []
+
+
+class TestSecondaryIndexes:
+    def _seed(self, store):
+        repo = CreatorRepository(store)
+        for i in range(12):
+            repo.add({"person_id": 1000 + i, "employee_id": i % 3, "description": f"C{i}"})
+        return repo
+
+    def test_find_by_matches_linear_scan(self, scoped):
+        store, _backend = scoped
+        repo = self._seed(store)
+        for employee_id in (0, 1, 2, 99):
+            expected = repo.find(lambda c: c.get("employee_id") == employee_id)
+            assert repo.find_by("employee_id", employee_id) == expected
+
+    def test_index_follows_writes(self, scoped):
+        store, _backend = scoped
+        repo = self._seed(store)
+        first = repo.find_by("employee_id", 0)[0]
+        repo.update(CreatorRepository.ID_FIELD, first["creator_id"], {"employee_id": 7})
+        assert first["creator_id"] not in {c["creator_id"] for c in repo.find_by("employee_id", 0)}
+        assert [c["creator_id"] for c in repo.find_by("employee_id", 7)] == [first["creator_id"]]
+
+        repo.delete(CreatorRepository.ID_FIELD, first["creator_id"])
+        assert repo.find_by("employee_id", 7) == []
+
+        added = repo.add({"person_id": 1, "employee_id": 7})
+        assert [c["creator_id"] for c in repo.find_by("employee_id", 7)] == [added["creator_id"]]
+
+    def test_in_place_edit_to_a_new_value_is_found(self, scoped):
+        store, _backend = scoped
+        repo = self._seed(store)
+        data = store.load()
+        assert repo.find_by("employee_id", 42) == []
+        creator = data["creators"][0]
+        creator["employee_id"] = 42
+        assert [c["creator_id"] for c in repo.find_by("employee_id", 42)] == [creator["creator_id"]]
+
+    def test_undeclared_field_falls_back_to_scan(self, scoped):
+        store, _backend = scoped
+        repo = self._seed(store)
+        assert [c["description"] for c in repo.find_by("description", "C4")] == ["C4"]
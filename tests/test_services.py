@@ -6,6 +6,8 @@ from crm.services.employee_service import EmployeeService
 from crm.services.creator_service import CreatorService
 from crm.services.deal_service import DealService
 from crm.services.contract_service import ContractService
+from crm.services.api_v1_service import ApiV1Service
+from crm.policies.visibility import VisibilityScope
 
 
 def _make_store(tmp_path: str) -> JsonDataStore:
@@ -141,3 +143,149 @@ class TestContractService:
         contract = svc.create_contract(5, "Details", 5000.0, 10.0, "2024-01-01", "2024-06-30", "Sent", True)
         data = store.load()
         assert any(c["contract_id"] == contract["contract_id"] for c in data["contracts"])
+
+
+class _CountingStore:
+    """Store wrapper counting full reads."""
+
+    def __init__(self, store):
+        self._store = store
+        self.reads = 0
+
+    def load(self):
+        self.reads += 1
+        return self._store.load()
+
+
+class _Policy:
+    """Grants every entity type except *hidden*; visibility from *ids*."""
+
+    def __init__(self, hidden=(), ids=None):
+        self._hidden = set(hidden)
+        self._scope = VisibilityScope(ids or {})
+        self.scopes = 0
+
+    def can_view(self, entity, user):
+        return entity not in self._hidden
+
+    def visibility_for(self, user):
+        self.scopes += 1
+        return self._scope
+
+
+class TestApiV1Service:
+    def _seed(self, store, creators=50):
+        data = store.load()
+        data["employees"].append({"employee_id": 1, "person_id": 1})
+        data["brands"].append({"brand_id": 2, "name": "Acme"})
+        for n in range(creators):
+            person_id, creator_id = 100 + n, 1000 + n
+            data["persons"].append({"person_id": person_id, "display_name": f"Creator {n}"})
+            data["creators"].append({"creator_id": creator_id, "person_id": person_id, "employee_id": 1})
+            data["deals"].append({"deal_id": 5000 + n, "creator_id": creator_id, "brand_id": 2})
+        store.save(data)
+
+    def test_list_reads_one_snapshot(self, store):
+        self._seed(store)
+        counting = _CountingStore(store)
+        svc = ApiV1Service(counting)
+        items = svc.list_for_user("creators", {}, _Policy(), ["person", "employee", "deals"])
+        assert counting.reads == 1
+        assert len(items) == 50
+        assert items[0]["name"] == "Creator 0"
+        assert items[0]["person"]["person_id"] == 100
+        assert items[0]["employee"]["employee_id"] == 1
+        assert [d["deal_id"] for d in items[0]["deals"]] == [5000]
+
+    def test_brand_deals_expansion(self, store):
+        self._seed(store, creators=3)
+        brand = ApiV1Service(store).get_for_user("brands", 2, {}, _Policy(), ["deals"])
+        assert [d["id"] for d in brand["deals"]] == [5000, 5001, 5002]
+
+    def test_expansions_respect_permissions_and_scope(self, store):
+        self._seed(store, creators=2)
+        policy = _Policy(hidden={"persons"}, ids={"employees": frozenset(), "deals": frozenset({5001})})
+        items = ApiV1Service(store).list_for_user("creators", {}, policy, ["person", "employee", "deals"])
+        assert [item["person"] for item in items] == [None, None]
+        assert [item["employee"] for item in items] == [None, None]
+        assert [[d["id"] for d in item["deals"]] for item in items] == [[], [5001]]
+
+    def test_pages_fetch_only_the_page(self, store):
+        self._seed(store)
+        counting = _CountingStore(store)
+        svc = ApiV1Service(counting)
+        seen, cursor = [], None
+        while True:
+            items, cursor = svc.page_for_user(
+                "creators", {}, _Policy(), limit=20, cursor=cursor, sort="-creator_id", fields=["name"]
+            )
+            seen.extend(items)
+            if cursor is None:
+                break
+        # Without page_records: per page, one read for the records and one for their persons.
+        assert counting.reads == 6
+        assert [item["id"] for item in seen] == list(range(1049, 999, -1))
+        assert set(seen[0]) == {"id", "name"}
+        assert seen[0]["name"] == "Creator 49"
+
+    def test_page_respects_scope(self, store):
+        self._seed(store, creators=5)
+        policy = _Policy(ids={"creators": frozenset({1001, 1003})})
+        items, cursor = ApiV1Service(store).page_for_user("creators", {}, policy, limit=1)
+        assert [item["id"] for item in items] == [1001]
+        items, cursor = ApiV1Service(store).page_for_user("creators", {}, policy, limit=1, cursor=cursor)
+        assert ([item["id"] for item in items], cursor) == ([1003], None)
+
+    def test_cursor_must_match_the_sort(self, store):
+        self._seed(store, creators=3)
+        svc = ApiV1Service(store)
+        _items, cursor = svc.page_for_user("creators", {}, _Policy(), limit=1, sort="description")
+        with pytest.raises(ValueError):
+            svc.page_for_user("creators", {}, _Policy(), limit=1, cursor=cursor)
+        with pytest.raises(ValueError):
+            svc.page_for_user("creators", {}, _Policy(), cursor="not-a-cursor")
+        with pytest.raises(ValueError):
+            svc.page_for_user("users", {}, _Policy(), sort="password")
+
+    def test_batch_reads_one_snapshot_and_one_scope(self, store):
+        self._seed(store)
+        counting = _CountingStore(store)
+        policy = _Policy(hidden={"users"}, ids={"deals": frozenset({5000, 5001, 5002})})
+        responses = ApiV1Service(counting).batch_for_user({}, policy, [
+            {"entity": "deals", "ids": [5000, 5001, 5003, 9999], "fields": "creator_id"},
+            {"entity": "creators", "ids": [1000, 1001], "expand": ["person", "deals"]},
+            {"entity": "deals", "filters": {"creator_id__in": "1000,1002,1003"}, "limit": 1},
+            {"entity": "users", "ids": [1]},
+            {"entity": "nope", "ids": [1]},
+            {"entity": "deals", "ids": "5000"},
+        ])
+        assert (counting.reads, policy.scopes) == (1, 1)
+        deals, creators, page, users, unknown, bad_ids = responses
+        assert deals["items"] == [{"id": 5000, "creator_id": 1000}, {"id": 5001, "creator_id": 1001}]
+        assert deals["missing"] == [5003, 9999]
+        assert [c["person"]["display_name"] for c in creators["items"]] == ["Creator 0", "Creator 1"]
+        assert [[d["id"] for d in c["deals"]] for c in creators["items"]] == [[5000], [5001]]
+        assert [d["id"] for d in page["items"]] == [5000]
+        assert page["next_cursor"] is not None
+        assert (users["status"], unknown["status"], bad_ids["status"]) == (403, 400, 400)
+
+    def test_export_walks_every_page(self, store, monkeypatch):
+        monkeypatch.setattr("crm.services.api_v1_service.EXPORT_CHUNK_SIZE", 20)
+        self._seed(store)
+        policy = _Policy(ids={"creators": frozenset(range(1000, 1045))})
+        items = ApiV1Service(_CountingStore(store)).export_for_user(
+            "creators", {}, policy, sort="-creator_id", fields=["name"], expand=["deals"],
+        )
+        items = list(items)
+        assert [item["id"] for item in items] == list(range(1044, 999, -1))
+        assert set(items[-1]) == {"id", "name", "deals"}
+        assert [d["id"] for d in items[-1]["deals"]] == [5000]
+
+    def test_export_validates_before_streaming(self, store):
+        with pytest.raises(ValueError):
+            ApiV1Service(store).export_for_user("deals", {}, _Policy(), filters=[("x__near", "1")])
+        assert ApiV1Service(store).export_for_user("deals", {}, _Policy(hidden={"deals"})) is None
+
+    def test_unknown_expand_raises(self, store):
+        with pytest.raises(ValueError):
+            ApiV1Service(store).list_for_user("deals", {}, _Policy(), ["person"])
@@ -0,0 +1,215 @@
+"""Tests for the request-scoped unit of work."""
+import os
+from types import SimpleNamespace
+
+import pytest
+from flask import g
+
+from crm.persistence.json_store import JsonDataStore
+from crm.persistence.paging import PageQuery
+from crm.persistence.sqlite_store import SqliteDataStore
+from crm.persistence.unit_of_work import ScopedStore, UnitOfWork
+from crm.services.creator_service import CreatorService
+from crm.ui.web.app import create_app
+from tests.test_web_routes import _bootstrap, _login
+
+
+def _json_store(tmp_path):
+    return JsonDataStore(os.path.join(str(tmp_path), "data.json"), cache=True)
+
+
+def _sqlite_store(tmp_path):
+    store = SqliteDataStore(f"sqlite:///{os.path.join(str(tmp_path), 'uow.db')}")
+    store.ensure_schema()
+    return store
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def backend(request, tmp_path):
+    store = _json_store(tmp_path) if request.param == "json" else _sqlite_store(tmp_path)
+    data = store.load()
+    data.setdefault("brands", []).append({"brand_id": 1, "name": "Acme", "industry": "", "website": "", "notes": ""})
+    data["_next_id"] = 1
+    store.save(data)
+    return store
+
+
+class TestUnitOfWork:
+    def test_repeated_reads_load_once(self, backend):
+        uow = UnitOfWork(backend)
+        for _ in range(5):
+            uow.snapshot()
+            uow.load()
+        assert uow.loads == 1
+
+    def test_writes_are_deferred_until_commit(self, backend):
+        uow = UnitOfWork(backend)
+        data = uow.load()
+        data["brands"][0]["name"] = "Renamed"
+        uow.save(data)
+        assert backend.load()["brands"][0]["name"] == "Acme"
+        assert uow.snapshot()["brands"][0]["name"] == "Renamed"
+        uow.commit()
+        assert uow.saves == 1
+        assert backend.load()["brands"][0]["name"] == "Renamed"
+
+    def test_multiple_saves_flush_once(self, backend):
+        uow = UnitOfWork(backend)
+        for i in range(3):
+            data = uow.load()
+            data["brands"][0]["notes"] = f"edit {i}"
+            uow.save(data)
+        uow.commit()
+        uow.commit()
+        assert uow.saves == 1
+        assert backend.load()["brands"][0]["notes"] == "edit 2"
+
+    def test_data_version_tracks_staged_writes(self, backend):
+        uow = UnitOfWork(backend)
+        v0 = uow.data_version()
+        assert uow.data_version() == v0
+        data = uow.load()
+        data["brands"][0]["name"] = "Versioned"
+        uow.save(data)
+        v1 = uow.data_version()
+        assert v1 != v0
+        uow.commit()
+        assert uow.data_version() not in (v0, v1)
+
+    def test_collection_versions_follow_committed_writes(self, backend):
+        uow = UnitOfWork(backend)
+        before = uow.collection_versions(["brands", "deals"])
+        data = uow.load()
+        data["brands"][0]["name"] = "Versioned"
+        uow.save(data)
+        assert uow.collection_versions(["brands"]) is None
+        uow.commit()
+        after = uow.collection_versions(["brands", "deals"])
+        assert after["brands"] != before["brands"]
+        assert after["deals"] == before["deals"]
+
+    def test_rollback_discards_staged_changes(self, backend):
+        uow = UnitOfWork(backend)
+        data = uow.load()
+        data["brands"].clear()
+        uow.save(data)
+        uow.rollback()
+        uow.commit()
+        assert uow.saves == 0
+        assert len(backend.load()["brands"]) == 1
+
+
+class TestScopedStore:
+    def test_services_share_the_scope_snapshot(self, backend):
+        namespace = SimpleNamespace()
+        scoped = ScopedStore(backend, lambda: namespace)
+        svc = CreatorService(scoped)
+        svc.add_creator(person_id=1, employee_id=2)
+        svc.add_creator(person_id=3, employee_id=2)
+        assert len(svc.get_creators_for_employee(2)) == 2
+        uow = scoped.current()
+        # Native stores answer the lookups with keyed queries instead.
+        assert uow.loads == (0 if getattr(backend, "native_records", False) else 1)
+        assert uow.saves == 0
+        scoped.commit()
+        assert uow.saves == 1
+        assert len(backend.load()["creators"]) == 2
+
+    def test_pages_see_staged_writes(self, backend):
+        namespace = SimpleNamespace()
+        scoped = ScopedStore(backend, lambda: namespace)
+        assert [b["name"] for b in scoped.page_records("brands", PageQuery())] == ["Acme"]
+        data = scoped.load()
+        data["brands"].append({"brand_id": 2, "name": "Staged", "industry": "", "website": "", "notes": ""})
+        scoped.save(data)
+        assert [b["name"] for b in scoped.page_records("brands", PageQuery(sort="name"))] == ["Acme", "Staged"]
+        assert len(backend.page_records("brands", PageQuery())) == 1
+
+    def test_without_scope_calls_go_to_backend(self, backend):
+        scoped = ScopedStore(backend, lambda: None)
+        data = scoped.load()
+        data["brands"][0]["name"] = "Direct"
+        scoped.save(data)
+        assert backend.load()["brands"][0]["name"] == "Direct"
+        assert scoped.current() is None
+
+
+@pytest.fixture
+def app_client(tmp_path):
+    filepath, _admin_id = _bootstrap(str(tmp_path))
+    app = create_app(data_path=filepath, storage_backend="json")
+    app.config["TESTING"] = True
+    with app.test_client() as c:
+        yield c
+
+
+class TestRequestBudget:
+    @pytest.mark.parametrize("path", [
+        "/portal/dashboard", "/portal/creators", "/portal/employees",
+        "/portal/deals", "/portal/contracts", "/portal/search?q=a",
+        "/api/v1/contracts",
+    ])
+    def test_read_only_page_loads_store_once(self, app_client, path):
+        _login(app_client)
+        resp = app_client.get(path)
+        assert resp.status_code == 200
+        assert g.unit_of_work.loads == 1
+        assert g.unit_of_work.saves == 0
+
+    @pytest.mark.parametrize("path", ["/portal/deals", "/api/v1/contracts"])
+    def test_not_modified_request_loads_nothing(self, app_client, path):
+        _login(app_client)
+        etag = app_client.get(path).headers["ETag"]
+        resp = app_client.get(path, headers={"If-None-Match": etag})
+        assert resp.status_code == 304
+        assert g.unit_of_work.loads == 0
+
+    def test_write_request_saves_once(self, app_client):
+        _login(app_client)
+        resp = app_client.post("/portal/brands/add", data={"name": "Initech"})
+        assert resp.status_code in (301, 302)
+        assert g.unit_of_work.loads == 1
+        assert g.unit_of_work.saves == 1
+        names = [b["name"] for b in app_client.application.config["store"].load()["brands"]]
+        assert "Initech" in names
+
+
+class TestCommitOnResponse:
+    def _app(self, tmp_path, status):
+        filepath, _admin_id = _bootstrap(str(tmp_path))
+        app = create_app(data_path=filepath, storage_backend="json")
+        app.config["TESTING"] = True
+
+        @app.route("/_stage/<name>", methods=["POST"])
+        def stage(name):
+            store = app.config["store"]
+            data = store.load()
+            data["brands"].append({"brand_id": 999, "name": name})
+            store.save(data)
+            return "", status
+
+        return app
+
+    @pytest.mark.parametrize("status", [400, 404, 500])
+    def test_error_responses_discard_staged_writes(self, tmp_path, status):
+        app = self._app(tmp_path, status)
+        assert app.test_client().post("/_stage/Failed").status_code == status
+        names = [b["name"] for b in app.config["store"].load()["brands"]]
+        assert "Failed" not in names
+
+    @pytest.mark.parametrize("status", [200, 302])
+    def test_successful_responses_commit(self, tmp_path, status):
+        app = self._app(tmp_path, status)
+        assert app.test_client().post("/_stage/Kept").status_code == status
+        names = [b["name"] for b in app.config["store"].load()["brands"]]
+        assert "Kept" in names
+
+    def test_failed_commit_is_a_server_error(self, tmp_path, monkeypatch):
+        app = self._app(tmp_path, 200)
+        app.config["PROPAGATE_EXCEPTIONS"] = False
+
+        def fail(*_args, **_kwargs):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(app.config["store"].backend, "_write_checkpoint", fail)
+        assert app.test_client().post("/_stage/Lost").status_code == 500
@@ -1,8 +1,10 @@
 """Smoke tests for the Flask web routes."""
+import json
 import os
 import pytest
 
 from crm.ui.web.app import create_app
+from crm.persistence.activity import ACTIVITY_KEY, seed_activity
 from crm.persistence.json_store import JsonDataStore
 from crm.services.auth_service import AuthService
 
@@ -183,6 +185,12 @@ class TestPublicRoutes:
         assert resp.status_code in (301, 302)
         assert "/login" in resp.headers.get("Location", "")
 
+    def test_dashboard_redirects_to_login_unauthenticated(self, client):
+        c, _ = client
+        resp = c.get("/portal/dashboard")
+        assert resp.status_code in (301, 302)
+        assert "/login" in resp.headers.get("Location", "")
+
 
 class TestAuth:
     def test_login_success_redirects_to_portal(self, client):
@@ -277,11 +285,13 @@ class TestPortalAuthenticated:
         assert resp.status_code == 200
         assert b"Coming Soon" in resp.data or b"coming soon" in resp.data.lower()
 
-    def test_tasks_coming_soon(self, client):
+    def test_tasks_page_lists_needs_attention(self, client):
         c, _ = client
         _login(c)
         resp = c.get("/portal/tasks")
         assert resp.status_code == 200
+        assert b"Needs Attention" in resp.data
+        assert b"Coming Soon" not in resp.data
 
     def test_discover_coming_soon(self, client):
         c, _ = client
@@ -341,6 +351,77 @@ class TestRBAC:
         assert resp.status_code == 200
 
 
+class TestPermissionsExposure:
+    def test_nav_hides_entities_without_read(self, client):
+        c, _ = client
+        c.post("/register", data={
+            "first_name": "Low", "last_name": "Priv",
+            "email": "", "phone": "",
+            "username": "lowpriv_nav", "password": "testpass",
+        }, follow_redirects=False)
+        resp = c.get("/portal/dashboard")
+        assert resp.status_code == 200
+        assert b"/portal/employees" not in resp.data
+
+    def test_admin_nav_lists_entities(self, client):
+        c, _ = client
+        _login(c)
+        resp = c.get("/portal/dashboard")
+        assert b"/portal/employees" in resp.data
+        assert b"/portal/contracts" in resp.data
+
+    def test_api_returns_permission_matrix(self, client):
+        c, _ = client
+        _login(c)
+        resp = c.get("/api/v1/permissions")
+        assert resp.status_code == 200
+        payload = resp.get_json()
+        assert payload["role"] == "Admin"
+        assert payload["permissions"]["deals"] == {
+            "read": True, "create": True, "update": True, "delete": True, "edit": True,
+        }
+
+    def test_api_permissions_requires_authentication(self, client):
+        c, _ = client
+        assert c.get("/api/v1/permissions").status_code == 401
+
+
+class TestPortalScoping:
+    def _add_out_of_scope_deal(self, c):
+        backend = c.application.config["store"].backend
+        data = backend.load()
+        outsider = next(cr for cr in data["creators"] if cr["employee_id"] == 999)
+        deal = {**data["deals"][0], "deal_id": 9001, "creator_id": outsider["creator_id"]}
+        data["deals"].append(deal)
+        data["contracts"].append({**data["contracts"][0], "contract_id": 9002, "deal_id": 9001})
+        backend.save(data)
+        return data["deals"][0]["deal_id"], data["contracts"][0]["contract_id"]
+
+    def test_deals_list_is_scoped_to_assigned_creators(self, client):
+        c, _ = client
+        own_deal, _own_contract = self._add_out_of_scope_deal(c)
+        _login(c, username="low_test", password="lowpass")
+        resp = c.get("/portal/deals")
+        assert resp.status_code == 200
+        assert f'id="row-deal-{own_deal}"'.encode() in resp.data
+        assert b'id="row-deal-9001"' not in resp.data
+
+    def test_contracts_list_follows_deal_scope(self, client):
+        c, _ = client
+        _own_deal, own_contract = self._add_out_of_scope_deal(c)
+        _login(c, username="employee_test", password="employeepass")
+        resp = c.get("/portal/contracts")
+        assert resp.status_code == 200
+        assert f'id="row-contract-{own_contract}"'.encode() in resp.data
+        assert b'id="row-contract-9002"' not in resp.data
+
+    def test_admin_lists_every_deal(self, client):
+        c, _ = client
+        self._add_out_of_scope_deal(c)
+        _login(c)
+        assert b'id="row-deal-9001"' in c.get("/portal/deals").data
+
+
 class TestApiV1Creators:
     def test_api_requires_authentication(self, client):
         c, _ = client
@@ -397,6 +478,333 @@ class TestApiV1Creators:
         assert detail.get_json() == {"error": "Not found"}
 
 
+class TestApiV1Expand:
+    def test_expand_inlines_related_records(self, client):
+        c, _ = client
+        _login(c)
+        creators = c.get("/api/v1/creators?expand=person,employee,deals").get_json()["creators"]
+        low = next(item for item in creators if item["description"] == "Low scope creator")
+        assert low["person"]["display_name"] == "Low User"
+        assert low["employee"]["title"] == "Creator Liaison"
+        assert len(low["deals"]) == 1
+        out = next(item for item in creators if item["description"] == "Out of scope creator")
+        assert out["employee"] is None
+        assert out["deals"] == []
+
+    def test_expand_on_detail_and_legacy_items(self, client):
+        c, _ = client
+        _login(c, username="employee_test", password="employeepass")
+        item = c.get("/api/v1/items?expand=deals").get_json()["items"][0]
+        assert len(item["deals"]) == 1
+        detail = c.get(f"/api/v1/creators/{item['id']}?expand=person").get_json()["creator"]
+        assert detail["person"]["full_name"] == "Low User"
+
+    def test_unknown_expand_returns_400(self, client):
+        c, _ = client
+        _login(c)
+        resp = c.get("/api/v1/deals?expand=person")
+        assert resp.status_code == 400
+        assert "error" in resp.get_json()
+
+
+class TestApiV1Paging:
+    def _add_brands(self, c, count):
+        backend = c.application.config["store"].backend
+        data = backend.load()
+        for n in range(count):
+            data["brands"].append({"brand_id": 10_000 + n, "name": f"Brand {n:03d}", "industry": "", "website": "", "notes": ""})
+        backend.save(data)
+
+    def test_pages_through_a_collection(self, client):
+        c, _ = client
+        self._add_brands(c, 25)
+        _login(c)
+        seen, cursor = [], None
+        while True:
+            url = "/api/v1/brands?limit=10&sort=-name&fields=name" + (f"&cursor={cursor}" if cursor else "")
+            payload = c.get(url).get_json()
+            assert len(payload["brands"]) <= 10
+            seen.extend(payload["brands"])
+            cursor = payload["next_cursor"]
+            if cursor is None:
+                break
+        names = [item["name"] for item in seen]
+        assert len(names) == 26
+        assert names == sorted(names, reverse=True)
+        assert set(seen[0]) == {"id", "name"}
+
+    def test_pages_are_scoped(self, client):
+        c, _ = client
+        _login(c, username="employee_test", password="employeepass")
+        payload = c.get("/api/v1/creators?limit=1").get_json()
+        assert len(payload["creators"]) == 1
+        assert payload["next_cursor"] is None
+
+    def test_filters_apply_within_scope(self, client):
+        c, _ = client
+        self._add_brands(c, 5)
+        _login(c)
+        names = [b["name"] for b in c.get("/api/v1/brands?name__in=Brand 001,Brand 003").get_json()["brands"]]
+        assert names == ["Brand 001", "Brand 003"]
+        assert c.get("/api/v1/brands?name__gte=Brand 003&sort=name&fields=name").get_json()["brands"] == [
+            {"id": 10_003, "name": "Brand 003"}, {"id": 10_004, "name": "Brand 004"},
+        ]
+        contracts = c.get("/api/v1/contracts?payment__gte=5000&is_approved=false").get_json()["contracts"]
+        assert len(contracts) == 1
+
+        c.post("/logout", follow_redirects=False)
+        _login(c, username="employee_test", password="employeepass")
+        creators = c.get("/api/v1/creators?employee_id__gt=0").get_json()["creators"]
+        assert [item["description"] for item in creators] == ["Low scope creator"]
+
+    def test_rejects_bad_paging_arguments(self, client):
+        c, _ = client
+        _login(c)
+        assert c.get("/api/v1/brands?name__near=x").status_code == 400
+        assert c.get("/api/v1/users?password=x").status_code == 400
+        assert c.get("/api/v1/brands?limit=0").status_code == 400
+        assert c.get("/api/v1/brands?limit=x").status_code == 400
+        assert c.get("/api/v1/brands?cursor=garbage").status_code == 400
+        assert c.get("/api/v1/users?sort=password").status_code == 400
+
+    def test_rejects_unknown_filter_fields(self, client):
+        c, _ = client
+        _login(c)
+        resp = c.get("/api/v1/brands?nmae=Acme")
+        assert resp.status_code == 400
+        assert "nmae" in resp.get_json()["error"]
+        assert c.get("/api/v1/brands?_=1700000000").status_code == 400
+        assert c.get("/api/v1/brands?id__gt=0").status_code == 200
+
+
+class TestApiV1Batch:
+    def test_requires_authentication(self, client):
+        c, _ = client
+        assert c.post("/api/v1/batch", json={"requests": []}).status_code == 401
+
+    def test_fetches_several_entities_in_one_call(self, client):
+        c, _ = client
+        _login(c)
+        deal = c.get("/api/v1/deals").get_json()["deals"][0]
+        resp = c.post("/api/v1/batch", json={"requests": [
+            {"entity": "deals", "ids": [deal["id"]]},
+            {"entity": "creators", "ids": [deal["creator_id"]], "expand": "person"},
+            {"entity": "contracts", "filters": {"deal_id": deal["id"]}},
+        ]})
+        assert resp.status_code == 200
+        deals, creators, contracts = resp.get_json()["responses"]
+        assert [d["id"] for d in deals["items"]] == [deal["id"]]
+        assert creators["items"][0]["person"]["full_name"] == "Low User"
+        assert [c_["deal_id"] for c_ in contracts["items"]] == [deal["id"]]
+
+    def test_batch_is_scoped(self, client):
+        c, _ = client
+        _login(c)
+        creator_ids = [item["id"] for item in c.get("/api/v1/creators").get_json()["creators"]]
+        c.post("/logout", follow_redirects=False)
+        _login(c, username="employee_test", password="employeepass")
+        (creators,) = c.post("/api/v1/batch", json={"requests": [
+            {"entity": "creators", "ids": creator_ids},
+        ]}).get_json()["responses"]
+        assert len(creators["items"]) == 1
+        assert len(creators["missing"]) == 1
+
+    def test_rejects_malformed_bodies(self, client):
+        c, _ = client
+        _login(c)
+        assert c.post("/api/v1/batch", json=[{"entity": "deals"}]).status_code == 400
+        assert c.post("/api/v1/batch", json={"requests": ["deals"]}).status_code == 400
+        too_many = {"requests": [{"entity": "deals", "ids": [1]}] * 51}
+        assert c.post("/api/v1/batch", json=too_many).status_code == 400
+
+
+class TestApiV1Export:
+    def test_requires_authentication(self, client):
+        c, _ = client
+        assert c.get("/api/v1/deals/export").status_code == 401
+
+    def test_streams_ndjson_within_scope(self, client):
+        c, _ = client
+        _login(c, username="employee_test", password="employeepass")
+        resp = c.get("/api/v1/creators/export")
+        assert resp.status_code == 200
+        assert resp.is_streamed
+        assert resp.mimetype == "application/x-ndjson"
+        rows = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+        assert [row["name"] for row in rows] == ["Low User"]
+
+    def test_streams_csv_with_selected_fields(self, client):
+        c, _ = client
+        _login(c)
+        resp = c.get("/api/v1/contracts/export?format=csv&fields=payment,is_approved&payment__gte=1000")
+        assert resp.status_code == 200
+        assert resp.mimetype == "text/csv"
+        assert "attachment" in resp.headers["Content-Disposition"]
+        header, row = resp.get_data(as_text=True).splitlines()
+        assert header == "id,payment,is_approved"
+        assert row.endswith(",5000.0,false")
+
+    def test_csv_columns_do_not_depend_on_the_first_record(self, client):
+        import csv
+
+        from crm.services.api_v1_service import EXPORT_COLUMNS
+
+        c, _ = client
+        _login(c)
+        backend = c.application.config["store"].backend
+        data = backend.load()
+        first = data["deals"][0]
+        legacy = {k: v for k, v in first.items() if k != "creator_id"}
+        data["deals"].append({
+            **legacy, "deal_id": 9001, "client_id": first["creator_id"],
+            "created_at": "2026-01-01T00:00:00+00:00",
+        })
+        backend.save(data)
+        resp = c.get("/api/v1/deals/export?format=csv")
+        rows = list(csv.DictReader(resp.get_data(as_text=True).splitlines()))
+        assert tuple(rows[0]) == EXPORT_COLUMNS["deals"]
+        assert [row["creator_id"] for row in rows] == [str(first["creator_id"])] * 2
+        assert [row["created_at"] for row in rows] == ["", "2026-01-01T00:00:00+00:00"]
+
+    def test_rejects_bad_arguments(self, client):
+        c, _ = client
+        _login(c)
+        assert c.get("/api/v1/deals/export?format=xml").status_code == 400
+        assert c.get("/api/v1/deals/export?limit=10").status_code == 400
+        assert c.get("/api/v1/deals/export?sort=bad-field").status_code == 400
+
+
+class TestConditionalGet:
+    def test_unchanged_list_is_not_modified(self, client):
+        c, _ = client
+        _login(c)
+        first = c.get("/api/v1/deals?limit=5")
+        assert first.status_code == 200
+        assert first.headers["Cache-Control"] in ("private, no-cache", "no-cache, private")
+        assert "Last-Modified" in first.headers
+        resp = c.get("/api/v1/deals?limit=5", headers={"If-None-Match": first.headers["ETag"]})
+        assert resp.status_code == 304
+        assert resp.get_data() == b""
+        assert resp.headers["ETag"] == first.headers["ETag"]
+
+    def test_not_modified_skips_the_view(self, client, monkeypatch):
+        c, _ = client
+        _login(c)
+        etag = c.get("/api/v1/contracts").headers["ETag"]
+        api_svc = c.application.config["api_v1_service"]
+        monkeypatch.setattr(api_svc, "page_for_user", lambda *a, **k: pytest.fail("view ran"))
+        assert c.get("/api/v1/contracts", headers={"If-None-Match": etag}).status_code == 304
+
+    def test_etag_follows_the_sources(self, client):
+        c, _ = client
+        _login(c)
+        etag = c.get("/api/v1/deals").headers["ETag"]
+        c.post("/portal/brands/add", data={"name": "Unrelated", "industry": "", "website": "", "notes": ""})
+        assert c.get("/api/v1/deals", headers={"If-None-Match": etag}).status_code == 304
+        assert c.get("/api/v1/brands", headers={"If-None-Match": etag}).status_code == 200
+        deal_id = c.get("/api/v1/deals").get_json()["deals"][0]["id"]
+        c.post(f"/portal/deals/{deal_id}/edit", data={"pitch_date": "2025-01-01"})
+        assert c.get("/api/v1/deals", headers={"If-None-Match": etag}).status_code == 200
+
+    def test_etag_changes_with_the_build_version(self, client):
+        c, _ = client
+        _login(c)
+        etag = c.get("/api/v1/deals").headers["ETag"]
+        c.application.config["BUILD_VERSION"] = "next-deploy"
+        resp = c.get("/api/v1/deals", headers={"If-None-Match": etag})
+        assert resp.status_code == 200
+        assert resp.headers["ETag"] != etag
+
+    def test_build_version_comes_from_the_environment(self, tmp_path, monkeypatch):
+        filepath, _ = _bootstrap(str(tmp_path))
+        default = create_app(data_path=filepath, storage_backend="json").config["BUILD_VERSION"]
+        assert default
+        monkeypatch.setenv("CRM_BUILD_VERSION", "abc123")
+        assert create_app(data_path=filepath, storage_backend="json").config["BUILD_VERSION"] == "abc123"
+
+    def test_etag_depends_on_user_and_query(self, client):
+        c, _ = client
+        _login(c)
+        admin = c.get("/api/v1/creators").headers["ETag"]
+        assert c.get("/api/v1/creators?sort=-id").headers["ETag"] != admin
+        assert c.get("/api/v1/creators?expand=deals").headers["ETag"] != admin
+        c.get("/logout")
+        _login(c, username="employee_test", password="employeepass")
+        assert c.get("/api/v1/creators", headers={"If-None-Match": admin}).status_code == 200
+
+    def test_errors_carry_no_etag(self, client):
+        c, _ = client
+        _login(c, username="low_test", password="lowpass")
+        resp = c.get("/api/v1/contracts")
+        assert resp.status_code == 403
+        assert "ETag" not in resp.headers
+
+    def test_portal_list_is_not_modified(self, client):
+        c, _ = client
+        _login(c)
+        etag = c.get("/portal/brands").headers["ETag"]
+        assert c.get("/portal/brands", headers={"If-None-Match": etag}).status_code == 304
+
+    def test_pending_flash_is_rendered(self, client):
+        c, _ = client
+        _login(c)
+        etag = c.get("/portal/brands").headers["ETag"]
+        c.post("/portal/brands/999/edit", data={"name": "Nobody"})
+        resp = c.get("/portal/brands", headers={"If-None-Match": etag})
+        assert resp.status_code == 200
+        assert b"Brand not found." in resp.data
+
+
+class TestApiV1Activity:
+    def _seed_feed(self, c):
+        backend = c.application.config["store"].backend
+        data = backend.load()
+        data[ACTIVITY_KEY] = seed_activity(data)
+        backend.save(data)
+        return data
+
+    def test_requires_authentication(self, client):
+        c, _ = client
+        assert c.get("/api/v1/activity").status_code == 401
+
+    def test_pages_through_the_feed_newest_first(self, client):
+        c, _ = client
+        data = self._seed_feed(c)
+        _login(c)
+        seen, cursor = [], None
+        while True:
+            url = "/api/v1/activity?limit=2" + (f"&cursor={cursor}" if cursor else "")
+            payload = c.get(url).get_json()
+            assert len(payload["activity"]) <= 2
+            seen.extend(e["seq"] for e in payload["activity"])
+            cursor = payload["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == sorted((e["seq"] for e in data[ACTIVITY_KEY]["events"]), reverse=True)
+
+    def test_feed_is_scoped_to_the_caller(self, client):
+        c, _ = client
+        self._seed_feed(c)
+        _login(c, username="employee_test", password="employeepass")
+        events = c.get("/api/v1/activity").get_json()["activity"]
+        labels = {e["label"] for e in events if e["entity"] == "creators"}
+        assert labels == {"Low User"}
+
+    def test_writes_through_the_portal_are_recorded(self, client):
+        c, _ = client
+        self._seed_feed(c)
+        _login(c)
+        c.post("/portal/brands/add", data={"name": "Feed Brand", "industry": "", "website": "", "notes": ""})
+        newest = c.get("/api/v1/activity?limit=1").get_json()["activity"][0]
+        assert (newest["action"], newest["entity"]) == ("created", "brands")
+
+    def test_rejects_bad_paging_arguments(self, client):
+        c, _ = client
+        _login(c)
+        assert c.get("/api/v1/activity?limit=0").status_code == 400
+        assert c.get("/api/v1/activity?cursor=abc").status_code == 400
+
+
 class TestApiV1Models:
     @pytest.mark.parametrize(
         ("path", "list_key", "singular_key"),